@@ -0,0 +1,236 @@
+"""
+Benchmarks office generation, graph building, stepping, SR computation and serialisation.
+
+Each benchmark is run over a grid of floor sizes, numbers of floors and minimum room areas. Wall time is measured
+without tracing, then the benchmark is run once more under tracemalloc to measure its peak memory usage.
+Results are written as JSON, so that runs from different commits can be compared.
+
+Usage:
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --quick
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import networkx as nx
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from officeworld.generator.office_generator import OfficeGenerator
+from officeworld.officeworld_env import OfficeWorldEnvironment
+from officeworld.utils.serialisation import OfficeBuildingJSONHandler
+
+FLOOR_SIZES = [(50, 40), (100, 80)]
+NUM_FLOORS = [1, 4]
+MIN_ROOM_AREAS = [50, 12]
+
+QUICK_FLOOR_SIZES = [(30, 24)]
+QUICK_NUM_FLOORS = [1, 2]
+QUICK_MIN_ROOM_AREAS = [50]
+
+NUM_STEPS = 10000
+
+
+def make_generator(floor_width, floor_height, num_floors, min_room_area):
+    return OfficeGenerator(
+        floor_width=floor_width,
+        floor_height=floor_height,
+        num_floors=num_floors,
+        min_room_area=min_room_area,
+        elevator_location=(floor_height // 2, floor_width // 2),
+    )
+
+
+def bench_generate_office_floor(params):
+    office_gen = make_generator(**params)
+    return lambda: office_gen.generate_office_floor()
+
+
+def bench_generate_office_building(params):
+    return lambda: make_generator(**params).generate_office_building()
+
+
+def bench_generate_office_graph(params):
+    office_gen = make_generator(**params)
+    office = office_gen.generate_office_building()
+    return lambda: office_gen.generate_office_graph(office, layout=False)
+
+
+def bench_environment_construction(params, graph_backend):
+    office = make_generator(**params).generate_office_building()
+    return lambda: OfficeWorldEnvironment(office=office, graph_backend=graph_backend)
+
+
+def bench_step(params, graph_backend):
+    office = make_generator(**params).generate_office_building()
+    env = OfficeWorldEnvironment(office=office, explorable=True, graph_backend=graph_backend)
+    rng = random.Random(0)
+
+    def run():
+        env.reset()
+        for _ in range(NUM_STEPS):
+            env.step(rng.choice(env.get_available_actions()))
+
+    return run
+
+
+def bench_build_transition_matrix(params):
+    office = make_generator(**params).generate_office_building()
+    env = OfficeWorldEnvironment(office=office)
+    return lambda: env.build_transition_matrix()
+
+
+def bench_successor_representation(params):
+    office = make_generator(**params).generate_office_building()
+    env = OfficeWorldEnvironment(office=office)
+
+    def run():
+        env.successor_representation = None
+        env.get_successor_representation(gamma=0.99)
+
+    return run
+
+
+def bench_json_save_load(params, directory):
+    office = make_generator(**params).generate_office_building()
+    file_path = os.path.join(directory, "office.json")
+
+    def run():
+        OfficeBuildingJSONHandler.save_to_json(office, file_path)
+        OfficeBuildingJSONHandler.load_from_json(file_path)
+
+    return run
+
+
+def measure(setup, repeats):
+    # Benchmarks are seeded identically, so every commit measures the same offices.
+    random.seed(0)
+    np.random.seed(0)
+    run = setup()
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    run()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "time_s": min(times),
+        "mean_time_s": sum(times) / len(times),
+        "repeats": repeats,
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+def get_metadata():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "networkx": nx.__version__,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the OfficeWorld benchmark suite.")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results.")
+    parser.add_argument("--repeats", type=int, default=3, help="How many timed runs to perform per benchmark.")
+    parser.add_argument("--quick", action="store_true", help="Only run a small parameter grid, e.g. for smoke tests.")
+    parser.add_argument(
+        "--max-sr-states",
+        type=int,
+        default=5000,
+        help="Skip transition matrix and SR benchmarks for offices with more states than this.",
+    )
+    parser.add_argument("--filter", default=None, help="Only run benchmarks whose name contains this string.")
+    args = parser.parse_args()
+
+    if args.quick:
+        grid = itertools.product(QUICK_FLOOR_SIZES, QUICK_NUM_FLOORS, QUICK_MIN_ROOM_AREAS)
+    else:
+        grid = itertools.product(FLOOR_SIZES, NUM_FLOORS, MIN_ROOM_AREAS)
+
+    benchmarks = {
+        "generate_office_floor": bench_generate_office_floor,
+        "generate_office_building": bench_generate_office_building,
+        "generate_office_graph": bench_generate_office_graph,
+        "environment_construction[networkx]": lambda params: bench_environment_construction(params, "networkx"),
+        "environment_construction[compact]": lambda params: bench_environment_construction(params, "compact"),
+        "step[networkx]": lambda params: bench_step(params, "networkx"),
+        "step[compact]": lambda params: bench_step(params, "compact"),
+        "build_transition_matrix": bench_build_transition_matrix,
+        "get_successor_representation": bench_successor_representation,
+        "json_save_load": lambda params: bench_json_save_load(params, scratch_directory),
+    }
+    dense_benchmarks = {"build_transition_matrix", "get_successor_representation"}
+
+    # Benchmarks that write files share a scratch directory, which is deleted once every measurement has finished.
+    results = []
+    with tempfile.TemporaryDirectory() as scratch_directory:
+        for (floor_width, floor_height), num_floors, min_room_area in grid:
+            params = {
+                "floor_width": floor_width,
+                "floor_height": floor_height,
+                "num_floors": num_floors,
+                "min_room_area": min_room_area,
+            }
+
+            # The dense transition matrix and SR scale quadratically with the number of states, so skip large offices.
+            random.seed(0)
+            office_gen = make_generator(**params)
+            num_states = office_gen.generate_office_graph(
+                office_gen.generate_office_building(), layout=False
+            ).number_of_nodes()
+
+            for name, setup in benchmarks.items():
+                if args.filter is not None and args.filter not in name:
+                    continue
+                if name in dense_benchmarks and num_states > args.max_sr_states:
+                    continue
+
+                result = measure(lambda: setup(params), args.repeats)
+                result.update({"benchmark": name, "params": params, "num_states": num_states})
+                if name.startswith("step"):
+                    result["steps_per_s"] = NUM_STEPS / result["time_s"]
+                results.append(result)
+
+                print(
+                    f"{name:<40} {str(params):<90} {result['time_s']:>10.4f}s "
+                    f"{result['peak_memory_bytes'] / 2**20:>9.2f}MiB"
+                )
+
+    with open(args.output, "w") as f:
+        json.dump({"metadata": get_metadata(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,2 @@
 from officeworld.officeworld_env import OfficeWorldEnvironment
+from officeworld.streaming_officeworld_env import StreamingOfficeWorldEnvironment
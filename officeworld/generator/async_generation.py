@@ -0,0 +1,93 @@
+import asyncio
+import os
+import random
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import AsyncIterator, Dict, Iterable, Tuple, Union
+
+from officeworld.generator.office_building import OfficeBuilding
+from officeworld.generator.office_generator import OfficeGenerator
+from officeworld.utils.serialisation import OfficeBuildingBinaryHandler
+
+
+def generate_office_bytes(officegen_kwargs: Dict) -> bytes:
+    """
+    Generates an office building and returns it in binary form. Runs inside worker processes.
+
+    Args:
+        officegen_kwargs (Dict): Keyword arguments to provide to OfficeGenerator.
+
+    Returns:
+        bytes: The generated office, serialised by OfficeBuildingBinaryHandler.
+    """
+    # Forked workers inherit the parent's random state, so unseeded offices would be identical across workers.
+    if officegen_kwargs.get("seed") is None:
+        random.seed(os.urandom(16))
+
+    office = OfficeGenerator(**officegen_kwargs).generate_office_building()
+    return OfficeBuildingBinaryHandler.to_bytes(office)
+
+
+async def generate_many(
+    specs: Iterable[Dict],
+    max_workers: int = None,
+    max_pending: int = None,
+    executor: Executor = None,
+    decode: bool = True,
+) -> AsyncIterator[Tuple[int, Union["OfficeBuilding", bytes]]]:
+    """
+    Generates many office buildings in a process pool without blocking the event loop, yielding each one as soon as it
+    is finished. Offices are sent back from the workers in binary form.
+
+    At most max_pending offices are generated at once, and specs are only consumed as earlier offices are yielded,
+    so a slow consumer applies backpressure. Cancelling the consuming task, or closing the generator early, cancels
+    every office that has not yet started generating.
+
+    Example:
+        async for index, office in generate_many([{"num_floors": 2, "seed": i} for i in range(100)]):
+            ...
+
+    Args:
+        specs (Iterable[Dict]): Keyword arguments to provide to OfficeGenerator, one dictionary per office.
+        max_workers (int, optional): The number of worker processes to start if no executor is given. Defaults to None, which uses one per CPU.
+        max_pending (int, optional): The maximum number of offices being generated at once. Defaults to None, which uses twice the number of workers.
+        executor (Executor, optional): An executor to generate offices in. It is not shut down afterwards. Defaults to None, in which case a new ProcessPoolExecutor is used.
+        decode (bool, optional): Whether to decode offices into OfficeBuildings, rather than yield their binary form. Defaults to True.
+
+    Yields:
+        Tuple[int, Union[OfficeBuilding, bytes]]: The index of each office's spec, and the generated office, in order of completion.
+    """
+    loop = asyncio.get_running_loop()
+    owns_executor = executor is None
+    if owns_executor:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+    if max_pending is None:
+        max_pending = 2 * (max_workers or os.cpu_count() or 1)
+
+    specs = enumerate(specs)
+    pending = {}
+    exhausted = False
+    try:
+        while True:
+            # Keep up to max_pending offices in flight.
+            while not exhausted and len(pending) < max_pending:
+                try:
+                    index, spec = next(specs)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending[loop.run_in_executor(executor, generate_office_bytes, dict(spec))] = index
+
+            if len(pending) == 0:
+                break
+
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                data = future.result()
+                yield index, OfficeBuildingBinaryHandler.from_bytes(data) if decode else data
+    finally:
+        for future in pending:
+            future.cancel()
+        if owns_executor:
+            executor.shutdown(wait=False, cancel_futures=True)
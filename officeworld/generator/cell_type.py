@@ -1,3 +1,22 @@
 from enum import Enum
 
-CellType = Enum("CellType", ["WALL", "HALL", "ROOM", "UPSTAIR", "DOWNSTAIR", "ELEVATOR", "BACKGROUND", "START", "GOAL"])
+CellType = Enum(
+    "CellType",
+    [
+        "WALL",
+        "HALL",
+        "ROOM",
+        "UPSTAIR",
+        "DOWNSTAIR",
+        "ELEVATOR",
+        "BACKGROUND",
+        "START",
+        "GOAL",
+        "OBSTACLE",
+        "MUDDY",
+        "CROWDED",
+    ],
+)
+
+# Cells the agent cannot move into.
+BLOCKED_CELL_TYPES = frozenset({CellType.WALL, CellType.OBSTACLE})
@@ -0,0 +1,143 @@
+import numpy as np
+
+from typing import List, Tuple
+
+# Furniture tiles placed by wave function collapse. Each cell's domain is a bitmask of the tiles it may still become.
+EMPTY, DESK, CABINET = 0, 1, 2
+NUM_TILES = 3
+ALL_TILES = (1 << NUM_TILES) - 1
+
+# (y, x) offsets of each direction: North, South, East, West.
+DIRECTIONS = [(-1, 0), (1, 0), (0, 1), (0, -1)]
+
+# COMPATIBLE[direction][tile] is the bitmask of tiles allowed next to the tile in that direction.
+# Desks form rows running east-west, separated by aisles, and cabinets never touch desks.
+# Every tile may be next to an empty cell, so propagation can never empty a domain.
+COMPATIBLE = np.array(
+    [
+        [ALL_TILES, 1 << EMPTY, (1 << EMPTY) | (1 << CABINET)],
+        [ALL_TILES, 1 << EMPTY, (1 << EMPTY) | (1 << CABINET)],
+        [ALL_TILES, (1 << EMPTY) | (1 << DESK), (1 << EMPTY) | (1 << CABINET)],
+        [ALL_TILES, (1 << EMPTY) | (1 << DESK), (1 << EMPTY) | (1 << CABINET)],
+    ],
+    dtype=np.uint8,
+)
+
+# SUPPORT[direction][domain] is the bitmask of tiles allowed next to a cell with the given domain.
+SUPPORT = np.array(
+    [
+        [
+            np.bitwise_or.reduce([COMPATIBLE[d, t] for t in range(NUM_TILES) if domain >> t & 1] or [0])
+            for domain in range(ALL_TILES + 1)
+        ]
+        for d in range(len(DIRECTIONS))
+    ],
+    dtype=np.uint8,
+)
+
+# The eight cells surrounding a cell, in order around it, so that consecutive cells share an edge.
+RING = [(-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1)]
+
+
+def _is_simple(code: int) -> bool:
+    # A cell is simple if the free cells among its four neighbours are all joined to each other around the ring,
+    # in which case blocking it cannot disconnect anything.
+    free = [code >> i & 1 for i in range(len(RING))]
+    if all(free):
+        return True
+    start = free.index(0)
+    run, runs = 0, [None] * len(RING)
+    for i in range(start, start + len(RING)):
+        if free[i % len(RING)]:
+            runs[i % len(RING)] = run
+        else:
+            run += 1
+    return len({runs[i] for i in [1, 3, 5, 7] if free[i]}) <= 1
+
+
+# SIMPLE[code] says whether a cell whose ring of free neighbours is described by the 8-bit code is simple.
+SIMPLE = np.array([_is_simple(code) for code in range(1 << len(RING))], dtype=bool)
+
+
+def furnish_floor(
+    free: np.ndarray,
+    rooms: List[Tuple[int, int, int, int]],
+    obstacle_density: float,
+    rng: "np.random.Generator",
+) -> np.ndarray:
+    """
+    Places furniture in an office floor's rooms using wave function collapse.
+
+    Every room cell starts with a domain of possible tiles, which are collapsed in nine batches of cells that share
+    no neighbours, with constraints propagated across the whole floor at once after each batch. Connectivity is kept
+    by only placing furniture on cells that pass a local test on their eight surrounding cells, which guarantees that
+    blocking them cannot disconnect the floor, so the floor never needs to be searched again.
+
+    Args:
+        free (np.ndarray): A boolean (floor_height, floor_width) array marking the cells the agent can occupy.
+        rooms (List[Tuple[int, int, int, int]]): The (left, top, width, height) rectangles of the rooms to furnish.
+        obstacle_density (float): The relative weight given to furniture, rather than empty floor, in each cell. Should lie in [0, 1).
+        rng (np.random.Generator): The random number generator to use.
+
+    Returns:
+        np.ndarray: A boolean (floor_height, floor_width) array marking the cells that are now obstacles.
+    """
+    height, width = free.shape
+    free = np.pad(free, 1)
+    obstacles = np.zeros((height + 2, width + 2), dtype=bool)
+
+    # Cabinets stand against room walls, while desks are kept away from them.
+    domains = np.full((height + 2, width + 2), 1 << EMPTY, dtype=np.uint8)
+    in_room = np.zeros((height + 2, width + 2), dtype=bool)
+    for left, top, room_width, room_height in rooms:
+        room = (slice(top + 1, top + room_height + 1), slice(left + 1, left + room_width + 1))
+        in_room[room] = True
+        domains[room] = (1 << EMPTY) | (1 << CABINET)
+        domains[top + 2 : top + room_height, left + 2 : left + room_width] = (1 << EMPTY) | (1 << DESK)
+    domains &= np.where(free, ALL_TILES, 1 << EMPTY).astype(np.uint8)
+
+    weights = np.maximum(np.array([1.0 - obstacle_density, 0.6 * obstacle_density, 0.4 * obstacle_density]), 0.0)
+    ys, xs = np.mgrid[0 : height + 2, 0 : width + 2]
+    for batch in rng.permutation(9):
+        cell_ys, cell_xs = np.nonzero(in_room & (ys % 3 == batch // 3) & (xs % 3 == batch % 3))
+        if len(cell_ys) == 0:
+            continue
+
+        # Collapse each cell in the batch to a tile from its domain, chosen in proportion to the tile weights. Only
+        # allowed tiles with positive weight can be drawn, and cells with no such tile stay empty, which is always
+        # allowed.
+        allowed = (domains[cell_ys, cell_xs, None] >> np.arange(NUM_TILES, dtype=np.uint8)) & 1
+        cumulative = np.cumsum(allowed * weights, axis=1)
+        draws = rng.random(len(cell_ys)) * cumulative[:, -1]
+        tiles = np.argmax(cumulative > draws[:, None], axis=1)
+        tiles[cumulative[:, -1] <= 0] = EMPTY
+
+        # Only block cells whose removal cannot disconnect the floor. Batch cells are far enough apart that their
+        # rings don't overlap, so they can all be tested at once.
+        codes = np.zeros(len(cell_ys), dtype=np.int64)
+        for i, (dy, dx) in enumerate(RING):
+            codes |= free[cell_ys + dy, cell_xs + dx].astype(np.int64) << i
+        tiles[~SIMPLE[codes]] = EMPTY
+
+        blocked = tiles != EMPTY
+        free[cell_ys[blocked], cell_xs[blocked]] = False
+        obstacles[cell_ys[blocked], cell_xs[blocked]] = True
+        domains[cell_ys, cell_xs] = (1 << tiles).astype(np.uint8)
+        _propagate(domains)
+
+    return obstacles[1:-1, 1:-1]
+
+
+def _propagate(domains: np.ndarray):
+    # Removes unsupported tiles from every cell's domain, in place, until no domain changes.
+    height, width = domains.shape
+    changed = True
+    while changed:
+        changed = False
+        for direction, (dy, dx) in enumerate(DIRECTIONS):
+            source = domains[max(0, -dy) : height - max(0, dy), max(0, -dx) : width - max(0, dx)]
+            target = domains[max(0, dy) : height - max(0, -dy), max(0, dx) : width - max(0, -dx)]
+            restricted = target & SUPPORT[direction][source]
+            if not np.array_equal(restricted, target):
+                target[...] = restricted
+                changed = True
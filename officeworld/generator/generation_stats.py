@@ -0,0 +1,79 @@
+from typing import Dict, List
+
+# The phases of office floor generation, in the order they run.
+PHASES = ("hallway", "room", "doors", "furniture", "terrain", "connectivity")
+
+
+class FloorGenerationStats(object):
+    def __init__(self, floor: int):
+        """
+        Statistics about the generation of a single office floor, accumulated over every attempt at generating it.
+
+        Args:
+            floor (int): The index of the floor these statistics describe.
+        """
+        self.floor = floor
+        self.attempts = 0
+        self.rejected_elevator = 0
+        self.rejected_connected = 0
+        self.door_retries = 0
+        self.phase_times = {phase: 0.0 for phase in PHASES}
+
+    @property
+    def rejections(self) -> int:
+        return self.rejected_elevator + self.rejected_connected
+
+    def to_dict(self) -> Dict:
+        return {
+            "floor": self.floor,
+            "attempts": self.attempts,
+            "rejected_elevator": self.rejected_elevator,
+            "rejected_connected": self.rejected_connected,
+            "door_retries": self.door_retries,
+            "phase_times": dict(self.phase_times),
+        }
+
+
+class GenerationStats(object):
+    def __init__(self):
+        """
+        Statistics about the generation of an office building: per-phase wall times, and counts of generation attempts,
+        rejected floors and door-placement retries, both in total and for each floor.
+        """
+        self.floors: List[FloorGenerationStats] = []
+        self.total_time = 0.0
+
+    @property
+    def attempts(self) -> int:
+        return sum(floor.attempts for floor in self.floors)
+
+    @property
+    def rejected_elevator(self) -> int:
+        return sum(floor.rejected_elevator for floor in self.floors)
+
+    @property
+    def rejected_connected(self) -> int:
+        return sum(floor.rejected_connected for floor in self.floors)
+
+    @property
+    def rejections(self) -> int:
+        return self.rejected_elevator + self.rejected_connected
+
+    @property
+    def door_retries(self) -> int:
+        return sum(floor.door_retries for floor in self.floors)
+
+    @property
+    def phase_times(self) -> Dict[str, float]:
+        return {phase: sum(floor.phase_times[phase] for floor in self.floors) for phase in PHASES}
+
+    def to_dict(self) -> Dict:
+        return {
+            "total_time": self.total_time,
+            "attempts": self.attempts,
+            "rejected_elevator": self.rejected_elevator,
+            "rejected_connected": self.rejected_connected,
+            "door_retries": self.door_retries,
+            "phase_times": self.phase_times,
+            "floors": [floor.to_dict() for floor in self.floors],
+        }
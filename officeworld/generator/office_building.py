@@ -1,6 +1,7 @@
 from typing import List, Tuple
 
 from officeworld.generator.cell_type import CellType
+from officeworld.generator.generation_stats import GenerationStats
 
 
 class OfficeBuilding(object):
@@ -9,6 +10,8 @@ class OfficeBuilding(object):
         layout: List[List[List["CellType"]]],
         halls: List[List[Tuple[int, int, int, int]]],
         rooms: List[List[Tuple[int, int, int, int]]],
+        stats: "GenerationStats" = None,
+        floor_templates: List[int] = None,
     ):
         """
         A data class representing an officeworld office building.
@@ -17,7 +20,35 @@ class OfficeBuilding(object):
             layout (List[List[List[&quot;CellType&quot;]]]): A nested list of cells representing the layout of the office. Has the structure layout[floor][row][col].
             halls (List[List[Tuple[int, int, int, int]]]): A nested list of tuples representing the hallways. Has the structure halls[floor] = [(left, top, width, height)]
             rooms (List[List[Tuple[int, int, int, int]]]): A nested list of tuples representing the rooms. Has the structure rooms[floor] = [(left, top, width, height)]
+            stats (GenerationStats, optional): Statistics about how the office was generated. Defaults to None.
+            floor_templates (List[int], optional): The template each floor uses. Floors with the same template share the same layout, hall and room lists, rather than holding copies of them. Defaults to None, in which case every floor is independent.
         """
         self.layout = layout
         self.halls = halls
         self.rooms = rooms
+        self.stats = stats
+        self.floor_templates = floor_templates
+
+    @property
+    def num_templates(self) -> int:
+        if self.floor_templates is None:
+            return len(self.layout)
+        return len(set(self.floor_templates))
+
+    def unshare_floor(self, floor: int):
+        """
+        Gives a floor its own copy of its template's layout, so that it can be changed (e.g., by carving a start or
+        goal room into it) without changing every other floor using the same template.
+
+        Args:
+            floor (int): The index of the floor.
+        """
+        if self.floor_templates is None:
+            return
+
+        template = self.floor_templates[floor]
+        if self.floor_templates.count(template) > 1:
+            self.layout[floor] = [list(row) for row in self.layout[floor]]
+            self.halls[floor] = list(self.halls[floor])
+            self.rooms[floor] = list(self.rooms[floor])
+            self.floor_templates[floor] = max(self.floor_templates) + 1
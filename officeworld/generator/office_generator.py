@@ -1,11 +1,18 @@
 import random
+import time
 
 import networkx as nx
+import numpy as np
 
 from enum import Enum
 
 from officeworld.utils import office_layout
-from officeworld.generator.cell_type import CellType
+from officeworld.utils.compact_graph import CompactGraph
+from officeworld.utils.layout_array import layout_to_array
+from officeworld.utils.transition_table import VALID_STATE_TYPES, build_transition_table
+from officeworld.generator.cell_type import BLOCKED_CELL_TYPES, CellType
+from officeworld.generator.furniture import furnish_floor
+from officeworld.generator.generation_stats import FloorGenerationStats, GenerationStats
 from officeworld.generator.office_building import OfficeBuilding
 
 
@@ -21,6 +28,14 @@ class OfficeGenerator(object):
         max_hall_rate=0.15,
         extra_door_prob=0.2,
         elevator_location=None,
+        num_stairwells=0,
+        max_stair_span=3,
+        obstacle_density=0.0,
+        crowded_hall_prob=0.0,
+        muddy_room_prob=0.0,
+        num_templates=None,
+        phase_callbacks=None,
+        seed=None,
     ):
         """
         Initialises an Office generator.
@@ -34,8 +49,22 @@ class OfficeGenerator(object):
             min_room_length (int, optional): The generator will not try to subdivide rooms with an edge length less than this. Defaults to 4.
             max_hall_rate (float, optional): The proportion of a floor the generator will aim to cover in corridors. Defaults to 0.15.
             extra_door_prob (float, optional): How likely another door will be added to a room after one has already been placed. Defaults to 0.2.
-            elevator_location (_type_, optional): The at which the elevator shaft will be placed. Defaults to None.
+            elevator_location (Tuple[int, int] | List[Tuple[int, int]], optional): The (y, x) location at which the elevator shaft will be placed, or a list of locations to place several elevator shafts. Defaults to None.
+            num_stairwells (int, optional): How many stairwells to place in the building's halls. Each spans a few adjacent floors, rather than the whole building. Defaults to 0.
+            max_stair_span (int, optional): The maximum number of floors a stairwell can span. Defaults to 3.
+            obstacle_density (float, optional): How strongly to favour placing furniture, rather than empty floor, in each room cell. Furniture is only placed where it cannot disconnect the floor. Defaults to 0.0, in which case rooms are left empty.
+            crowded_hall_prob (float, optional): How likely each hall is to have a crowded stretch, in which movement is stochastic. Defaults to 0.0.
+            muddy_room_prob (float, optional): How likely each room is to have a muddy patch, in which movement costs more. Defaults to 0.0.
+            num_templates (int, optional): If given, only this many distinct floors are generated, and each floor of the building reuses one of them. Floors using the same template share their layout, rather than holding copies of it, so generation time and memory scale with the number of templates. Defaults to None, in which case every floor is generated independently.
+            phase_callbacks (Dict[str, Callable], optional): Maps generation phases ("hallway", "room", "doors", "furniture", "terrain", "connectivity") to functions called as callback(elapsed, floor_stats) each time that phase finishes. Defaults to None.
+            seed (int, optional): Seeds a random number generator private to this OfficeGenerator, making the offices it generates reproducible. Defaults to None, in which case Python's global random module is used.
+
+        Raises:
+            ValueError: Raised if obstacle_density is not in [0, 1).
         """
+        if not 0 <= obstacle_density < 1:
+            raise ValueError(f"The obstacle density must be in [0, 1), but got {obstacle_density}.")
+
         # Initialise Floor Parameters.
         self.floor_width = floor_width
         self.floor_height = floor_height
@@ -48,58 +77,144 @@ class OfficeGenerator(object):
         self.max_hall_rate = max_hall_rate
         self.min_room_length = min_room_length
         self.extra_door_prob = extra_door_prob
+        self.obstacle_density = obstacle_density
+        self.crowded_hall_prob = crowded_hall_prob
+        self.muddy_room_prob = muddy_room_prob
 
         if elevator_location is None:
             self.elevator_location = None
+            self.elevator_locations = []
         else:
             self.elevator_location = elevator_location
+            if np.ndim(elevator_location) == 1:
+                self.elevator_locations = [tuple(elevator_location)]
+            else:
+                self.elevator_locations = [tuple(location) for location in elevator_location]
+
+        self.num_stairwells = num_stairwells
+        self.num_templates = num_templates
+        self.max_stair_span = max_stair_span
+
+        # Initialise the random number generator.
+        self.seed = seed
+        self._random = None if seed is None else random.Random(seed)
+
+        # Initialise generation statistics.
+        self.phase_callbacks = {} if phase_callbacks is None else phase_callbacks
+        self.stats = None
 
         # Initialise Office.
         self.office_floors = [self._create_empty_office_floor() for _ in range(num_floors)]
         self.office_halls = [None] * num_floors
         self.office_rooms = [None] * num_floors
 
+    @property
+    def _rng(self):
+        # Unseeded generators share Python's global random number generator.
+        return random if self._random is None else self._random
+
     def generate_office_building(self, verbose: bool = False) -> "OfficeBuilding":
-        rej_elevator = 0
-        rej_connected = 0
-
-        for i in range(self.num_floors):
-            while True:
-                # Generate a new office floor.
-                if self.elevator_location is None:
-                    layout, halls, rooms = self.generate_office_floor()
-                    self.office_floors[i] = layout
-                    self.office_halls[i] = halls
-                    self.office_rooms[i] = rooms
-                else:
-                    y, x = self.elevator_location
-                    while self.office_floors[i][y][x] != CellType.HALL:
-                        layout, halls, rooms = self.generate_office_floor()
-                        self.office_floors[i] = layout
-                        self.office_halls[i] = halls
-                        self.office_rooms[i] = rooms
-
-                        if self.office_floors[i][y][x] != CellType.HALL:
-                            # print("Rejected: Cannot Place Elevator in Wall.")
-                            rej_elevator += 1
-                    self.office_floors[i][y][x] = CellType.ELEVATOR
-
-                # Check that the new office floor is valid (i.e., that the state transition graph is connected).
-                if nx.is_weakly_connected(self.generate_office_graph([self.office_floors[i]], layout=False)):
-                    break
-                else:
-                    # print("Rejected: State-transition graph is not connected.")
-                    rej_connected += 1
+        self.stats = GenerationStats()
+        start_time = time.perf_counter()
+
+        if self.num_templates is None or self.num_templates >= self.num_floors:
+            floor_templates = None
+            for i in range(self.num_floors):
+                floor_stats = FloorGenerationStats(i)
+                self.stats.floors.append(floor_stats)
+                self.office_floors[i], self.office_halls[i], self.office_rooms[i] = self._generate_valid_floor(
+                    floor_stats
+                )
+        else:
+            # Every template is used at least once, and the remaining floors reuse randomly chosen templates.
+            templates = []
+            for i in range(self.num_templates):
+                floor_stats = FloorGenerationStats(i)
+                self.stats.floors.append(floor_stats)
+                templates.append(self._generate_valid_floor(floor_stats))
+            floor_templates = list(range(self.num_templates))
+            floor_templates += [
+                self._rng.randrange(self.num_templates) for _ in range(self.num_floors - self.num_templates)
+            ]
+            for i, template in enumerate(floor_templates):
+                self.office_floors[i], self.office_halls[i], self.office_rooms[i] = templates[template]
+
+        office = OfficeBuilding(
+            self.office_floors, self.office_halls, self.office_rooms, stats=self.stats, floor_templates=floor_templates
+        )
+
+        # Stairwells span several floors, so they are placed once every floor has been generated.
+        for _ in range(self.num_stairwells):
+            self._place_stairwell(office)
+
+        self.stats.total_time = time.perf_counter() - start_time
 
         if verbose:
+            stats = self.stats
             print(f"Successfully generated office building with {self.num_floors} floors!")
             print(
-                f"Rejected {rej_elevator + rej_connected} floors.\n\tCouldn't place elevator {rej_elevator} times.\n\tOffice not connected {rej_connected} times."
+                f"Rejected {stats.rejections} floors.\n\tCouldn't place elevator {stats.rejected_elevator} times.\n\tOffice not connected {stats.rejected_connected} times."
+            )
+            print(f"Retried door placement {stats.door_retries} times.")
+            print(
+                f"Took {stats.total_time:.3f}s.\n\t"
+                + "\n\t".join(f"{phase}: {elapsed:.3f}s" for phase, elapsed in stats.phase_times.items())
             )
 
-        return OfficeBuilding(self.office_floors, self.office_halls, self.office_rooms)
+        return office
+
+    def generate_floor(self, floor: int, stats: "FloorGenerationStats" = None):
+        """
+        Generates a single valid floor, as a deterministic function of this generator's seed and the floor's index.
+        Floors can therefore be generated lazily, in any order, and regenerated identically later on.
+
+        Args:
+            floor (int): The index of the floor to generate.
+            stats (FloorGenerationStats, optional): Statistics to record the floor's generation in. Defaults to None.
+
+        Raises:
+            ValueError: Raised if this generator was not given a seed.
+
+        Returns:
+            Tuple[List[List[CellType]], List[Tuple[int, int, int, int]], List[Tuple[int, int, int, int]]]: The floor's layout, halls and rooms.
+        """
+        if self.seed is None:
+            raise ValueError("Floors can only be generated independently by a seeded OfficeGenerator.")
+
+        previous_random = self._random
+        self._random = random.Random(f"{self.seed}:{floor}")
+        try:
+            return self._generate_valid_floor(FloorGenerationStats(floor) if stats is None else stats)
+        finally:
+            self._random = previous_random
+
+    def _generate_valid_floor(self, stats: "FloorGenerationStats"):
+        # Generates floors until one has room for the elevator and a connected state-transition graph.
+        while True:
+            layout, halls, rooms = self.generate_office_floor(stats)
+
+            if any(layout[y][x] != CellType.HALL for y, x in self.elevator_locations):
+                # print("Rejected: Cannot Place Elevator in Wall.")
+                stats.rejected_elevator += 1
+                continue
+            for y, x in self.elevator_locations:
+                layout[y][x] = CellType.ELEVATOR
+
+            # Check that the new office floor is valid (i.e., that the state transition graph is connected).
+            phase_start = time.perf_counter()
+            connected = self._is_floor_connected(layout)
+            self._end_phase("connectivity", phase_start, stats)
+            if connected:
+                return layout, halls, rooms
+
+            # print("Rejected: State-transition graph is not connected.")
+            stats.rejected_connected += 1
+
+    def generate_office_floor(self, stats: "FloorGenerationStats" = None):
+        if stats is not None:
+            stats.attempts += 1
+        phase_start = time.perf_counter()
 
-    def generate_office_floor(self):
         # Fill entire map with wall.
         office_floor = self._create_empty_office_floor()
 
@@ -146,6 +261,7 @@ class OfficeGenerator(object):
 
         # Finish connecting all halls to each other.
         office_floor = self._connect_halls(office_floor)
+        phase_start = self._end_phase("hallway", phase_start, stats)
 
         # Room Phase.
         splittable_chunks = splittable_chunks + unsplittable_chunks
@@ -160,7 +276,7 @@ class OfficeGenerator(object):
             # If there is a valid direction to split the chunk, choose one at random, split it
             # and add the two resulting chunks to the queue.
             if len(valid_split_directions) > 0:
-                chunks = self._create_rooms(chunk, random.choice(valid_split_directions))
+                chunks = self._create_rooms(chunk, self._rng.choice(valid_split_directions))
                 splittable_chunks.extend(chunks)
 
                 for _chunk in splittable_chunks + rooms:
@@ -172,6 +288,8 @@ class OfficeGenerator(object):
                 rooms.append(chunk)
                 office_floor = self._carve_area(chunk, CellType.ROOM, office_floor)
 
+        phase_start = self._end_phase("room", phase_start, stats)
+
         # Doors Phase
         unconnected_rooms = rooms
         connected_rooms = []
@@ -188,7 +306,7 @@ class OfficeGenerator(object):
             left_wall = [(left - 1, y) for y in range(top, top + height)]
             right_wall = [(left + width, y) for y in range(top, top + height)]
             walls = top_wall + bottom_wall + left_wall + right_wall
-            random.shuffle(walls)
+            self._rng.shuffle(walls)
 
             # Walk around the room's walls.
             # If it is next to a hallway, make a door leading to it.
@@ -272,9 +390,35 @@ class OfficeGenerator(object):
             # Else, return the room to the list of unconnected rooms.
             if not room_connected:
                 unconnected_rooms.append(room)
+                if stats is not None:
+                    stats.door_retries += 1
+
+        phase_start = self._end_phase("doors", phase_start, stats)
+
+        # Furniture Phase.
+        if self.obstacle_density > 0:
+            office_floor = self._furnish_rooms(connected_rooms, office_floor)
+        phase_start = self._end_phase("furniture", phase_start, stats)
+
+        # Terrain Phase.
+        if self.crowded_hall_prob > 0 or self.muddy_room_prob > 0:
+            office_floor = self._add_terrain(halls, connected_rooms, office_floor)
+        self._end_phase("terrain", phase_start, stats)
 
         return office_floor, halls, connected_rooms
 
+    def _end_phase(self, phase, phase_start, stats=None):
+        # Records the time taken by a generation phase, and returns the time at which it ended.
+        phase_end = time.perf_counter()
+        if stats is not None:
+            stats.phase_times[phase] += phase_end - phase_start
+
+        callback = self.phase_callbacks.get(phase)
+        if callback is not None:
+            callback(phase_end - phase_start, stats)
+
+        return phase_end
+
     def _create_empty_office_floor(self):
         office = []
         for y in range(self.floor_height):
@@ -292,7 +436,7 @@ class OfficeGenerator(object):
         # Choose a splitting point, ensuring the remaining chunks
         # are large enough to become rooms (or be split again).
         if hall_dir == "V":
-            splitting_point = random.randint(
+            splitting_point = self._rng.randint(
                 self.min_room_length + 1, (width - 1) - self.min_room_length - self.hall_width - 1
             )
             hall = (left + splitting_point, top, self.hall_width, height)
@@ -306,7 +450,7 @@ class OfficeGenerator(object):
             return hall, [l_chunk, r_chunk]
 
         elif hall_dir == "H":
-            splitting_point = random.randint(
+            splitting_point = self._rng.randint(
                 self.min_room_length + 1, (height) - self.min_room_length - self.hall_width - 1
             )
             hall = (left, top + splitting_point, width, self.hall_width)
@@ -324,14 +468,14 @@ class OfficeGenerator(object):
 
         # Split Vertically.
         if direction == "V":
-            splitting_point = random.randint(self.min_room_length - 1, (width - 1) - self.min_room_length - 1)
+            splitting_point = self._rng.randint(self.min_room_length - 1, (width - 1) - self.min_room_length - 1)
             l_chunk = (left, top, splitting_point, height)
             r_chunk = (left + splitting_point + 1, top, width - splitting_point - 1, height)
             return [l_chunk, r_chunk]
 
         # Split Horizontally.
         elif direction == "H":
-            splitting_point = random.randint(self.min_room_length - 1, (height) - self.min_room_length - 1)
+            splitting_point = self._rng.randint(self.min_room_length - 1, (height) - self.min_room_length - 1)
             u_chunk = (left, top, width, splitting_point)
             d_chunk = (left, top + splitting_point + 1, width, height - splitting_point - 1)
             return [u_chunk, d_chunk]
@@ -343,6 +487,81 @@ class OfficeGenerator(object):
                 office_floor[y][x] = type
         return office_floor
 
+    def _carve_room(self, room, type, office_floor):
+        # Like _carve_area, but leaves any furniture in the room in place.
+        left, top, width, height = room
+        for y in range(top, top + height):
+            for x in range(left, left + width):
+                if office_floor[y][x] != CellType.OBSTACLE:
+                    office_floor[y][x] = type
+        return office_floor
+
+    def _place_stairwell(self, office):
+        # Places a stairwell spanning a few adjacent floors, at a hall cell shared by all of them.
+        # Every floor but the top one gets an upward stair, and the top floor gets a downward stair.
+        if self.num_floors < 2:
+            return
+
+        span = self._rng.randint(2, max(2, min(self.max_stair_span, self.num_floors)))
+        bottom = self._rng.randint(0, self.num_floors - span)
+        floors = range(bottom, bottom + span)
+
+        candidates = np.ones((self.floor_height, self.floor_width), dtype=bool)
+        for floor in floors:
+            in_hall = np.zeros_like(candidates)
+            for left, top, width, height in self.office_halls[floor]:
+                in_hall[top : top + height, left : left + width] = True
+            candidates &= in_hall & (layout_to_array([self.office_floors[floor]])[0] == CellType.HALL.value)
+
+        ys, xs = np.nonzero(candidates)
+        if len(ys) == 0:
+            return
+        i = self._rng.randrange(len(ys))
+        y, x = int(ys[i]), int(xs[i])
+        for floor in floors:
+            office.unshare_floor(floor)
+        for floor in floors[:-1]:
+            self.office_floors[floor][y][x] = CellType.UPSTAIR
+        self.office_floors[floors[-1]][y][x] = CellType.DOWNSTAIR
+
+    def _furnish_rooms(self, rooms, office_floor):
+        free = np.isin(layout_to_array([office_floor])[0], VALID_STATE_TYPES)
+        rng = np.random.default_rng(self._rng.getrandbits(64))
+        obstacles = furnish_floor(free, rooms, self.obstacle_density, rng)
+        for y, x in zip(*np.nonzero(obstacles)):
+            office_floor[y][x] = CellType.OBSTACLE
+        return office_floor
+
+    def _add_terrain(self, halls, rooms, office_floor):
+        # Crowds a stretch along the length of some halls, leaving the elevator shafts clear, and muddies a patch of
+        # some rooms. Only plain hall and room cells are changed.
+        elevator_locations = set(self.elevator_locations)
+        for left, top, width, height in halls:
+            if self._rng.random() < self.crowded_hall_prob:
+                if width > height:
+                    length = self._rng.randint(max(1, width // 4), max(1, width // 2))
+                    left, width = self._rng.randint(left, left + width - length), length
+                else:
+                    length = self._rng.randint(max(1, height // 4), max(1, height // 2))
+                    top, height = self._rng.randint(top, top + height - length), length
+                for y in range(top, top + height):
+                    for x in range(left, left + width):
+                        if office_floor[y][x] == CellType.HALL and (y, x) not in elevator_locations:
+                            office_floor[y][x] = CellType.CROWDED
+
+        for left, top, width, height in rooms:
+            if self._rng.random() < self.muddy_room_prob:
+                patch_width = self._rng.randint(1, width)
+                patch_height = self._rng.randint(1, height)
+                patch_left = self._rng.randint(left, left + width - patch_width)
+                patch_top = self._rng.randint(top, top + height - patch_height)
+                for y in range(patch_top, patch_top + patch_height):
+                    for x in range(patch_left, patch_left + patch_width):
+                        if office_floor[y][x] == CellType.ROOM:
+                            office_floor[y][x] = CellType.MUDDY
+
+        return office_floor
+
     def _connect_halls(self, office_floor):
         for y in range(len(office_floor) - 2):
             for x in range(len(office_floor[0]) - 2):
@@ -382,6 +601,10 @@ class OfficeGenerator(object):
 
         return None, office[y][x]
 
+    def _is_floor_connected(self, office_floor):
+        floor_table = build_transition_table(layout_to_array([office_floor]), explorable=True)
+        return CompactGraph.from_transition_table(floor_table).is_weakly_connected()
+
     def generate_office_graph(self, office=None, layout=True):
         if office is None:
             office_floors = self.office_floors
@@ -391,7 +614,17 @@ class OfficeGenerator(object):
             else:
                 office_floors = office
 
-        valid_state_types = {CellType.ROOM, CellType.HALL, CellType.ELEVATOR, CellType.START, CellType.GOAL}
+        valid_state_types = {
+            CellType.ROOM,
+            CellType.HALL,
+            CellType.ELEVATOR,
+            CellType.UPSTAIR,
+            CellType.DOWNSTAIR,
+            CellType.START,
+            CellType.GOAL,
+            CellType.MUDDY,
+            CellType.CROWDED,
+        }
 
         stg = nx.DiGraph()
 
@@ -426,14 +659,24 @@ class OfficeGenerator(object):
                             if floor > 0:  # Down elevator.
                                 stg.add_edge(state, (floor - 1, y, x))
 
-                        # Add self-loops to states next to walls.
-                        if office_floors[floor][y + 1][x] == CellType.WALL:
+                        # Add edges between stairs on different floors.
+                        if office_floors[floor][y][x] == CellType.UPSTAIR and floor < num_floors - 1:
+                            stg.add_edge(state, (floor + 1, y, x))
+                        if (
+                            office_floors[floor][y][x] in {CellType.UPSTAIR, CellType.DOWNSTAIR}
+                            and floor > 0
+                            and office_floors[floor - 1][y][x] == CellType.UPSTAIR
+                        ):
+                            stg.add_edge(state, (floor - 1, y, x))
+
+                        # Add self-loops to states next to walls or furniture.
+                        if office_floors[floor][y + 1][x] in BLOCKED_CELL_TYPES:
                             stg.add_edge(state, state)
-                        if office_floors[floor][y - 1][x] == CellType.WALL:
+                        if office_floors[floor][y - 1][x] in BLOCKED_CELL_TYPES:
                             stg.add_edge(state, state)
-                        if office_floors[floor][y][x + 1] == CellType.WALL:
+                        if office_floors[floor][y][x + 1] in BLOCKED_CELL_TYPES:
                             stg.add_edge(state, state)
-                        if office_floors[floor][y][x - 1] == CellType.WALL:
+                        if office_floors[floor][y][x - 1] in BLOCKED_CELL_TYPES:
                             stg.add_edge(state, state)
 
         if layout:
@@ -18,6 +18,9 @@ COLOURS = {
     CellType.BACKGROUND: (80, 60, 40),
     CellType.START: (0, 255, 0),
     CellType.GOAL: (255, 0, 0),
+    CellType.OBSTACLE: (95, 60, 30),
+    CellType.MUDDY: (120, 95, 55),
+    CellType.CROWDED: (140, 140, 175),
 }
 
 ORANGE = (255, 165, 0)
@@ -1,9 +1,13 @@
-import json
+import collections
+import numpy as np
 import pygame
 
+from concurrent.futures import ProcessPoolExecutor
+
+from officeworld.generator.async_generation import generate_office_bytes
 from officeworld.generator.cell_type import CellType
-from officeworld.generator.office_generator import OfficeGenerator
-from officeworld.utils.serialisation import OfficeBuildingJSONHandler
+from officeworld.utils.layout_array import layout_to_array
+from officeworld.utils.serialisation import OfficeBuildingBinaryHandler
 
 Colors = {
     CellType.WALL: (50, 15, 15),
@@ -15,11 +19,19 @@ Colors = {
     CellType.BACKGROUND: (80, 60, 40),
     CellType.START: (0, 255, 0),
     CellType.GOAL: (255, 0, 0),
+    CellType.OBSTACLE: (95, 60, 30),
+    CellType.MUDDY: (120, 95, 55),
+    CellType.CROWDED: (140, 140, 175),
 }
 
-# Initialise Office Generator.
-# office_gen = OfficeGenerator(num_floors=1, elevator_location=(25, 20), start_floor=1, goal_floor=2)
-office_gen = OfficeGenerator(
+# Lookup table from CellType values to colours, used to render whole floors at once.
+COLOR_TABLE = np.zeros((len(CellType) + 1, 3), dtype=np.uint8)
+for cell_type, color in Colors.items():
+    COLOR_TABLE[cell_type.value] = color
+
+# Office Generator Settings.
+# officegen_kwargs = dict(num_floors=1, elevator_location=(25, 20), start_floor=1, goal_floor=2)
+officegen_kwargs = dict(
     floor_width=50,
     floor_height=40,
     min_room_area=12,
@@ -28,8 +40,11 @@ office_gen = OfficeGenerator(
     num_floors=1,
     elevator_location=(20, 25),
 )
-# office_gen = OfficeGenerator(start_floor=0, goal_floor=0)
-# office = office_gen.generate_office_floor()
+# officegen_kwargs = dict(start_floor=0, goal_floor=0)
+
+# Browser Settings.
+NUM_PREFETCH = 4  # Offices generated ahead of time in worker processes.
+MAX_HISTORY = 32  # Offices kept for browsing with PageUp and PageDown.
 
 # Display Variables.
 SCREEN_WIDTH = 640
@@ -37,71 +52,112 @@ SCREEN_HEIGHT = 360
 SCALE_FACTOR = 0.9
 BLOCK_SIZE = int(
     min(
-        SCALE_FACTOR * (SCREEN_WIDTH / office_gen.floor_width),
-        SCALE_FACTOR * (SCREEN_HEIGHT / office_gen.floor_height),
+        SCALE_FACTOR * (SCREEN_WIDTH / officegen_kwargs["floor_width"]),
+        SCALE_FACTOR * (SCREEN_HEIGHT / officegen_kwargs["floor_height"]),
     )
 )
-OFFSET_X = SCREEN_WIDTH / 2 - BLOCK_SIZE * office_gen.floor_width / 2
-OFFSET_Y = SCREEN_HEIGHT / 2 - BLOCK_SIZE * office_gen.floor_height / 2
-
-# Initialise pygame.
-pygame.init()
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-clock = pygame.time.Clock()
-font = pygame.font.SysFont("Courier New", 16)
-
-
-def regen_office():
-    office = office_gen.generate_office_building()
-
-    OfficeBuildingJSONHandler.save_to_json(office, "office.json")
-    office = OfficeBuildingJSONHandler.load_from_json("office.json")
-
-    print(office_gen.generate_office_graph(layout=False).number_of_nodes())
-
-    return office
-
-
-office = regen_office()
-num_floors = len(office.layout)
-
-floor = 0
-running = True
-while running:
-    # Process Events.
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            quit()
-        elif event.type == pygame.KEYUP:
-            if event.key == pygame.K_UP:
-                floor = min(floor + 1, num_floors - 1)
-            elif event.key == pygame.K_DOWN:
-                floor = max(floor - 1, 0)
-            elif event.key == pygame.K_r:
-                office = regen_office()
-                num_floors = len(office.layout)
-            elif event.key == pygame.K_HOME:
-                floor = 0
-            elif event.key == pygame.K_END:
-                floor = num_floors - 1
-
-    # Update Display.
-    screen.fill(Colors[CellType.BACKGROUND])
-
-    for y in range(office_gen.floor_height):
-        for x in range(office_gen.floor_width):
-            pygame.draw.rect(
-                screen,
-                Colors[office.layout[floor][y][x]],
-                pygame.Rect(OFFSET_X + x * BLOCK_SIZE, OFFSET_Y + y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE),
+OFFSET_X = SCREEN_WIDTH / 2 - BLOCK_SIZE * officegen_kwargs["floor_width"] / 2
+OFFSET_Y = SCREEN_HEIGHT / 2 - BLOCK_SIZE * officegen_kwargs["floor_height"] / 2
+
+
+def render_floors(office):
+    """
+    Renders each floor of an office to a surface once, so that drawing a frame is a single blit.
+    Floors shared by several floor indices (e.g., floor templates) are only rendered once.
+    """
+    layout = layout_to_array(office.layout)
+    surfaces, rendered = [], {}
+    for floor in range(len(layout)):
+        key = id(office.layout[floor])
+        if key not in rendered:
+            # Surface arrays are indexed [x][y], so rows and columns are swapped.
+            pixels = COLOR_TABLE[layout[floor]].transpose(1, 0, 2)
+            surface = pygame.surfarray.make_surface(pixels)
+            rendered[key] = pygame.transform.scale(
+                surface, (pixels.shape[0] * BLOCK_SIZE, pixels.shape[1] * BLOCK_SIZE)
             )
-
-    # Show FPS.
-    screen.blit(
-        font.render(f"{int(clock.get_fps())}fps   Floor {floor + 1} of {num_floors}", 1, pygame.Color("WHITE")),
-        (0, 0),
-    )
-
-    pygame.display.update()
-
-    clock.tick(165)
+        surfaces.append(rendered[key])
+    return surfaces
+
+
+def main():
+    # Initialise pygame.
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    clock = pygame.time.Clock()
+    font = pygame.font.SysFont("Courier New", 16)
+
+    # Offices are generated in worker processes and sent back in binary form, keeping the window responsive.
+    executor = ProcessPoolExecutor(max_workers=NUM_PREFETCH)
+    generating = collections.deque()
+    prefetched = collections.deque()
+
+    history = []
+    index = -1
+    floor = 0
+    swap_requested = True
+    running = True
+    while running:
+        # Keep NUM_PREFETCH offices generated or generating, and render finished ones in order, one per frame.
+        while len(generating) + len(prefetched) < NUM_PREFETCH:
+            generating.append(executor.submit(generate_office_bytes, officegen_kwargs))
+        if len(generating) > 0 and generating[0].done():
+            office = OfficeBuildingBinaryHandler.from_bytes(generating.popleft().result())
+            prefetched.append((office, render_floors(office)))
+
+        # Show the next office as soon as one is ready.
+        if swap_requested and len(prefetched) > 0:
+            history.append(prefetched.popleft())
+            if len(history) > MAX_HISTORY:
+                del history[0]
+            index = len(history) - 1
+            swap_requested = False
+
+        num_floors = len(history[index][1]) if len(history) > 0 else 0
+        floor = max(min(floor, num_floors - 1), 0)
+
+        # Process Events.
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYUP:
+                if event.key == pygame.K_UP:
+                    floor = min(floor + 1, num_floors - 1)
+                elif event.key == pygame.K_DOWN:
+                    floor = max(floor - 1, 0)
+                elif event.key == pygame.K_r:
+                    swap_requested = True
+                elif event.key == pygame.K_PAGEUP:
+                    index = max(index - 1, 0)
+                elif event.key == pygame.K_PAGEDOWN:
+                    index = min(index + 1, len(history) - 1)
+                elif event.key == pygame.K_HOME:
+                    floor = 0
+                elif event.key == pygame.K_END:
+                    floor = num_floors - 1
+
+        # Update Display.
+        screen.fill(Colors[CellType.BACKGROUND])
+        if len(history) > 0:
+            floor = max(min(floor, len(history[index][1]) - 1), 0)
+            screen.blit(history[index][1][floor], (OFFSET_X, OFFSET_Y))
+            status = f"Floor {floor + 1} of {len(history[index][1])}   Office {index + 1} of {len(history)}"
+        else:
+            status = "Generating..."
+
+        # Show FPS.
+        screen.blit(
+            font.render(f"{int(clock.get_fps())}fps   {status}   {len(prefetched)} ready", 1, pygame.Color("WHITE")),
+            (0, 0),
+        )
+
+        pygame.display.update()
+
+        clock.tick(165)
+
+    executor.shutdown(wait=False, cancel_futures=True)
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
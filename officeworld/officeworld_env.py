@@ -4,22 +4,33 @@ import random
 import networkx as nx
 import numpy as np
 
-from typing import Dict, Tuple
+from typing import Dict, NamedTuple, Tuple
 
 from simpleoptions import TransitionMatrixBaseEnvironment
 
 from officeworld.generator.office_generator import OfficeGenerator
 from officeworld.generator.office_building import OfficeBuilding
-from officeworld.generator.cell_type import CellType
+from officeworld.generator.cell_type import BLOCKED_CELL_TYPES, CellType
 from officeworld.interface.officeworld_renderer import OfficeWorldRenderer
-from officeworld.utils.graph_utils import office_layout
+from officeworld.planning.distance_oracle import DistanceOracle
+from officeworld.planning.laplacian import laplacian_eigenvectors
+from officeworld.planning.region_graph import RegionGraph
+from officeworld.utils.compact_graph import CompactGraph
+from officeworld.utils.graph_utils import write_office_gexf
+from officeworld.utils.instrumentation import Instrumentation
+from officeworld.utils.layout_array import LayoutView, layout_to_array
+from officeworld.utils.observations import ObservationEncoder
+from officeworld.utils.shared_office import SharedOffice
+from officeworld.utils.transition_table import TransitionTable, build_transition_table
 
-# TODO: ADD SUPPORT FOR UPSTAIR AND DOWNSTAIR TILES.
-# TODO: ADD SUPPORT FOR MUDDY TILES (LARGER PENALTY).
-# TODO: ADD SUPPORT FOR CROWDED TILES (STOCHASTIC MOVEMENT).
 # TODO: REWRITE SR FUNCTIONALITY BASED ON TRANSITIONMATRIXBASEENVIRONMENT.
 
 
+class EnvironmentSnapshot(NamedTuple):
+    # The mutable episode state of an OfficeWorldEnvironment. Everything else about the environment is static.
+    current_state: Tuple[int, int, int]
+
+
 class OfficeWorldEnvironment(TransitionMatrixBaseEnvironment):
     def __init__(
         self,
@@ -32,6 +43,9 @@ class OfficeWorldEnvironment(TransitionMatrixBaseEnvironment):
         start_room: Tuple[int, int, int, int] = None,
         goal_room: Tuple[int, int, int, int] = None,
         explorable: bool = False,
+        graph_backend: str = "networkx",
+        muddy_penalty: float = -0.001,
+        crowded_slip_prob: float = 0.25,
     ):
         """
         A gym-like environment for interacting with an OfficeWorld office building.
@@ -42,10 +56,14 @@ class OfficeWorldEnvironment(TransitionMatrixBaseEnvironment):
             movement_penalty (float, optional): The penalty for each action taken. Defaults to -0.001.
             goal_reward (float, optional): The reward for reaching the goal. Defaults to 1.0.
             explorable (bool, optional): Whether the environment should be explorable, in which case terminal states are ignored. Defaults to False.
+            graph_backend (str, optional): How to store the state-transition graph. Either "networkx", or "compact" for a CSR graph over integer state indices, with transitions served from an array-based TransitionTable. The compact backend uses far less memory and build time on very large offices. Defaults to "networkx".
+            muddy_penalty (float, optional): The penalty for each action taken in a muddy cell, used instead of the movement penalty. Defaults to -0.001.
+            crowded_slip_prob (float, optional): The probability that a horizontal move made in a crowded cell is replaced by a uniformly random horizontal move. The environment is stochastic if the office has crowded cells and this is positive. Defaults to 0.25.
 
         Raises:
             ValueError: Raised if both office and officegen_kwargs are None. You must either provide a pre-generated office, or tell this class how to generate one.
             ValueError: Raised if a start or goal room is provided without a corresponding floor. You must provide a start/goal floor if you provide a start/goal room.
+            ValueError: Raised if graph_backend is not one of "networkx" or "compact".
         """
         # Handle erroneous inputs.
         if officegen_kwargs is None and office is None:
@@ -54,6 +72,8 @@ class OfficeWorldEnvironment(TransitionMatrixBaseEnvironment):
             raise ValueError("You must provide a start floor if you provide a start room.")
         if goal_floor == -1 and goal_room is not None:
             raise ValueError("You must provide a goal floor if you provide a goal room.")
+        if graph_backend not in {"networkx", "compact"}:
+            raise ValueError(f"Unknown graph backend '{graph_backend}'. Expected 'networkx' or 'compact'.")
 
         if office is not None:
             self._office_gen = OfficeGenerator()
@@ -74,80 +94,194 @@ class OfficeWorldEnvironment(TransitionMatrixBaseEnvironment):
         ## START ROOM ##
         # Use specified room on specified floor.
         if start_floor != -1 and start_room is not None:
-            self._office_gen._carve_area(start_room, CellType.START, self.office.layout[start_floor])
+            self._carve_room(start_room, CellType.START, start_floor)
         # Use random room on specified floor.
         elif start_floor != -1:
             start_room = random.choice(self.office.rooms[start_floor])
-            self._office_gen._carve_area(start_room, CellType.START, self.office.layout[start_floor])
+            self._carve_room(start_room, CellType.START, start_floor)
         # Choose random room on random floor.
         else:
             start_room = random.choice(random.choice(self.office.rooms))
-            self._office_gen._carve_area(
-                start_room, CellType.START, self.office.layout[random.randint(0, self.num_floors - 1)]
-            )
+            self._carve_room(start_room, CellType.START, random.randint(0, self.num_floors - 1))
 
         ## GOAL ROOM ##
         if not explorable:
             # Use specified room on specified floor.
             if goal_floor != -1 and goal_room is not None:
-                self._office_gen._carve_area(goal_room, CellType.GOAL, self.office.layout[goal_floor])
+                self._carve_room(goal_room, CellType.GOAL, goal_floor)
             # Use random room on specified floor.
             elif goal_floor != -1:
                 goal_room = random.choice(self.office.rooms[goal_floor])
-                self._office_gen._carve_area(goal_room, CellType.GOAL, self.office.layout[goal_floor])
+                self._carve_room(goal_room, CellType.GOAL, goal_floor)
             # Use random room on random floor, but don't overwrite start room.
             else:
                 goal_room = None
                 while goal_room is None:
                     goal_floor = random.randint(0, self.num_floors - 1)
                     goal_room = random.choice(self.office.rooms[goal_floor])
-                    left, top, _, _ = goal_room
-                    if self.office.layout[goal_floor][top][left] != CellType.ROOM:
+                    left, top, width, height = goal_room
+                    rows = self.office.layout[goal_floor][top : top + height]
+                    if any(CellType.START in row[left : left + width] for row in rows):
                         goal_room = None
-                self._office_gen._carve_area(goal_room, CellType.GOAL, self.office.layout[goal_floor])
+                self._carve_room(goal_room, CellType.GOAL, goal_floor)
 
         # Define rewards and penalties.
         self.movement_penalty = movement_penalty
         self.goal_reward = goal_reward
+        self.muddy_penalty = muddy_penalty
+        self.crowded_slip_prob = crowded_slip_prob
 
         # Define the state-transition graph and the state-space.
+        # The layout is converted to an array once, and shared by everything built from it below.
+        layout = layout_to_array(self.office.layout)
         self.explorable = explorable
-        self.initial_states = self._initialise_initial_states()
-        self.terminal_states = self._initialise_terminal_states()
-        self.stg = self.generate_interaction_graph(directed=True)
-        self.state_space = set(self.stg.nodes)
-        self.num_states = len(self.state_space)
+        self.initial_states = self._initialise_initial_states(layout)
+        self.terminal_states = self._initialise_terminal_states(layout)
+        self.graph_backend = graph_backend
+        self._transition_table = None
+        self._shared_office = None
+        self._deterministic = crowded_slip_prob <= 0 or not np.any(layout == CellType.CROWDED.value)
+        if graph_backend == "compact" or self.office.floor_templates is not None:
+            self._transition_table = self._build_transition_table(layout)
+        if graph_backend == "compact":
+            self.stg = CompactGraph.from_transition_table(self.transition_table)
+
+            # Like the networkx interaction graph, the state-space only holds states reachable from the initial states.
+            self._reachable = self.stg.bfs([self.stg.index(state) for state in self.initial_states]) >= 0
+            self.state_space = None
+            self.num_states = int(np.count_nonzero(self._reachable))
+        elif self.office.floor_templates is not None:
+            self.stg = self._generate_tiled_interaction_graph()
+            self.state_space = set(self.stg.nodes)
+            self.num_states = len(self.state_space)
+        else:
+            self.stg = self.generate_interaction_graph(directed=True)
+            self.state_space = set(self.stg.nodes)
+            self.num_states = len(self.state_space)
+
+        self._initialise_cached_variables()
+
+    @classmethod
+    def attach_shared(cls, handle: Dict) -> "OfficeWorldEnvironment":
+        """
+        Creates an environment backed by an office published to shared memory with SharedOffice.publish.
+        The layout, transition table and state-transition graph are used in-place and read-only, so many worker
+        processes can share a single copy of them. Only per-episode state, such as the current state, is private.
+
+        Example:
+            shared = SharedOffice.publish(OfficeWorldEnvironment(office=office, graph_backend="compact"))
+            # In each worker process:
+            env = OfficeWorldEnvironment.attach_shared(shared.handle)
 
+        Args:
+            handle (Dict): The handle of the published office, i.e., SharedOffice.handle.
+
+        Returns:
+            OfficeWorldEnvironment: An environment using the compact graph backend, backed by the shared office.
+        """
+        shared = SharedOffice.attach(handle)
+        arrays, metadata = shared.arrays, shared.metadata
+
+        env = cls.__new__(cls)
+        env._shared_office = shared
+        env._office_gen = None
+        env.office = OfficeBuilding(LayoutView(arrays["layout"]), metadata["halls"], metadata["rooms"])
+        env.num_floors, env.floor_height, env.floor_width = arrays["layout"].shape
+        env.actions = [0, 1, 2, 3, 4, 5]
+        env.num_actions = len(env.actions)
+
+        env.movement_penalty = metadata["movement_penalty"]
+        env.goal_reward = metadata["goal_reward"]
+        env.muddy_penalty = metadata["muddy_penalty"]
+        env.crowded_slip_prob = metadata["crowded_slip_prob"]
+        env.explorable = metadata["explorable"]
+        env.initial_states = [tuple(state) for state in metadata["initial_states"]]
+        env.terminal_states = {tuple(state) for state in metadata["terminal_states"]}
+
+        env.graph_backend = "compact"
+        env._transition_table = TransitionTable(
+            arrays["states"],
+            arrays["state_index"],
+            arrays["next_states"],
+            arrays["rewards"],
+            arrays["terminal"],
+            arrays["portals"],
+            arrays.get("outcome_states"),
+            arrays.get("outcome_probs"),
+            arrays.get("outcome_rewards"),
+        )
+        env._deterministic = env._transition_table.deterministic
+        edge_attrs = {"action": arrays["edge_actions"], "reward": arrays["edge_rewards"]}
+        if "edge_probabilities" in arrays:
+            edge_attrs["probability"] = arrays["edge_probabilities"]
+        env.stg = CompactGraph(arrays["states"], arrays["indptr"], arrays["indices"], edge_attrs)
+        env.stg._state_index = arrays["state_index"]
+        env._reachable = arrays["reachable"]
+        env.state_space = None
+        env.num_states = int(np.count_nonzero(env._reachable))
+
+        env._initialise_cached_variables()
+        return env
+
+    def _initialise_cached_variables(self):
         # Successor representation variables.
         self.successor_representation = None
         self._cached_sr_gamma = None
 
+        # Shortest-path distance oracle and region abstraction variables.
+        self._distance_oracle = None
+        self._region_graph = None
+
+        # Laplacian eigenvector variables.
+        self._laplacian_eigenvalues = None
+        self._laplacian_eigenvectors = None
+
+        # Observation encoder variables.
+        self._observation_encoder = None
+
         # Renderer variables.
         self.renderer = None
 
-        super().__init__(deterministic=True)
+        # Instrumentation variables.
+        self.instrumentation = None
+        self._instrumentation_shadowed = {}
+        self._instrumentation_wrappers = {}
+
+        super().__init__(deterministic=self._deterministic)
 
-    def _initialise_initial_states(self):
-        initial_states = []
-        for i in range(self.num_floors):
-            for y in range(self.floor_height):
-                for x in range(self.floor_width):
-                    if self.office.layout[i][y][x] == CellType.START:
-                        initial_states.append((i, y, x))
+    @property
+    def state_space(self):
+        # With the compact graph backend, the set of state tuples is only built if it is needed.
+        if self._state_space is None:
+            self._state_space = {tuple(state) for state in self.transition_table.states[self._reachable].tolist()}
+        return self._state_space
 
-        return initial_states
+    @state_space.setter
+    def state_space(self, state_space):
+        self._state_space = state_space
 
-    def _initialise_terminal_states(self):
+    def _carve_room(self, room, type, floor):
+        # Floors can be shared by several floor indices, so the floor gets its own copy before it is changed.
+        self.office.unshare_floor(floor)
+        self._office_gen._carve_room(room, type, self.office.layout[floor])
+
+    def _initialise_initial_states(self, layout):
+        return [tuple(state) for state in np.argwhere(layout == CellType.START.value).tolist()]
+
+    def _initialise_terminal_states(self, layout):
         terminal_states = set()
         if not self.explorable:
-            for i in range(self.num_floors):
-                for y in range(self.floor_height):
-                    for x in range(self.floor_width):
-                        if self.office.layout[i][y][x] == CellType.GOAL:
-                            terminal_states.add((i, y, x))
+            terminal_states.update(tuple(state) for state in np.argwhere(layout == CellType.GOAL.value).tolist())
 
         return terminal_states
 
+    def _generate_tiled_interaction_graph(self):
+        # Builds the same graph as generate_interaction_graph, but from the transition table, which is tiled from the
+        # office's floor templates, rather than by searching the building one state at a time.
+        graph = CompactGraph.from_transition_table(self.transition_table)
+        reachable = graph.bfs([graph.index(state) for state in self.initial_states]) >= 0
+        return graph.to_networkx(mask=reachable)
+
     def reset(self, state=None):
         if state is not None:
             current_state = state
@@ -160,14 +294,119 @@ class OfficeWorldEnvironment(TransitionMatrixBaseEnvironment):
 
     def step(self, action, state=None):
         if state is None:
-            next_state, reward, terminal, info = super().step(action, state=self.current_state)
-        else:
-            next_state, reward, terminal, info = super().step(action, state=state)
+            state = self.current_state
+
+        next_state, reward, terminal, info = self._transition_step(action, state)
 
         self.current_state = next_state
 
         return next_state, reward, terminal, info
 
+    def get_snapshot(self) -> "EnvironmentSnapshot":
+        """
+        Captures the environment's mutable episode state, i.e., its current state, as a small immutable object.
+
+        Returns:
+            EnvironmentSnapshot: The snapshot, which can be passed to restore_snapshot on this environment or its clones.
+        """
+        return EnvironmentSnapshot(self.current_state)
+
+    def restore_snapshot(self, snapshot: "EnvironmentSnapshot"):
+        """
+        Returns the environment to the episode state captured by a snapshot.
+
+        Args:
+            snapshot (EnvironmentSnapshot): A snapshot taken from this environment, or one sharing its office.
+        """
+        self.current_state = snapshot.current_state
+
+    def clone(self, snapshot: "EnvironmentSnapshot" = None) -> "OfficeWorldEnvironment":
+        """
+        Creates a copy of the environment that shares all of its static structures (the office layout, transition
+        table, state-transition graph, transition matrix and cached representations) but has its own episode state.
+        Cloning is therefore far cheaper than copy.deepcopy, e.g., for tree-search planners that clone at every node.
+        The clone is not instrumented, has no renderer, and has its own observation encoder, whose reused output
+        buffers would otherwise be overwritten by both environments. Caches built after cloning are not shared.
+
+        Args:
+            snapshot (EnvironmentSnapshot, optional): The episode state to give the clone. Defaults to None, in which case the clone continues from this environment's current state.
+
+        Returns:
+            OfficeWorldEnvironment: The clone.
+        """
+        clone = self.__class__.__new__(self.__class__)
+        clone.__dict__.update(self.__dict__)
+
+        # Methods shadowed on this instance (e.g., by instrumentation or a trajectory recorder) are bound to it.
+        for name, value in self.__dict__.items():
+            if callable(value) and hasattr(self.__class__, name):
+                del clone.__dict__[name]
+        clone.instrumentation = None
+        clone._instrumentation_shadowed = {}
+        clone._instrumentation_wrappers = {}
+        clone.renderer = None
+        clone._observation_encoder = None
+
+        if snapshot is not None:
+            clone.restore_snapshot(snapshot)
+        return clone
+
+    def _transition_step(self, action, state):
+        if self.graph_backend == "networkx":
+            return super().step(action, state=state)
+        else:
+            return self._step_transition_table(action, state)
+
+    @property
+    def transition_table(self) -> "TransitionTable":
+        """
+        The array-based transition table for this office, built the first time it is accessed.
+        """
+        if self._transition_table is None:
+            self._transition_table = self._build_transition_table(layout_to_array(self.office.layout))
+        return self._transition_table
+
+    def _build_transition_table(self, layout):
+        return build_transition_table(
+            layout,
+            self.movement_penalty,
+            self.goal_reward,
+            self.explorable,
+            self.muddy_penalty,
+            self.crowded_slip_prob,
+            self.office.floor_templates,
+        )
+
+    def _step_transition_table(self, action, state):
+        # Scalar lookups use ndarray.item, which avoids creating numpy scalars on every step.
+        table = self.transition_table
+        floor, y, x = state
+        index = table.state_index.item(floor, y, x)
+        next_index = table.next_states.item(index, action)
+        if next_index < 0:
+            raise KeyError((state, action))
+
+        if self.deterministic:
+            reward = table.rewards.item(index, action)
+        else:
+            # Sample an outcome from the precomputed alias table, using a single uniform draw.
+            u = random.random() * table.num_outcomes
+            k = int(u)
+            if u - k >= table.alias_probs.item(index, action, k):
+                k = table.alias_indices.item(index, action, k)
+            next_index = table.outcome_states.item(index, action, k)
+            reward = table.outcome_rewards.item(index, action, k)
+
+        states = table.states
+        next_state = (states.item(next_index, 0), states.item(next_index, 1), states.item(next_index, 2))
+        return next_state, reward, table.terminal.item(next_index), {}
+
+    def _compute_transition_matrix(self):
+        # The compact graph backend steps using its array-based transition table instead.
+        if self.graph_backend == "compact":
+            return None
+        return super()._compute_transition_matrix()
+
     def render(self, mode="human"):
         if self.renderer is None:
             self.renderer = OfficeWorldRenderer(
@@ -191,25 +430,34 @@ class OfficeWorldEnvironment(TransitionMatrixBaseEnvironment):
         if state is None:
             state = self.current_state
 
+        # With the compact graph backend, the transition table already lists the available actions.
+        if self.graph_backend == "compact":
+            floor, y, x = state
+            table = self.transition_table
+            index = table.state_index.item(floor, y, x)
+            return [action for action in self.actions if table.next_states.item(index, action) >= 0]
+
         # If the state is terminal, no actions are available.
         if self.is_state_terminal(state):
             return []
 
-        # Otherwise, the available actions depend on whether the state
-        # is an elevator or not. Also, if there is only one floor, the agent cannot go up or down.
+        # Otherwise, the available actions depend on whether the state is an elevator or a stair.
+        # Elevators lead up and down, except beyond the top and bottom floors. Stairs lead up if they are upward
+        # stairs, and down if the cell below is an upward stair.
         floor, y, x = state
-        if self.office.layout[floor][y][x] == CellType.ELEVATOR and self.num_floors > 1:
-            # If on ground floor, agent can only go up.
-            if floor == 0:
-                return [0, 1, 2, 3, 4]
-            # If on top floor, agent can only go down.
-            elif floor == len(self.office.layout) - 1:
-                return [0, 1, 2, 3, 5]
-            # Else, the agent can go up and down.
-            else:
-                return [0, 1, 2, 3, 4, 5]
-        else:
-            return [0, 1, 2, 3]
+        cell = self.office.layout[floor][y][x]
+        actions = [0, 1, 2, 3]
+        if cell == CellType.ELEVATOR:
+            if floor < self.num_floors - 1:
+                actions.append(4)
+            if floor > 0:
+                actions.append(5)
+        elif cell == CellType.UPSTAIR or cell == CellType.DOWNSTAIR:
+            if cell == CellType.UPSTAIR and floor < self.num_floors - 1:
+                actions.append(4)
+            if floor > 0 and self.office.layout[floor - 1][y][x] == CellType.UPSTAIR:
+                actions.append(5)
+        return actions
 
     def is_state_terminal(self, state=None):
         if state is None:
@@ -221,41 +469,65 @@ class OfficeWorldEnvironment(TransitionMatrixBaseEnvironment):
         return self.initial_states
 
     def get_successors(self, state=None, actions=None):
-        if state is not None:
-            floor_0, y_0, x_0 = state
-        else:
-            floor_0, y_0, x_0 = self.current_state
+        if state is None:
+            state = self.current_state
 
         if actions is None:
-            actions = self.get_available_actions(state=(floor_0, y_0, x_0))
+            actions = self.get_available_actions(state=state)
+
+        # Actions taken in muddy cells cost more than usual.
+        floor_0, y_0, x_0 = state
+        if self.office.layout[floor_0][y_0][x_0] == CellType.MUDDY:
+            penalty = self.muddy_penalty
+        else:
+            penalty = self.movement_penalty
 
         successors = []
         for action in actions:
-            if action == 0:  # North.
-                floor, y, x = floor_0, y_0 + 1, x_0
-            elif action == 1:  # South.
-                floor, y, x = floor_0, y_0 - 1, x_0
-            elif action == 2:  # East.
-                floor, y, x = floor_0, y_0, x_0 + 1
-            elif action == 3:  # West.
-                floor, y, x = floor_0, y_0, x_0 - 1
-            elif action == 4:  # Up.
-                floor, y, x = floor_0 + 1, y_0, x_0
-            elif action == 5:  # Down.
-                floor, y, x = floor_0 - 1, y_0, x_0
-
-            if self.office.layout[floor][y][x] == CellType.WALL:
-                floor, y, x = floor_0, y_0, x_0
-
-            if self.is_state_terminal((floor, y, x)):
-                reward = self.goal_reward + self.movement_penalty
-            else:
-                reward = self.movement_penalty
+            for next_state, probability in self._get_outcomes(state, action):
+                if self.is_state_terminal(next_state):
+                    reward = self.goal_reward + penalty
+                else:
+                    reward = penalty
 
-            successors.append((((floor, y, x), reward), 1.0 / len(actions)))
+                successors.append(((next_state, reward), probability / len(actions)))
 
         return successors
 
+    def _get_outcomes(self, state, action):
+        # Horizontal moves made in crowded cells may be jostled into a uniformly random horizontal move.
+        floor, y, x = state
+        if action < 4 and self.crowded_slip_prob > 0 and self.office.layout[floor][y][x] == CellType.CROWDED:
+            outcomes = {}
+            for jostled_action in range(4):
+                next_state = self._move(state, jostled_action)
+                probability = self.crowded_slip_prob / 4
+                if jostled_action == action:
+                    probability += 1.0 - self.crowded_slip_prob
+                outcomes[next_state] = outcomes.get(next_state, 0.0) + probability
+            return list(outcomes.items())
+
+        return [(self._move(state, action), 1.0)]
+
+    def _move(self, state, action):
+        floor_0, y_0, x_0 = state
+        if action == 0:  # North.
+            floor, y, x = floor_0, y_0 + 1, x_0
+        elif action == 1:  # South.
+            floor, y, x = floor_0, y_0 - 1, x_0
+        elif action == 2:  # East.
+            floor, y, x = floor_0, y_0, x_0 + 1
+        elif action == 3:  # West.
+            floor, y, x = floor_0, y_0, x_0 - 1
+        elif action == 4:  # Up.
+            floor, y, x = floor_0 + 1, y_0, x_0
+        elif action == 5:  # Down.
+            floor, y, x = floor_0 - 1, y_0, x_0
+
+        if self.office.layout[floor][y][x] in BLOCKED_CELL_TYPES:
+            return state
+        return (floor, y, x)
+
     def get_successor_representation(self, gamma, state=None):
         if self.successor_representation is None or self._cached_sr_gamma != gamma:
             # TODO: Rewrite to use TransitionMatrixBaseEnvironment's transition matrix.
@@ -272,16 +544,109 @@ class OfficeWorldEnvironment(TransitionMatrixBaseEnvironment):
         else:
             return self.successor_representation[state]
 
+    def get_laplacian_eigenvectors(self, k: int, state=None):
+        """
+        Returns the k smallest eigenvalues of the normalised graph Laplacian of this office's state-transition graph,
+        and their eigenvectors (i.e., proto-value functions). They are computed with a sparse eigensolver over the
+        states reachable from the initial states, straight from the transition table, and cached, so asking again for
+        the same or fewer eigenvectors is free. Requires scipy.
+
+        Args:
+            k (int): The number of eigenvectors to return.
+            state (Tuple[int, int, int], optional): If given, only this state's entries of the eigenvectors are returned. Defaults to None.
+
+        Returns:
+            np.ndarray: An array of the k smallest eigenvalues, in ascending order.
+            np.ndarray: An (N, k) array whose columns are the eigenvectors, with rows ordered by transition table state index. Rows for unreachable states are zero. If a state is given, its row of length k is returned instead.
+        """
+        if self._laplacian_eigenvalues is None or len(self._laplacian_eigenvalues) < k:
+            table = self.transition_table
+            if self.graph_backend == "compact":
+                states = np.flatnonzero(self._reachable)
+            else:
+                states = np.sort([table.index(state) for state in self.state_space])
+            values, vectors = laplacian_eigenvectors(table, k, states)
+
+            self._laplacian_eigenvalues = values
+            self._laplacian_eigenvectors = np.zeros((table.num_states, k))
+            self._laplacian_eigenvectors[states] = vectors
+
+        values, vectors = self._laplacian_eigenvalues[:k], self._laplacian_eigenvectors[:, :k]
+        if state is None:
+            return values, vectors
+        return values, vectors[self.transition_table.index(state)]
+
+    def get_distance_oracle(self) -> "DistanceOracle":
+        """
+        Returns a DistanceOracle for answering shortest-path queries on this office, building it on first use.
+
+        Returns:
+            DistanceOracle: The distance oracle for this office.
+        """
+        if self._distance_oracle is None:
+            self._distance_oracle = DistanceOracle(self.transition_table)
+        return self._distance_oracle
+
+    def get_distance_to_goal(self, state=None) -> int:
+        """
+        Returns the number of steps on the shortest path from the given state to the nearest goal state.
+
+        Args:
+            state (Tuple[int, int, int], optional): The state to measure the distance from. Defaults to None, and uses the current environmental state.
+
+        Raises:
+            KeyError: Raised if the state is not a state of the office, e.g., if it is a wall or lies outside of the office.
+
+        Returns:
+            int: The distance to the nearest goal state, or -1 if no goal state is reachable.
+        """
+        if state is None:
+            state = self.current_state
+
+        index = self.transition_table.index(state)
+        if index < 0:
+            raise KeyError(state)
+        return self.get_distance_oracle().distance(index)
+
+    def get_region_graph(self) -> "RegionGraph":
+        """
+        Returns a RegionGraph abstracting this office into its halls, rooms and elevators, building it on first use.
+
+        Returns:
+            RegionGraph: The region graph for this office.
+        """
+        if self._region_graph is None:
+            self._region_graph = RegionGraph(self.office)
+        return self._region_graph
+
+    def get_observation_encoder(self, window_size: int = 5) -> "ObservationEncoder":
+        """
+        Returns an ObservationEncoder for turning this office's states into egocentric windows and one-hot vectors.
+        Tabular one-hot encodings use the transition table's state indices. The encoder is built on first use.
+
+        Args:
+            window_size (int, optional): The side length of the egocentric windows. Defaults to 5.
+
+        Returns:
+            ObservationEncoder: The observation encoder for this office.
+        """
+        if self._observation_encoder is None or self._observation_encoder.window_size != window_size:
+            self._observation_encoder = ObservationEncoder(
+                layout_to_array(self.office.layout), window_size, self.transition_table.state_index
+            )
+        return self._observation_encoder
+
     def build_transition_matrix(self):
         transition_matrix = np.zeros((len(self.state_space), len(self.state_space)))
         self.mask = self.get_state_mask()
+        mask_index = {encoding: i for i, encoding in enumerate(self.mask)}
         for state in self.state_space:
+            s = mask_index[self.encode(state)]
             for a in self.get_available_actions(state):
-                self.reset(state)
-                next_state, _, _, _ = self.step(a)
-                s = self.encode(state)
-                next_state = self.encode(next_state)
-                transition_matrix[self.mask.index(s)][self.mask.index(next_state)] += 1.0 / self.num_actions
+                # Stochastic actions spread their weight over each of their possible next states.
+                for (next_state, _), probability in self.get_successors(state, [a]):
+                    next_state = mask_index[self.encode(next_state)]
+                    transition_matrix[s][next_state] += probability / self.num_actions
         return transition_matrix
 
     def state_to_index(self, state):
@@ -315,7 +680,91 @@ class OfficeWorldEnvironment(TransitionMatrixBaseEnvironment):
         out.append(i)
         return reversed(out)
 
-    def generate_interaction_graph(self, directed=True):
-        stg = super().generate_interaction_graph(directed=directed)
-        office_layout(stg, self.floor_height, self.floor_width)
-        return stg
+    # Methods timed by enable_instrumentation, and the names their calls are recorded under.
+    INSTRUMENTED_METHODS = {
+        "step": "step",
+        "reset": "reset",
+        "_transition_step": "base_step",
+        "get_successors": "get_successors",
+        "get_available_actions": "get_available_actions",
+        "is_state_terminal": "is_state_terminal",
+        "render": "render",
+        "build_transition_matrix": "build_transition_matrix",
+        "get_successor_representation": "get_successor_representation",
+    }
+
+    def enable_instrumentation(self, callback=None, export_interval=None) -> "Instrumentation":
+        """
+        Starts counting and timing calls to the environment's step, reset, successor and matrix-building methods.
+        Instrumentation works by shadowing these methods on this instance, so it costs nothing while disabled.
+
+        Args:
+            callback (Callable[[Dict], None], optional): A function that is passed the collected statistics each time they are exported. Defaults to None.
+            export_interval (int, optional): If given, statistics are exported to the callback every this many steps. Defaults to None.
+
+        Raises:
+            ValueError: Raised if instrumentation is already enabled and cannot be disabled first.
+
+        Returns:
+            Instrumentation: The object collecting the statistics.
+        """
+        self.disable_instrumentation()
+        self.instrumentation = Instrumentation(callback, export_interval)
+        self._instrumentation_shadowed = {method: self.__dict__.get(method) for method in self.INSTRUMENTED_METHODS}
+        self._instrumentation_wrappers = {
+            method: self.instrumentation.instrument(name, getattr(self, method))
+            for method, name in self.INSTRUMENTED_METHODS.items()
+        }
+        for method, wrapper in self._instrumentation_wrappers.items():
+            setattr(self, method, wrapper)
+        return self.instrumentation
+
+    def disable_instrumentation(self):
+        """
+        Stops instrumenting the environment, restoring the methods it had before instrumentation was enabled, e.g.,
+        those of a TrajectoryRecorder attached beforehand.
+
+        Raises:
+            ValueError: Raised if an instrumented method has since been shadowed again, e.g., by a TrajectoryRecorder attached after instrumentation was enabled, which must be detached first.
+        """
+        if self.instrumentation is None:
+            return
+        for method, wrapper in self._instrumentation_wrappers.items():
+            if self.__dict__.get(method) is not wrapper:
+                raise ValueError(
+                    f"The environment's {method} method has been shadowed since instrumentation was enabled. "
+                    "Detach whatever shadowed it before disabling instrumentation."
+                )
+
+        for method, original in self._instrumentation_shadowed.items():
+            if original is None:
+                self.__dict__.pop(method, None)
+            else:
+                setattr(self, method, original)
+        self.instrumentation = None
+        self._instrumentation_shadowed = {}
+        self._instrumentation_wrappers = {}
+
+    def get_instrumentation_stats(self) -> Dict:
+        """
+        Returns the statistics collected since instrumentation was enabled.
+
+        Returns:
+            Dict: Maps each instrumented event to its call count, timings and timing histogram. Empty if instrumentation is disabled.
+        """
+        if self.instrumentation is None:
+            return {}
+        return self.instrumentation.to_dict()
+
+    def export_gexf(self, file_path, spacing=24.0):
+        """
+        Writes the state-transition graph to a GEXF file. Graph viz node positions are only computed here.
+
+        Args:
+            file_path (str): The path of the GEXF file to write.
+            spacing (float, optional): The distance between the positions of adjacent cells. Defaults to 24.0.
+        """
+        if isinstance(self.stg, CompactGraph):
+            self.stg.write_gexf(file_path, self.floor_height, self.floor_width, spacing)
+        else:
+            write_office_gexf(self.stg, file_path, self.floor_height, self.floor_width, spacing)
@@ -0,0 +1,5 @@
+from officeworld.planning.distance_oracle import DistanceOracle
+from officeworld.planning.dynamic_programming import policy_evaluation, q_values, uniform_random_policy, value_iteration
+from officeworld.planning.goal_sets import GoalSets
+from officeworld.planning.laplacian import laplacian_eigenvectors, normalised_laplacian
+from officeworld.planning.region_graph import RegionGraph, RegionOption
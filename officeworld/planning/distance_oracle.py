@@ -0,0 +1,224 @@
+import heapq
+
+import numpy as np
+
+from typing import Dict
+
+from officeworld.utils.compact_graph import CompactGraph
+from officeworld.utils.transition_table import TransitionTable
+
+
+class DistanceOracle(object):
+    def __init__(self, table: "TransitionTable"):
+        """
+        Answers shortest-path distance queries on an office's state-transition graph using array-based
+        breadth-first search. Results are cached per target set, so repeated queries against the same goal are free.
+
+        Single-state queries use a hierarchical floor -> portal -> floor decomposition. Each floor is searched
+        independently, and floors are linked by a small graph over the portal states (e.g., elevators) that have
+        transitions to other floors. Building the portal graph searches every floor with a portal once, the first time
+        a multi-floor query is made; it is then cached, so later multi-floor queries only search the floors involved.
+
+        Args:
+            table (TransitionTable): The transition table of the office to answer queries about.
+        """
+        self.table = table
+        self.graph = CompactGraph.from_transition_table(table)
+        self._reverse_graph = None
+
+        # States are numbered floor by floor, so each floor is a contiguous block of state indices.
+        num_floors = table.state_index.shape[0]
+        self._floor_bounds = np.searchsorted(table.states[:, 0], np.arange(num_floors + 1))
+        self._floor_graphs = {}
+
+        # Portals are the states with transitions to another floor.
+        self.portals = np.unique(table.portals[:, [0, 2]])
+        self._portal_distances = {}
+        self._predecessors = None
+
+        # Cached query results.
+        self._distances_to_cache = {}
+        self._distances_from_cache = {}
+        self._floor_targets_cache = {}
+        self._portal_costs_cache = {}
+
+    def distances_to(self, targets=None, hierarchical: bool = False) -> np.ndarray:
+        """
+        Computes the distance from every state to the nearest of the given target states.
+
+        Args:
+            targets (array-like, optional): Indices of the target states. Defaults to None, in which case the terminal states are used.
+            hierarchical (bool, optional): Whether to combine per-floor searches via the portal graph, rather than run one multi-source search over the whole building. Defaults to False.
+
+        Returns:
+            np.ndarray: The number of steps from each state to the nearest target, or -1 if no target is reachable.
+        """
+        targets = self._as_targets(targets)
+        key = (targets.tobytes(), hierarchical)
+        if key not in self._distances_to_cache:
+            if hierarchical:
+                distances = np.concatenate(
+                    [self._floor_distances_to(targets, floor) for floor in range(len(self._floor_bounds) - 1)]
+                )
+                distances = np.where(np.isfinite(distances), distances, -1).astype(np.int64)
+            else:
+                distances = self.reverse_graph.bfs(targets)
+            self._distances_to_cache[key] = distances
+        return self._distances_to_cache[key]
+
+    def distances_from(self, sources) -> np.ndarray:
+        """
+        Computes the distance from the nearest of the given source states to every state.
+
+        Args:
+            sources (array-like): Indices of the source states.
+
+        Returns:
+            np.ndarray: The number of steps from the nearest source to each state, or -1 if a state is unreachable.
+        """
+        sources = np.unique(np.asarray(sources, dtype=np.int64))
+        key = sources.tobytes()
+        if key not in self._distances_from_cache:
+            self._distances_from_cache[key] = self.graph.bfs(sources)
+        return self._distances_from_cache[key]
+
+    def distance(self, source: int, targets=None) -> int:
+        """
+        Computes the distance from a single state to the nearest of the given target states, using the hierarchical
+        floor -> portal -> floor decomposition. The first such query builds the portal graph, searching every floor
+        with a portal once; afterwards, only the source floor and the target floors are searched.
+
+        Args:
+            source (int): The index of the source state.
+            targets (array-like, optional): Indices of the target states. Defaults to None, in which case the terminal states are used.
+
+        Returns:
+            int: The number of steps from the source to the nearest target, or -1 if no target is reachable.
+        """
+        targets = self._as_targets(targets)
+        floor = int(self.table.states[source, 0])
+        lo = self._floor_bounds[floor]
+
+        best = self._floor_targets(targets, floor)[source - lo]
+        portal_costs = self._portal_costs(targets)
+        for portal, to_portal in self._floor_portal_distances(floor).items():
+            if to_portal[source - lo] >= 0:
+                best = min(best, to_portal[source - lo] + portal_costs[portal])
+
+        return int(best) if np.isfinite(best) else -1
+
+    def clear_cache(self):
+        self._distances_to_cache = {}
+        self._distances_from_cache = {}
+        self._floor_targets_cache = {}
+        self._portal_costs_cache = {}
+
+    @property
+    def reverse_graph(self) -> "CompactGraph":
+        if self._reverse_graph is None:
+            self._reverse_graph = self.graph.reverse()
+        return self._reverse_graph
+
+    def _as_targets(self, targets) -> np.ndarray:
+        if targets is None:
+            return np.flatnonzero(self.table.terminal)
+        return np.unique(np.asarray(targets, dtype=np.int64))
+
+    def _floor_graph(self, floor: int) -> "CompactGraph":
+        # The reversed graph of transitions that start and end on the given floor, with floor-local indices.
+        if floor not in self._floor_graphs:
+            lo, hi = self._floor_bounds[floor], self._floor_bounds[floor + 1]
+            indptr = self.graph.indptr[lo : hi + 1]
+            neighbours = self.graph.indices[indptr[0] : indptr[-1]].astype(np.int64)
+            sources = np.repeat(np.arange(hi - lo), np.diff(indptr))
+            on_floor = (neighbours >= lo) & (neighbours < hi)
+            self._floor_graphs[floor] = CompactGraph.from_edges(
+                self.table.states[lo:hi], neighbours[on_floor] - lo, sources[on_floor]
+            )
+        return self._floor_graphs[floor]
+
+    def _floor_portal_distances(self, floor: int) -> Dict[int, np.ndarray]:
+        # Maps each portal on the given floor to the floor-local distances from every state on the floor to it.
+        if floor not in self._portal_distances:
+            lo, hi = self._floor_bounds[floor], self._floor_bounds[floor + 1]
+            floor_portals = self.portals[(self.portals >= lo) & (self.portals < hi)]
+            self._portal_distances[floor] = {
+                int(portal): self._floor_graph(floor).bfs([portal - lo]) for portal in floor_portals
+            }
+        return self._portal_distances[floor]
+
+    def _floor_targets(self, targets: np.ndarray, floor: int) -> np.ndarray:
+        # Floor-local distances from every state on the given floor to the targets on that floor.
+        key = (targets.tobytes(), floor)
+        if key not in self._floor_targets_cache:
+            lo, hi = self._floor_bounds[floor], self._floor_bounds[floor + 1]
+            floor_targets = targets[(targets >= lo) & (targets < hi)] - lo
+            distances = np.full(hi - lo, np.inf)
+            if len(floor_targets) > 0:
+                bfs = self._floor_graph(floor).bfs(floor_targets)
+                distances[bfs >= 0] = bfs[bfs >= 0]
+            self._floor_targets_cache[key] = distances
+        return self._floor_targets_cache[key]
+
+    def _portal_costs(self, targets: np.ndarray) -> Dict[int, float]:
+        # Runs a backwards Dijkstra search over the portal graph to find the distance from each portal to the targets.
+        key = targets.tobytes()
+        if key in self._portal_costs_cache:
+            return self._portal_costs_cache[key]
+
+        # Each portal can reach targets on its own floor directly...
+        costs = {}
+        target_floors = np.unique(self.table.states[targets, 0])
+        for floor in target_floors.tolist():
+            lo = self._floor_bounds[floor]
+            for portal in self._floor_portal_distances(floor):
+                costs[portal] = self._floor_targets(targets, floor)[portal - lo]
+
+        # ...or by first moving to another portal, either across its floor or to an adjacent floor.
+        predecessors = self._portal_predecessors()
+        heap = [(cost, portal) for portal, cost in costs.items() if np.isfinite(cost)]
+        heapq.heapify(heap)
+        settled = {}
+        while len(heap) > 0:
+            cost, portal = heapq.heappop(heap)
+            if portal in settled:
+                continue
+            settled[portal] = cost
+            for predecessor, weight in predecessors.get(portal, []):
+                if predecessor not in settled and cost + weight < costs.get(predecessor, np.inf):
+                    costs[predecessor] = cost + weight
+                    heapq.heappush(heap, (cost + weight, predecessor))
+
+        portal_costs = {int(portal): settled.get(int(portal), np.inf) for portal in self.portals}
+        self._portal_costs_cache[key] = portal_costs
+        return portal_costs
+
+    def _portal_predecessors(self) -> Dict[int, list]:
+        # Maps each portal to the (portal, distance) pairs that can reach it in one portal-graph edge.
+        if self._predecessors is not None:
+            return self._predecessors
+
+        predecessors = {}
+        for source, _, target in self.table.portals.tolist():
+            predecessors.setdefault(target, []).append((source, 1))
+
+        portal_floors = np.unique(self.table.states[self.portals, 0])
+        for floor in portal_floors.tolist():
+            lo = self._floor_bounds[floor]
+            floor_portals = self._floor_portal_distances(floor)
+            for target, to_target in floor_portals.items():
+                for source in floor_portals:
+                    if source != target and to_target[source - lo] >= 0:
+                        predecessors.setdefault(target, []).append((source, int(to_target[source - lo])))
+
+        self._predecessors = predecessors
+        return predecessors
+
+    def _floor_distances_to(self, targets: np.ndarray, floor: int) -> np.ndarray:
+        # Combines direct floor-local distances with routes that leave the floor through a portal.
+        distances = self._floor_targets(targets, floor).copy()
+        portal_costs = self._portal_costs(targets)
+        for portal, to_portal in self._floor_portal_distances(floor).items():
+            reachable = to_portal >= 0
+            distances[reachable] = np.minimum(distances[reachable], to_portal[reachable] + portal_costs[portal])
+        return distances
@@ -0,0 +1,176 @@
+import numpy as np
+
+from typing import Tuple
+
+from officeworld.utils.transition_table import TransitionTable
+
+
+def uniform_random_policy(table: "TransitionTable") -> np.ndarray:
+    """
+    Returns the policy that chooses uniformly at random between the actions available in each state.
+
+    Args:
+        table (TransitionTable): The transition table to build the policy for.
+
+    Returns:
+        np.ndarray: An (N, num_actions) array of action probabilities. Rows for terminal states are all zero.
+    """
+    available = table.available_actions
+    counts = available.sum(axis=1, keepdims=True)
+    return np.divide(available, counts, out=np.zeros(available.shape), where=counts > 0)
+
+
+def _action_major_outcomes(table: "TransitionTable") -> Tuple[np.ndarray, np.ndarray]:
+    # Returns (K, num_actions, N) arrays of each state-action pair's possible next states and their probabilities.
+    # Unavailable actions and unused outcomes point at state 0, with zero probability. For deterministic tables, the
+    # probabilities are None, as every state-action pair has a single certain outcome.
+    if table.deterministic:
+        next_states = np.where(table.available_actions, table.next_states, 0).T[None]
+        return np.ascontiguousarray(next_states), None
+
+    next_states = np.where(table.outcome_states >= 0, table.outcome_states, 0).transpose(2, 1, 0)
+    probs = table.outcome_probs.transpose(2, 1, 0)
+    return np.ascontiguousarray(next_states), np.ascontiguousarray(probs)
+
+
+def _expected_next_values(values, next_states, probs, out, buffer):
+    # Writes the expected value of the next state of every (action, state) pair into out.
+    if probs is None:
+        return np.take(values, next_states[0], out=out)
+    np.take(values, next_states, out=buffer)
+    buffer *= probs
+    return np.sum(buffer, axis=0, out=out)
+
+
+def q_values(table: "TransitionTable", values: np.ndarray, gamma: float, out: np.ndarray = None) -> np.ndarray:
+    """
+    Computes the action-values implied by a state-value function, via a one-step lookahead.
+
+    Args:
+        table (TransitionTable): The transition table describing the environment's dynamics.
+        values (np.ndarray): An array of length N containing the value of each state.
+        gamma (float): The discount factor.
+        out (np.ndarray, optional): An (N, num_actions) array to write the result into. Defaults to None.
+
+    Returns:
+        np.ndarray: An (N, num_actions) array of action-values. Unavailable actions have a value of zero.
+    """
+    available = table.available_actions
+    if table.deterministic:
+        out = np.take(values, np.where(available, table.next_states, 0), out=out)
+    else:
+        next_values = np.take(values, np.where(table.outcome_states >= 0, table.outcome_states, 0))
+        out = np.sum(next_values * table.outcome_probs, axis=2, out=out)
+    out *= gamma
+    out += table.rewards
+    out[~available] = 0.0
+    return out
+
+
+def value_iteration(
+    table: "TransitionTable",
+    gamma: float = 0.99,
+    tol: float = 1e-8,
+    max_iterations: int = 100000,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the optimal value function and a greedy optimal policy using vectorised value iteration.
+    Every iteration is a single pass of array operations over the whole transition table, and over every possible
+    outcome of each state-action pair if the table is stochastic.
+
+    Args:
+        table (TransitionTable): The transition table describing the environment's dynamics.
+        gamma (float, optional): The discount factor. Defaults to 0.99.
+        tol (float, optional): Iteration stops once no state's value changes by more than this. Defaults to 1e-8.
+        max_iterations (int, optional): The maximum number of sweeps to perform. Defaults to 100000.
+
+    Returns:
+        np.ndarray: An array of length N containing the optimal value of each state.
+        np.ndarray: An (N, num_actions) array of action probabilities for a deterministic greedy policy.
+    """
+    # Work with action-major (num_actions, N) arrays, so the max over actions is a fast element-wise reduction.
+    available = table.available_actions.T
+    next_states, probs = _action_major_outcomes(table)
+    no_actions = np.flatnonzero(~available.any(axis=0))
+
+    # Unavailable actions are given a reward of -inf, so they are never chosen by the max.
+    rewards = np.ascontiguousarray(np.where(available, table.rewards.T, -np.inf))
+
+    values = np.zeros(table.num_states)
+    new_values = np.empty(table.num_states)
+    q = np.empty(available.shape)
+    buffer = None if probs is None else np.empty(next_states.shape)
+    for _ in range(max_iterations):
+        _expected_next_values(values, next_states, probs, q, buffer)
+        q *= gamma
+        q += rewards
+
+        np.max(q, axis=0, out=new_values)
+        new_values[no_actions] = 0.0
+
+        delta = np.max(np.abs(new_values - values), initial=0.0)
+        values, new_values = new_values, values
+        if delta < tol:
+            break
+
+    _expected_next_values(values, next_states, probs, q, buffer)
+    q *= gamma
+    q += rewards
+    policy = np.zeros((table.num_states, table.num_actions))
+    has_actions = np.flatnonzero(available.any(axis=0))
+    policy[has_actions, np.argmax(q[:, has_actions], axis=0)] = 1.0
+
+    return values, policy
+
+
+def policy_evaluation(
+    table: "TransitionTable",
+    policy: np.ndarray,
+    gamma: float = 0.99,
+    tol: float = 1e-8,
+    max_iterations: int = 100000,
+) -> np.ndarray:
+    """
+    Computes the value function of a fixed policy using vectorised iterative policy evaluation.
+
+    Args:
+        table (TransitionTable): The transition table describing the environment's dynamics.
+        policy (np.ndarray): An (N, num_actions) array of action probabilities. Unavailable actions must have zero probability.
+        gamma (float, optional): The discount factor. Defaults to 0.99.
+        tol (float, optional): Iteration stops once no state's value changes by more than this. Defaults to 1e-8.
+        max_iterations (int, optional): The maximum number of sweeps to perform. Defaults to 100000.
+
+    Raises:
+        ValueError: Raised if the policy has the wrong shape, or assigns probability to unavailable actions.
+
+    Returns:
+        np.ndarray: An array of length N containing the value of each state under the given policy.
+    """
+    policy = np.asarray(policy, dtype=np.float64)
+    available = table.available_actions
+    if policy.shape != available.shape:
+        raise ValueError(f"Expected a policy of shape {available.shape}, but got {policy.shape}.")
+    if np.any(policy[~available] != 0.0):
+        raise ValueError("The policy assigns non-zero probability to unavailable actions.")
+
+    # Work with action-major (num_actions, N) arrays, so the sum over actions is a fast element-wise reduction.
+    next_states, probs = _action_major_outcomes(table)
+    weights = np.ascontiguousarray(policy.T) * gamma
+    expected_rewards = np.sum(policy * table.rewards, axis=1)
+
+    values = np.zeros(table.num_states)
+    new_values = np.empty(table.num_states)
+    q = np.empty(weights.shape)
+    buffer = None if probs is None else np.empty(next_states.shape)
+    for _ in range(max_iterations):
+        _expected_next_values(values, next_states, probs, q, buffer)
+        q *= weights
+        np.sum(q, axis=0, out=new_values)
+        new_values += expected_rewards
+
+        delta = np.max(np.abs(new_values - values), initial=0.0)
+        values, new_values = new_values, values
+        if delta < tol:
+            break
+
+    return values
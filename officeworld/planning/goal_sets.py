@@ -0,0 +1,162 @@
+import numpy as np
+
+from typing import List, Sequence, Tuple
+
+from officeworld.generator.office_building import OfficeBuilding
+from officeworld.utils.transition_table import TransitionTable
+
+
+class GoalSets(object):
+    def __init__(self, masks: np.ndarray, num_states: int, rooms: List[Tuple[int, Tuple[int, int, int, int]]] = None):
+        """
+        A collection of goals for goal-conditioned tasks, each a set of states stored as a packed bitmask over the
+        state indices of a transition table. Terminal checks and rewards for a whole batch of (state, goal) pairs are
+        computed in one vectorised call, so goals can change from episode to episode without carving goal cells into
+        a copy of the office's layout.
+
+        Goal-conditioned rewards are added to the rewards of a transition table without a goal of its own, i.e., one
+        built with explorable=True, such as the transition table of an explorable OfficeWorldEnvironment.
+
+        Args:
+            masks (np.ndarray): A (num_goals, ceil(num_states / 8)) uint8 array of bitmasks, packed with little-endian bit order.
+            num_states (int): The number of states in the transition table the goals are defined over.
+            rooms (List[Tuple[int, Tuple[int, int, int, int]]], optional): The (floor, room) each goal was built from, if any. Defaults to None.
+        """
+        self.masks = masks
+        self.num_states = num_states
+        self.rooms = rooms
+
+    @classmethod
+    def from_indices(cls, num_states: int, goals: Sequence[Sequence[int]]) -> "GoalSets":
+        """
+        Creates goals from lists of state indices.
+
+        Args:
+            num_states (int): The number of states in the transition table the goals are defined over.
+            goals (Sequence[Sequence[int]]): The indices of the states in each goal.
+
+        Returns:
+            GoalSets: The goals.
+        """
+        dense = np.zeros((len(goals), num_states), dtype=bool)
+        for goal, indices in enumerate(goals):
+            dense[goal, np.asarray(indices, dtype=np.int64)] = True
+        return cls(np.packbits(dense, axis=1, bitorder="little"), num_states)
+
+    @classmethod
+    def from_rooms(cls, table: "TransitionTable", rooms: Sequence[Tuple[int, Tuple[int, int, int, int]]]) -> "GoalSets":
+        """
+        Creates one goal for each room, containing every state in it.
+
+        Args:
+            table (TransitionTable): The transition table the goals are defined over.
+            rooms (Sequence[Tuple[int, Tuple[int, int, int, int]]]): The (floor, (left, top, width, height)) of each goal room.
+
+        Returns:
+            GoalSets: The goals.
+        """
+        goals = []
+        for floor, (left, top, width, height) in rooms:
+            indices = table.state_index[floor, top : top + height, left : left + width]
+            goals.append(indices[indices >= 0])
+        goal_sets = cls.from_indices(table.num_states, goals)
+        goal_sets.rooms = list(rooms)
+        return goal_sets
+
+    @classmethod
+    def from_office(cls, table: "TransitionTable", office: "OfficeBuilding") -> "GoalSets":
+        """
+        Creates one goal for each room of an office, in order of floor, then of the floor's rooms.
+
+        Args:
+            table (TransitionTable): The transition table the goals are defined over.
+            office (OfficeBuilding): The office whose rooms become goals.
+
+        Returns:
+            GoalSets: The goals.
+        """
+        return cls.from_rooms(table, [(floor, room) for floor, rooms in enumerate(office.rooms) for room in rooms])
+
+    def __len__(self) -> int:
+        return len(self.masks)
+
+    def mask(self, goal: int) -> np.ndarray:
+        """
+        Returns a goal as a boolean array of length num_states, e.g., to use as the terminal states of a task.
+        """
+        return np.unpackbits(self.masks[goal], count=self.num_states, bitorder="little").astype(bool)
+
+    def indices(self, goal: int) -> np.ndarray:
+        """
+        Returns the indices of the states in a goal.
+        """
+        return np.flatnonzero(self.mask(goal))
+
+    def contains(self, states, goals) -> np.ndarray:
+        """
+        Checks whether each state is in the corresponding goal, i.e., whether it is terminal for that goal's task.
+
+        Args:
+            states (array-like): The state indices to check.
+            goals (array-like): The goal to check each state against, of the same shape as states.
+
+        Returns:
+            np.ndarray: A boolean array of the same shape as states.
+        """
+        states = np.asarray(states)
+        return ((self.masks[goals, states >> 3] >> (states & 7).astype(np.uint8)) & 1).astype(bool)
+
+    def expected_rewards(
+        self, table: "TransitionTable", states, actions, goals, goal_reward: float = 1.0
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Computes the expected reward of taking each action in each state, when pursuing the corresponding goal.
+
+        Args:
+            table (TransitionTable): The transition table, without a goal of its own, describing the office's dynamics.
+            states (array-like): The state indices to act in.
+            actions (array-like): The action to take in each state. Every action must be available.
+            goals (array-like): The goal pursued in each state.
+            goal_reward (float, optional): The reward for reaching a goal state. Defaults to 1.0.
+
+        Returns:
+            np.ndarray: The expected reward of each state-action pair.
+            np.ndarray: The probability that each state-action pair leads to a goal state.
+        """
+        states, actions, goals = np.asarray(states), np.asarray(actions), np.asarray(goals)
+        if table.deterministic:
+            reached = self.contains(table.next_states[states, actions], goals).astype(np.float64)
+        else:
+            outcomes = table.outcome_states[states, actions]
+            in_goal = self.contains(np.maximum(outcomes, 0), goals[..., None]) & (outcomes >= 0)
+            reached = np.sum(table.outcome_probs[states, actions] * in_goal, axis=-1)
+        return table.rewards[states, actions] + goal_reward * reached, reached
+
+    def step(
+        self,
+        table: "TransitionTable",
+        states,
+        actions,
+        goals,
+        goal_reward: float = 1.0,
+        rng: "np.random.Generator" = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Takes a step in a batch of goal-conditioned tasks at once.
+
+        Args:
+            table (TransitionTable): The transition table, without a goal of its own, describing the office's dynamics.
+            states (array-like): The state indices to act in.
+            actions (array-like): The action to take in each state. Every action must be available.
+            goals (array-like): The goal pursued in each state.
+            goal_reward (float, optional): The reward for reaching a goal state. Defaults to 1.0.
+            rng (np.random.Generator, optional): The random number generator used to sample stochastic transitions. Defaults to None.
+
+        Returns:
+            np.ndarray: The index of each next state.
+            np.ndarray: The reward received for each transition.
+            np.ndarray: Whether each next state is in its goal, i.e., whether each task has terminated.
+        """
+        next_states, rewards = table.sample(states, actions, rng)
+        terminal = self.contains(next_states, goals)
+        return next_states, rewards + goal_reward * terminal, terminal
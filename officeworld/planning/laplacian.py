@@ -0,0 +1,95 @@
+import numpy as np
+
+from typing import Tuple
+
+from officeworld.utils.transition_table import TransitionTable
+
+try:
+    import scipy.sparse as sparse
+    from scipy.sparse.linalg import eigsh
+except ImportError:  # pragma: no cover
+    sparse = None
+    eigsh = None
+
+
+def _require_scipy():
+    if sparse is None:
+        raise ImportError(
+            "Laplacian eigenvectors need scipy, which is not installed. "
+            "Install it with `pip install scipy`, or `pip install officeworld[laplacian]`."
+        )
+
+
+def normalised_laplacian(table: "TransitionTable", states: np.ndarray = None) -> "sparse.csr_matrix":
+    """
+    Builds the sparse normalised graph Laplacian, L = I - D^(-1/2) A D^(-1/2), of an office's state-transition graph
+    straight from its transition table. The adjacency matrix A is the undirected version of the graph, without the
+    self-loops made by walking into walls. States without neighbours have a zero row and column.
+
+    Args:
+        table (TransitionTable): The transition table describing the office.
+        states (np.ndarray, optional): The indices of the states to build the Laplacian over, e.g., those reachable from the initial states. Transitions to other states are ignored. Defaults to None, which uses every state.
+
+    Raises:
+        ImportError: Raised if scipy is not installed.
+
+    Returns:
+        scipy.sparse.csr_matrix: An (n, n) matrix over the given states, in the given order.
+    """
+    _require_scipy()
+    num_states = table.num_states
+    if states is None:
+        states = np.arange(num_states)
+    positions = np.full(num_states, -1, dtype=np.int64)
+    positions[states] = np.arange(len(states))
+
+    sources = np.repeat(positions, table.num_actions)
+    targets = np.where(table.next_states.ravel() >= 0, positions[table.next_states.ravel()], -1)
+    edges = (sources >= 0) & (targets >= 0) & (sources != targets)
+
+    shape = (len(states), len(states))
+    adjacency = sparse.coo_matrix((np.ones(np.count_nonzero(edges)), (sources[edges], targets[edges])), shape=shape)
+    adjacency = adjacency.tocsr()
+    adjacency = adjacency + adjacency.T
+    adjacency.data[:] = 1.0
+
+    degrees = np.asarray(adjacency.sum(axis=1)).ravel()
+    scale = np.divide(1.0, np.sqrt(degrees), out=np.zeros(len(degrees)), where=degrees > 0)
+    scaling = sparse.diags(scale)
+    return (sparse.diags((degrees > 0).astype(np.float64)) - scaling @ adjacency @ scaling).tocsr()
+
+
+def laplacian_eigenvectors(
+    table: "TransitionTable", k: int, states: np.ndarray = None, tol: float = 1e-8
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the k smallest eigenvalues of an office's normalised graph Laplacian and their eigenvectors, i.e., its
+    proto-value functions, with a sparse eigensolver. Shift-invert mode is used, so convergence does not depend on
+    the tiny spectral gaps of large offices, and only a sparse factorisation of the Laplacian is needed.
+
+    Args:
+        table (TransitionTable): The transition table describing the office.
+        k (int): The number of eigenvectors to compute.
+        states (np.ndarray, optional): The indices of the states to build the Laplacian over. Defaults to None, which uses every state.
+        tol (float, optional): The relative accuracy of the eigenvalues. Defaults to 1e-8.
+
+    Raises:
+        ImportError: Raised if scipy is not installed.
+        ValueError: Raised if k is not between 1 and the number of states, exclusive.
+
+    Returns:
+        np.ndarray: An array of the k smallest eigenvalues, in ascending order.
+        np.ndarray: An (n, k) array whose columns are the corresponding unit eigenvectors, over the given states. Each eigenvector's sign is chosen so its largest-magnitude entry is positive.
+    """
+    laplacian = normalised_laplacian(table, states)
+    if not 0 < k < laplacian.shape[0]:
+        raise ValueError(f"Expected between 1 and {laplacian.shape[0] - 1} eigenvectors, but got {k}.")
+
+    # The Laplacian is singular, so it is shifted slightly to make it invertible. Its eigenvalues lie in [0, 2].
+    values, vectors = eigsh(laplacian, k, sigma=-1e-3, which="LM", tol=tol)
+    order = np.argsort(values)
+    values, vectors = values[order], vectors[:, order]
+
+    signs = np.sign(vectors[np.argmax(np.abs(vectors), axis=0), np.arange(k)])
+    vectors *= np.where(signs == 0, 1.0, signs)
+    return values, vectors
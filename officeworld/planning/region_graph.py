@@ -0,0 +1,238 @@
+import numpy as np
+
+from typing import Dict, List, Tuple
+
+from simpleoptions import BaseOption
+
+from officeworld.generator.cell_type import CellType
+from officeworld.generator.office_building import OfficeBuilding
+from officeworld.utils.compact_graph import CompactGraph
+from officeworld.utils.layout_array import layout_to_array
+from officeworld.utils.transition_table import TransitionTable, build_transition_table
+
+
+class RegionGraph(object):
+    def __init__(self, office: "OfficeBuilding", table: "TransitionTable" = None):
+        """
+        A compact abstraction of an office, in which every hall, room and elevator is a single node.
+        Two regions are connected if the agent can move directly between them, or pass between them via a door.
+
+        Args:
+            office (OfficeBuilding): The office to build the region graph for.
+            table (TransitionTable, optional): A transition table for the office, built with explorable=True. Defaults to None, in which case one is built.
+        """
+        layout = layout_to_array(office.layout)
+        if table is None:
+            table = build_transition_table(layout, explorable=True)
+        self.table = table
+
+        # Paint every hall, room and elevator in the office with its own region index.
+        self.region_floors, self.region_kinds, self.region_rects = [], [], []
+        self.region_of_cell = np.full(layout.shape, -1, dtype=np.int32)
+        valid = table.state_index >= 0
+        for floor in range(layout.shape[0]):
+            for kind, rects in [("hall", office.halls[floor]), ("room", office.rooms[floor])]:
+                for left, top, width, height in rects:
+                    area = self.region_of_cell[floor, top : top + height, left : left + width]
+                    area[valid[floor, top : top + height, left : left + width]] = len(self.region_floors)
+                    self._add_region(floor, kind, (left, top, width, height))
+            for y, x in zip(*np.nonzero(layout[floor] == CellType.ELEVATOR.value)):
+                self.region_of_cell[floor, y, x] = len(self.region_floors)
+                self._add_region(floor, "elevator", (int(x), int(y), 1, 1))
+
+        self.region_floors = np.array(self.region_floors, dtype=np.int32)
+        self.num_regions = len(self.region_floors)
+
+        # Valid cells which aren't in any region are doors (or the short corridors joining halls).
+        self.region_of_state = self.region_of_cell[tuple(table.states.T)]
+        self.door_states = np.flatnonzero(self.region_of_state < 0)
+        self.doors = self._find_doors()
+
+        # Build the region-level graph, using a representative cell of each region as its coordinates.
+        edges = np.array(sorted(self.doors), dtype=np.int64).reshape(-1, 2)
+        representatives = np.zeros((self.num_regions, 3), dtype=np.int32)
+        labelled = np.flatnonzero(self.region_of_state >= 0)
+        representatives[self.region_of_state[labelled[::-1]]] = table.states[labelled[::-1]]
+        self.graph = CompactGraph.from_edges(representatives, edges[:, 0], edges[:, 1])
+
+    def region_of(self, state: Tuple[int, int, int]) -> int:
+        """
+        Returns the region containing the given state.
+
+        Args:
+            state (Tuple[int, int, int]): The (floor, y, x) state to look up.
+
+        Returns:
+            int: The index of the region containing the state, or -1 if the state is a door.
+        """
+        floor, y, x = state
+        return int(self.region_of_cell[floor, y, x])
+
+    def region_distances(self, target: int) -> np.ndarray:
+        """
+        Computes the number of region-to-region moves needed to reach the target region from every region.
+
+        Args:
+            target (int): The index of the target region.
+
+        Returns:
+            np.ndarray: The region-level distance from each region to the target, or -1 if it cannot be reached.
+        """
+        return self.graph.bfs([target])
+
+    def region_path(self, source: int, target: int) -> List[int]:
+        """
+        Finds a shortest path between two regions in the region graph.
+
+        Args:
+            source (int): The index of the region to start from.
+            target (int): The index of the region to finish in.
+
+        Returns:
+            List[int]: The regions visited along the path, including the source and target. Empty if no path exists.
+        """
+        distances = self.region_distances(target)
+        if distances[source] < 0:
+            return []
+
+        path = [source]
+        while path[-1] != target:
+            neighbours = self.graph.neighbours(path[-1])
+            path.append(int(neighbours[np.argmin(np.where(distances[neighbours] >= 0, distances[neighbours], np.inf))]))
+        return path
+
+    def get_options(self) -> List["RegionOption"]:
+        """
+        Creates an option for moving between every pair of adjacent regions.
+
+        Returns:
+            List[RegionOption]: One option per directed edge of the region graph.
+        """
+        return [RegionOption(self, source, target) for source, target in sorted(self.doors)]
+
+    def _add_region(self, floor: int, kind: str, rect: Tuple[int, int, int, int]):
+        self.region_floors.append(floor)
+        self.region_kinds.append(kind)
+        self.region_rects.append(rect)
+
+    def _find_doors(self) -> Dict[Tuple[int, int], np.ndarray]:
+        # Returns a mapping from pairs of adjacent regions to the door states that join them.
+        next_states = self.table.next_states
+        doors = {}
+
+        # Regions whose cells are directly adjacent (e.g., elevators and their halls, or elevators on adjacent floors).
+        sources, actions = np.nonzero(next_states >= 0)
+        source_regions = self.region_of_state[sources]
+        target_regions = self.region_of_state[next_states[sources, actions]]
+        direct = (source_regions >= 0) & (target_regions >= 0) & (source_regions != target_regions)
+        for pair in set(zip(source_regions[direct].tolist(), target_regions[direct].tolist())):
+            doors[pair] = np.zeros(0, dtype=np.int64)
+
+        if len(self.door_states) == 0:
+            return doors
+
+        # Group door states into connected components, by propagating the smallest door index through each component.
+        local_index = np.full(self.table.num_states, -1, dtype=np.int64)
+        local_index[self.door_states] = np.arange(len(self.door_states))
+        neighbours = next_states[self.door_states, :4]
+        neighbour_local = local_index[neighbours]
+        components = np.arange(len(self.door_states))
+        while True:
+            neighbour_components = np.where(neighbour_local >= 0, components[neighbour_local], components[:, None])
+            updated = np.minimum(components, neighbour_components.min(axis=1))
+            if np.array_equal(updated, components):
+                break
+            components = updated[updated]
+
+        # Each door component joins every pair of regions it touches.
+        neighbour_regions = self.region_of_state[neighbours]
+        touching = neighbour_regions >= 0
+        component_regions = {}
+        for component, region in zip(np.repeat(components, 4)[touching.ravel()], neighbour_regions[touching]):
+            component_regions.setdefault(int(component), set()).add(int(region))
+
+        order = np.argsort(components, kind="stable")
+        unique_components, starts = np.unique(components[order], return_index=True)
+        component_doors = dict(zip(unique_components.tolist(), np.split(self.door_states[order], starts[1:])))
+        for component, regions in component_regions.items():
+            door = component_doors[component]
+            for source in regions:
+                for target in regions:
+                    if source != target:
+                        doors[(source, target)] = np.concatenate([doors.get((source, target), door[:0]), door])
+
+        return doors
+
+
+class RegionOption(BaseOption):
+    def __init__(self, region_graph: "RegionGraph", source: int, target: int):
+        """
+        An option which moves the agent from one region to an adjacent region, passing through any doors between them.
+        Its policy is computed on first use, by a breadth-first search over only the source region, doors and target region.
+
+        Args:
+            region_graph (RegionGraph): The region graph the regions belong to.
+            source (int): The index of the region the option can be initiated in.
+            target (int): The index of the region the option moves the agent to.
+        """
+        super().__init__()
+        self.region_graph = region_graph
+        self.source = source
+        self.target = target
+        self._door_states = set(region_graph.doors[(source, target)].tolist())
+        self._actions = None
+
+    def initiation(self, state):
+        return self.region_graph.region_of(state) == self.source
+
+    def policy(self, state, test=False):
+        if self._actions is None:
+            self._actions = self._compute_policy()
+        return self._actions[self.region_graph.table.index(state)]
+
+    def termination(self, state):
+        region = self.region_graph.region_of(state)
+        if region == self.source:
+            return 0.0
+        elif region == -1 and self.region_graph.table.index(state) in self._door_states:
+            return 0.0
+        return 1.0
+
+    def _compute_policy(self) -> Dict[int, int]:
+        table = self.region_graph.table
+        region_of_state = self.region_graph.region_of_state
+        source_states = np.flatnonzero(region_of_state == self.source)
+        target_states = np.flatnonzero(region_of_state == self.target)
+        states = np.concatenate([source_states, self.region_graph.doors[(self.source, self.target)], target_states])
+
+        # Search backwards from the target region over a small graph containing only the relevant states.
+        local_index = {state: i for i, state in enumerate(states.tolist())}
+        sources, actions = np.nonzero(table.next_states[states] >= 0)
+        targets = table.next_states[states[sources], actions]
+        keep = np.array([target in local_index for target in targets.tolist()], dtype=bool)
+        local_targets = np.array([local_index[target] for target in targets[keep].tolist()], dtype=np.int64)
+        local_graph = CompactGraph.from_edges(table.states[states], local_targets, sources[keep])
+        distances = local_graph.bfs(np.arange(len(states) - len(target_states), len(states)))
+
+        # Greedily choose the action that moves closest to the target region.
+        costs = np.full(len(sources), np.inf)
+        costs[keep] = np.where(distances[local_targets] >= 0, distances[local_targets], np.inf)
+        actions_by_state = {}
+        best_costs = {}
+        for source, action, cost in zip(sources.tolist(), actions.tolist(), costs.tolist()):
+            if cost < best_costs.get(source, np.inf):
+                best_costs[source] = cost
+                actions_by_state[int(states[source])] = action
+        return actions_by_state
+
+    def __hash__(self):
+        return hash(("RegionOption", self.source, self.target))
+
+    def __eq__(self, other):
+        return isinstance(other, RegionOption) and (self.source, self.target) == (other.source, other.target)
+
+    def __str__(self):
+        return f"RegionOption({self.source}->{self.target})"
+
+    def __repr__(self):
+        return str(self)
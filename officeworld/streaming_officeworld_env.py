@@ -0,0 +1,305 @@
+import random
+
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from simpleoptions import BaseEnvironment
+
+from officeworld.generator.office_generator import OfficeGenerator
+from officeworld.generator.cell_type import BLOCKED_CELL_TYPES, CellType
+from officeworld.interface.officeworld_renderer import OfficeWorldRenderer
+
+# (floor, y, x) offsets for each action: North, South, East, West, Ascend, Descend.
+ACTION_OFFSETS = [(0, 1, 0), (0, -1, 0), (0, 0, 1), (0, 0, -1), (1, 0, 0), (-1, 0, 0)]
+
+
+class StreamingOfficeWorldEnvironment(BaseEnvironment):
+    def __init__(
+        self,
+        officegen_kwargs: Dict = None,
+        seed: int = None,
+        num_floors: int = None,
+        max_resident_floors: int = 4,
+        movement_penalty: float = -0.0001,
+        goal_reward: float = 1.0,
+        muddy_penalty: float = -0.001,
+        crowded_slip_prob: float = 0.25,
+        start_floor: int = 0,
+        goal_floor: int = None,
+    ):
+        """
+        An OfficeWorld environment for very tall, or unbounded, office buildings. Rather than generating the whole
+        building up-front, each floor is generated the first time the agent reaches it through the elevator, as a
+        deterministic function of the seed and the floor's index. Only the most recently visited floors are kept in
+        memory; evicted floors are regenerated identically if the agent returns to them. Startup therefore only
+        generates the start floor, however tall the building is.
+
+        Floors are connected only by the elevator; stairwells are not supported. Because the building is never
+        generated in full, its state-space cannot be enumerated, so get_state_space raises a ValueError, as does
+        anything that relies on it, such as simpleoptions' set_options.
+
+        Args:
+            officegen_kwargs (Dict, optional): Keyword arguments to provide to OfficeGenerator, excluding num_floors and seed. Defaults to None, which uses OfficeGenerator's defaults.
+            seed (int, optional): The seed every floor is generated from. Defaults to None, in which case one is chosen at random.
+            num_floors (int, optional): How many floors the building has. Defaults to None, in which case the building has no top floor.
+            max_resident_floors (int, optional): How many floors to keep in memory at once. Defaults to 4.
+            movement_penalty (float, optional): The penalty for each action taken. Defaults to -0.0001.
+            goal_reward (float, optional): The reward for reaching the goal. Defaults to 1.0.
+            muddy_penalty (float, optional): The penalty for each action taken in a muddy cell, used instead of the movement penalty. Defaults to -0.001.
+            crowded_slip_prob (float, optional): The probability that a horizontal move made in a crowded cell is replaced by a uniformly random horizontal move. Defaults to 0.25.
+            start_floor (int, optional): The floor on which the agent starts, in a randomly chosen room. Defaults to 0.
+            goal_floor (int, optional): The floor on which a randomly chosen room is the goal. Defaults to None, in which case the environment is explorable and has no terminal states.
+
+        Raises:
+            ValueError: Raised if max_resident_floors is less than one.
+            ValueError: Raised if the start or goal floor is outside of the building.
+            ValueError: Raised if officegen_kwargs asks for stairwells, which streaming offices do not support.
+        """
+        if max_resident_floors < 1:
+            raise ValueError("At least one floor must be kept in memory.")
+        for floor in [start_floor, goal_floor]:
+            if floor is not None and (floor < 0 or (num_floors is not None and floor >= num_floors)):
+                raise ValueError(f"Floor {floor} is outside of the office building.")
+        if officegen_kwargs is not None and officegen_kwargs.get("num_stairwells", 0) > 0:
+            raise ValueError("Streaming offices are only connected by the elevator, and cannot have stairwells.")
+
+        super().__init__()
+
+        # Every floor needs the elevator in the same place, so that the floors connect.
+        officegen_kwargs = {} if officegen_kwargs is None else dict(officegen_kwargs)
+        officegen_kwargs.setdefault("elevator_location", None)
+        if officegen_kwargs["elevator_location"] is None:
+            officegen_kwargs["elevator_location"] = (
+                officegen_kwargs.get("floor_height", 40) // 2,
+                officegen_kwargs.get("floor_width", 50) // 2,
+            )
+        self.seed = random.randrange(2**32) if seed is None else seed
+        self._office_gen = OfficeGenerator(num_floors=0, seed=self.seed, **officegen_kwargs)
+
+        # Extract office building dimensions.
+        self.num_floors = num_floors
+        self.floor_height = self._office_gen.floor_height
+        self.floor_width = self._office_gen.floor_width
+
+        # Define the action-space.
+        self.actions = [0, 1, 2, 3, 4, 5]  # North, South, East, West, Ascend, Descend.
+        self.num_actions = len(self.actions)
+
+        # Define rewards and penalties.
+        self.movement_penalty = movement_penalty
+        self.goal_reward = goal_reward
+        self.muddy_penalty = muddy_penalty
+        self.crowded_slip_prob = crowded_slip_prob
+        self.start_floor = start_floor
+        self.goal_floor = goal_floor
+        self.explorable = goal_floor is None
+
+        # Resident floors, from least to most recently used. Maps each floor index to its (layout, halls, rooms).
+        self.max_resident_floors = max_resident_floors
+        self._floors = OrderedDict()
+        self.floors_generated = 0
+        self.layout = _StreamingLayout(self)
+
+        start_layout = self.get_floor(start_floor)[0]
+        self.initial_states = [
+            (start_floor, y, x)
+            for y in range(self.floor_height)
+            for x in range(self.floor_width)
+            if start_layout[y][x] == CellType.START
+        ]
+
+        self.current_state = None
+        self.renderer = None
+
+    def get_floor(
+        self, floor: int
+    ) -> Tuple[List[List["CellType"]], List[Tuple[int, int, int, int]], List[Tuple[int, int, int, int]]]:
+        """
+        Returns a floor's layout, halls and rooms, generating it if it is not resident.
+        The floor becomes the most recently used, and the least recently used floor is evicted if too many are resident.
+
+        Args:
+            floor (int): The index of the floor.
+
+        Returns:
+            Tuple[List[List[CellType]], List[Tuple[int, int, int, int]], List[Tuple[int, int, int, int]]]: The floor's layout, halls and rooms.
+        """
+        floor_data = self._floors.get(floor)
+        if floor_data is not None:
+            self._floors.move_to_end(floor)
+            return floor_data
+
+        floor_data = self._generate_floor(floor)
+        self._floors[floor] = floor_data
+        if len(self._floors) > self.max_resident_floors:
+            self._floors.popitem(last=False)
+        return floor_data
+
+    @property
+    def resident_floors(self) -> List[int]:
+        return list(self._floors)
+
+    def _generate_floor(self, floor):
+        layout, halls, rooms = self._office_gen.generate_floor(floor)
+        self.floors_generated += 1
+
+        # Start and goal rooms are also chosen deterministically, so regenerated floors are identical.
+        rng = random.Random(f"{self.seed}:{floor}:rooms")
+        start_room = rng.choice(rooms) if floor == self.start_floor else None
+        if start_room is not None:
+            self._office_gen._carve_room(start_room, CellType.START, layout)
+        if floor == self.goal_floor:
+            goal_rooms = [room for room in rooms if room != start_room] or rooms
+            self._office_gen._carve_room(rng.choice(goal_rooms), CellType.GOAL, layout)
+
+        return layout, halls, rooms
+
+    def reset(self, state=None):
+        if state is not None:
+            current_state = state
+        else:
+            current_state = random.choice(self.initial_states)
+
+        self.current_state = current_state
+
+        return current_state
+
+    def step(self, action, state=None):
+        if state is None:
+            state = self.current_state
+
+        if action not in self.get_available_actions(state):
+            raise KeyError((state, action))
+
+        penalty = self._get_penalty(state)
+
+        # Sample one of the action's outcomes, which are only stochastic in crowded cells.
+        outcomes = self._get_outcomes(state, action)
+        next_state = outcomes[-1][0]
+        u = random.random()
+        for outcome, probability in outcomes:
+            u -= probability
+            if u < 0:
+                next_state = outcome
+                break
+
+        terminal = self.is_state_terminal(next_state)
+        reward = penalty + self.goal_reward if terminal else penalty
+
+        self.current_state = next_state
+
+        return next_state, reward, terminal, {}
+
+    def render(self, mode="human"):
+        if self.renderer is None:
+            self.renderer = OfficeWorldRenderer(
+                self.layout, "∞" if self.num_floors is None else self.num_floors, self.floor_height, self.floor_width
+            )
+
+        self.renderer.update(self.current_state)
+
+    def close(self):
+        if self.renderer is not None:
+            self.renderer.close()
+            self.renderer = None
+
+    def get_state_space(self):
+        """
+        Streaming offices are generated lazily, and may have no top floor, so their state-space cannot be enumerated.
+
+        Raises:
+            ValueError: Always raised.
+        """
+        raise ValueError(
+            "The state-space of a streaming office cannot be enumerated, as its floors are generated lazily."
+        )
+
+    def get_action_space(self):
+        return {0, 1, 2, 3, 4, 5}
+
+    def get_available_actions(self, state=None):
+        if state is None:
+            state = self.current_state
+
+        # If the state is terminal, no actions are available.
+        if self.is_state_terminal(state):
+            return []
+
+        # Elevators lead to the floors above and below, if there are any.
+        floor, y, x = state
+        actions = [0, 1, 2, 3]
+        if self.get_floor(floor)[0][y][x] == CellType.ELEVATOR:
+            if self.num_floors is None or floor < self.num_floors - 1:
+                actions.append(4)
+            if floor > 0:
+                actions.append(5)
+        return actions
+
+    def is_state_terminal(self, state=None):
+        if state is None:
+            state = self.current_state
+
+        floor, y, x = state
+        return floor == self.goal_floor and self.get_floor(floor)[0][y][x] == CellType.GOAL
+
+    def get_initial_states(self):
+        return self.initial_states
+
+    def get_successors(self, state=None, actions=None):
+        if state is None:
+            state = self.current_state
+
+        if actions is None:
+            actions = self.get_available_actions(state=state)
+
+        penalty = self._get_penalty(state)
+        successors = []
+        for action in actions:
+            for next_state, probability in self._get_outcomes(state, action):
+                if self.is_state_terminal(next_state):
+                    reward = self.goal_reward + penalty
+                else:
+                    reward = penalty
+
+                successors.append(((next_state, reward), probability / len(actions)))
+
+        return successors
+
+    def _get_penalty(self, state):
+        # Actions taken in muddy cells cost more than usual.
+        floor, y, x = state
+        if self.get_floor(floor)[0][y][x] == CellType.MUDDY:
+            return self.muddy_penalty
+        return self.movement_penalty
+
+    def _get_outcomes(self, state, action):
+        # Horizontal moves made in crowded cells may be jostled into a uniformly random horizontal move.
+        floor, y, x = state
+        if action < 4 and self.crowded_slip_prob > 0 and self.get_floor(floor)[0][y][x] == CellType.CROWDED:
+            outcomes = {}
+            for jostled_action in range(4):
+                next_state = self._move(state, jostled_action)
+                probability = self.crowded_slip_prob / 4
+                if jostled_action == action:
+                    probability += 1.0 - self.crowded_slip_prob
+                outcomes[next_state] = outcomes.get(next_state, 0.0) + probability
+            return list(outcomes.items())
+
+        return [(self._move(state, action), 1.0)]
+
+    def _move(self, state, action):
+        d_floor, d_y, d_x = ACTION_OFFSETS[action]
+        floor, y, x = state
+        next_state = (floor + d_floor, y + d_y, x + d_x)
+        if self.get_floor(next_state[0])[0][next_state[1]][next_state[2]] in BLOCKED_CELL_TYPES:
+            return state
+        return next_state
+
+
+class _StreamingLayout(object):
+    # Lets the renderer index a streaming environment's floors like a nested list layout.
+    def __init__(self, env: "StreamingOfficeWorldEnvironment"):
+        self.env = env
+
+    def __getitem__(self, floor):
+        return self.env.get_floor(floor)[0]
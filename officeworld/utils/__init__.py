@@ -1,2 +1,2 @@
 # Graph layouts.
-from officeworld.utils.graph_utils import office_layout
+from officeworld.utils.graph_utils import office_layout, office_positions, write_office_gexf
@@ -0,0 +1,250 @@
+import networkx as nx
+import numpy as np
+
+from typing import Dict, List, Tuple
+
+from officeworld.utils.graph_utils import write_office_gexf
+from officeworld.utils.transition_table import TransitionTable
+
+
+class CompactGraph(object):
+    def __init__(
+        self,
+        states: np.ndarray,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        edge_attrs: Dict[str, np.ndarray] = None,
+    ):
+        """
+        A compact state-transition graph, stored as CSR adjacency over integer state indices.
+        This is a memory-efficient alternative to a networkx DiGraph for offices with millions of states.
+
+        Args:
+            states (np.ndarray): An (N, 3) array whose rows are the (floor, y, x) coordinates of each node.
+            indptr (np.ndarray): CSR row pointers. The out-edges of node i are indices[indptr[i]:indptr[i + 1]].
+            indices (np.ndarray): CSR column indices, i.e., the target node of each edge.
+            edge_attrs (Dict[str, np.ndarray], optional): Arrays of per-edge attributes, aligned with indices. Defaults to None.
+        """
+        self.states = states
+        self.indptr = indptr
+        self.indices = indices
+        self.edge_attrs = {} if edge_attrs is None else edge_attrs
+        self._state_index = None
+
+    @classmethod
+    def from_transition_table(cls, table: "TransitionTable") -> "CompactGraph":
+        """
+        Builds a CompactGraph with one edge per available state-action pair in a transition table.
+        Each edge carries "action" and "reward" attributes. If the table is stochastic, there is one edge per possible
+        outcome of each state-action pair instead, which also carries a "probability" attribute.
+
+        Args:
+            table (TransitionTable): The transition table to build the graph from.
+
+        Returns:
+            CompactGraph: The state-transition graph described by the transition table.
+        """
+        if not table.deterministic:
+            valid = table.outcome_states >= 0
+            sources, actions, _ = np.nonzero(valid)
+            indptr = np.zeros(table.num_states + 1, dtype=np.int64)
+            np.cumsum(valid.sum(axis=(1, 2)), out=indptr[1:])
+
+            graph = cls(
+                table.states,
+                indptr,
+                table.outcome_states[valid],
+                {
+                    "action": actions.astype(np.int8),
+                    "reward": table.outcome_rewards[valid],
+                    "probability": table.outcome_probs[valid],
+                },
+            )
+            graph._state_index = table.state_index
+            return graph
+
+        available = table.available_actions
+        sources, actions = np.nonzero(available)
+        indptr = np.zeros(table.num_states + 1, dtype=np.int64)
+        np.cumsum(available.sum(axis=1), out=indptr[1:])
+
+        graph = cls(
+            table.states,
+            indptr,
+            table.next_states[sources, actions],
+            {"action": actions.astype(np.int8), "reward": table.rewards[sources, actions]},
+        )
+        graph._state_index = table.state_index
+        return graph
+
+    @classmethod
+    def from_edges(cls, states: np.ndarray, sources: np.ndarray, targets: np.ndarray, **edge_attrs) -> "CompactGraph":
+        """
+        Builds a CompactGraph from parallel arrays of edge sources and targets.
+
+        Args:
+            states (np.ndarray): An (N, 3) array whose rows are the (floor, y, x) coordinates of each node.
+            sources (np.ndarray): The source node index of each edge.
+            targets (np.ndarray): The target node index of each edge.
+            **edge_attrs (np.ndarray): Arrays of per-edge attributes, aligned with sources and targets.
+
+        Returns:
+            CompactGraph: The graph containing the given edges.
+        """
+        order = np.argsort(sources, kind="stable")
+        indptr = np.zeros(len(states) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(states)), out=indptr[1:])
+        return cls(states, indptr, targets[order], {name: attr[order] for name, attr in edge_attrs.items()})
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.states)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.indices)
+
+    @property
+    def nodes(self) -> List[Tuple[int, int, int]]:
+        return [tuple(state) for state in self.states.tolist()]
+
+    def number_of_nodes(self) -> int:
+        return self.num_nodes
+
+    def number_of_edges(self) -> int:
+        return self.num_edges
+
+    def index(self, state: Tuple[int, int, int]) -> int:
+        """
+        Returns the integer index of the node representing the given (floor, y, x) state.
+
+        Args:
+            state (Tuple[int, int, int]): The state to look up.
+
+        Raises:
+            KeyError: Raised if the state is not a node of this graph.
+
+        Returns:
+            int: The node's index.
+        """
+        if self._state_index is None:
+            shape = self.states.max(axis=0) + 1 if self.num_nodes > 0 else (0, 0, 0)
+            self._state_index = np.full(shape, -1, dtype=np.int32)
+            self._state_index[tuple(self.states.T)] = np.arange(self.num_nodes, dtype=np.int32)
+
+        floor, y, x = state
+        if not all(0 <= c < s for c, s in zip(state, self._state_index.shape)) or self._state_index[floor, y, x] < 0:
+            raise KeyError(state)
+        return int(self._state_index[floor, y, x])
+
+    def neighbours(self, index: int) -> np.ndarray:
+        return self.indices[self.indptr[index] : self.indptr[index + 1]]
+
+    def successors(self, state: Tuple[int, int, int]) -> List[Tuple[int, int, int]]:
+        return [tuple(s) for s in self.states[np.unique(self.neighbours(self.index(state)))].tolist()]
+
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def reverse(self) -> "CompactGraph":
+        """
+        Returns a copy of this graph with the direction of every edge reversed.
+
+        Returns:
+            CompactGraph: The reversed graph.
+        """
+        sources = np.repeat(np.arange(self.num_nodes, dtype=self.indices.dtype), self.out_degree())
+        return CompactGraph.from_edges(self.states, self.indices, sources, **self.edge_attrs)
+
+    def to_undirected(self) -> "CompactGraph":
+        """
+        Returns a graph containing every edge of this graph in both directions. Edge attributes are dropped.
+
+        Returns:
+            CompactGraph: The symmetrised graph.
+        """
+        sources = np.repeat(np.arange(self.num_nodes, dtype=self.indices.dtype), self.out_degree())
+        return CompactGraph.from_edges(
+            self.states, np.concatenate([sources, self.indices]), np.concatenate([self.indices, sources])
+        )
+
+    def bfs(self, sources, mask: np.ndarray = None) -> np.ndarray:
+        """
+        Runs a multi-source breadth-first search over the graph, expanding a whole frontier at a time.
+
+        Args:
+            sources (array-like): The indices of the nodes to start the search from.
+            mask (np.ndarray, optional): A boolean array of length N. If given, the search only enters nodes where it is True. Defaults to None.
+
+        Returns:
+            np.ndarray: The number of edges on the shortest path from the nearest source to each node, or -1 for unreachable nodes.
+        """
+        distances = np.full(self.num_nodes, -1, dtype=np.int64)
+        frontier = np.unique(np.asarray(sources, dtype=np.int64))
+        distances[frontier] = 0
+
+        depth = 0
+        while len(frontier) > 0:
+            depth += 1
+            neighbours = self._expand(frontier)
+            if mask is not None:
+                neighbours = neighbours[mask[neighbours]]
+            frontier = np.unique(neighbours[distances[neighbours] < 0])
+            distances[frontier] = depth
+
+        return distances
+
+    def weakly_connected_components(self) -> np.ndarray:
+        """
+        Labels each node with the weakly connected component it belongs to.
+
+        Returns:
+            np.ndarray: An array of length N containing a component label for each node, numbered from zero.
+        """
+        undirected = self.to_undirected()
+        labels = np.full(self.num_nodes, -1, dtype=np.int64)
+        component = 0
+        unlabelled = np.flatnonzero(labels < 0)
+        while len(unlabelled) > 0:
+            labels[undirected.bfs([unlabelled[0]]) >= 0] = component
+            component += 1
+            unlabelled = unlabelled[labels[unlabelled] < 0]
+        return labels
+
+    def is_weakly_connected(self) -> bool:
+        if self.num_nodes == 0:
+            raise ValueError("Connectivity is undefined for the null graph.")
+        return bool(np.all(self.to_undirected().bfs([0]) >= 0))
+
+    def to_networkx(self, directed: bool = True, mask: np.ndarray = None) -> "nx.DiGraph":
+        """
+        Converts this graph into an equivalent networkx graph, with (floor, y, x) tuples as nodes.
+
+        Args:
+            directed (bool, optional): Whether to return a DiGraph rather than a Graph. Defaults to True.
+            mask (np.ndarray, optional): A boolean array marking the nodes to include, along with their out-edges and every node those lead to. Defaults to None, which includes every node.
+
+        Returns:
+            nx.DiGraph: The equivalent networkx graph.
+        """
+        stg = nx.DiGraph() if directed else nx.Graph()
+        nodes = self.nodes
+        sources = np.repeat(np.arange(self.num_nodes), self.out_degree())
+        targets = self.indices
+        if mask is None:
+            stg.add_nodes_from(nodes)
+        else:
+            stg.add_nodes_from(nodes[i] for i in np.flatnonzero(mask).tolist())
+            sources, targets = sources[mask[sources]], targets[mask[sources]]
+        stg.add_edges_from((nodes[u], nodes[v]) for u, v in zip(sources.tolist(), targets.tolist()))
+        return stg
+
+    def write_gexf(self, file_path, floor_height: int, floor_width: int, spacing: float = 24.0):
+        write_office_gexf(self.to_networkx(), file_path, floor_height, floor_width, spacing)
+
+    def _expand(self, frontier: np.ndarray) -> np.ndarray:
+        # Gathers the out-neighbours of every node in the frontier in a single vectorised step.
+        starts = self.indptr[frontier]
+        counts = self.indptr[frontier + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        return self.indices[offsets]
@@ -1,13 +1,28 @@
 import networkx as nx
+import numpy as np
+
+
+# Takes an array of (floor, y, x) states, returns their graph viz positions as an array of (x, y, z) rows.
+def office_positions(states, floor_height, floor_width, spacing=24.0):
+    states = np.asarray(states, dtype=np.float64).reshape(-1, 3)
+    positions = np.ones((len(states), 3), dtype=np.float64)
+    positions[:, 0] = states[:, 2] * spacing
+    positions[:, 1] = -states[:, 1] * spacing - ((states[:, 0] * floor_height) + 3) * spacing
+    return positions
 
 
 # Takes an office graph as input, returns a nicely laid-out version of it (using graph viz position attributes).
 def office_layout(stg, floor_height, floor_width, spacing=24.0):
-    default_pos = {node: {"viz": {"position": {"x": 1.0, "y": 1.0, "z": 1.0}}} for node in stg.nodes}
-    nx.set_node_attributes(stg, default_pos)
+    nodes = list(stg.nodes)
+    positions = office_positions(nodes, floor_height, floor_width, spacing).tolist()
+
+    for node, (x, y, z) in zip(nodes, positions):
+        stg.nodes[node]["viz"] = {"position": {"x": x, "y": y, "z": z}}
 
-    for node, _ in stg.nodes(data=True):
-        (floor, y, x) = node
 
-        stg.nodes[node]["viz"]["position"]["x"] = x * spacing
-        stg.nodes[node]["viz"]["position"]["y"] = -y * spacing - ((floor * floor_height) + 3) * spacing
+# Lays out a copy of an office graph and writes it to a GEXF file. Layout is only computed here, at export time, and
+# the caller's graph is left unchanged.
+def write_office_gexf(stg, file_path, floor_height, floor_width, spacing=24.0):
+    stg = stg.copy()
+    office_layout(stg, floor_height, floor_width, spacing)
+    nx.write_gexf(stg, file_path)
@@ -0,0 +1,98 @@
+import functools
+import time
+
+from typing import Callable, Dict
+
+# Timing histograms use power-of-two buckets of nanoseconds. Bucket i counts durations in [2^(i-1), 2^i) ns.
+NUM_BUCKETS = 64
+
+
+class Instrumentation(object):
+    def __init__(self, callback: Callable[[Dict], None] = None, export_interval: int = None):
+        """
+        Low-overhead call counters and timing histograms for instrumented functions.
+
+        Args:
+            callback (Callable[[Dict], None], optional): A function that is passed the output of to_dict() whenever export() is called. Defaults to None.
+            export_interval (int, optional): If given, export() is called automatically every time this many "step" events have been recorded. Defaults to None.
+        """
+        self.callback = callback
+        self.export_interval = export_interval
+        self.reset()
+
+    def reset(self):
+        # Maps each event name to a [count, total_ns, min_ns, max_ns, buckets] record.
+        self._records = {}
+
+    def record(self, name: str, elapsed_ns: int):
+        """
+        Records a single timed event.
+
+        Args:
+            name (str): The name of the event.
+            elapsed_ns (int): How long the event took, in nanoseconds.
+        """
+        record = self._records.get(name)
+        if record is None:
+            record = self._records[name] = [0, 0, elapsed_ns, elapsed_ns, [0] * NUM_BUCKETS]
+
+        record[0] += 1
+        record[1] += elapsed_ns
+        if elapsed_ns < record[2]:
+            record[2] = elapsed_ns
+        if elapsed_ns > record[3]:
+            record[3] = elapsed_ns
+        record[4][min(elapsed_ns.bit_length(), NUM_BUCKETS - 1)] += 1
+
+        if name == "step" and self.export_interval is not None and record[0] % self.export_interval == 0:
+            self.export()
+
+    def instrument(self, name: str, func: Callable) -> Callable:
+        """
+        Wraps a function so that every call to it is counted and timed.
+
+        Args:
+            name (str): The name to record calls under.
+            func (Callable): The function to wrap.
+
+        Returns:
+            Callable: The instrumented function.
+        """
+        timer = time.perf_counter_ns
+        record = self.record
+
+        @functools.wraps(func)
+        def instrumented(*args, **kwargs):
+            start = timer()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, timer() - start)
+
+        return instrumented
+
+    def to_dict(self) -> Dict[str, Dict]:
+        """
+        Summarises everything recorded so far.
+
+        Returns:
+            Dict[str, Dict]: Maps each event name to its call count, total/mean/min/max time in seconds, and a timing
+            histogram mapping each bucket's upper bound (in nanoseconds) to the number of calls that fell into it.
+        """
+        stats = {}
+        for name, (count, total_ns, min_ns, max_ns, buckets) in self._records.items():
+            stats[name] = {
+                "count": count,
+                "total_s": total_ns * 1e-9,
+                "mean_s": total_ns * 1e-9 / count,
+                "min_s": min_ns * 1e-9,
+                "max_s": max_ns * 1e-9,
+                "histogram_ns": {2**i: n for i, n in enumerate(buckets) if n > 0},
+            }
+        return stats
+
+    def export(self) -> Dict[str, Dict]:
+        stats = self.to_dict()
+        if self.callback is not None:
+            self.callback(stats)
+        return stats
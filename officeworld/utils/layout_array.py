@@ -0,0 +1,68 @@
+import numpy as np
+
+from typing import List
+
+from officeworld.generator.cell_type import CellType
+
+# Lookup table from CellType values back to CellType members.
+_CELL_TYPES = [None] + [cell_type for cell_type in CellType]
+
+
+def layout_to_array(layout: List[List[List["CellType"]]]) -> np.ndarray:
+    """
+    Converts a nested list office layout into a compact array of CellType values.
+
+    Args:
+        layout (List[List[List[CellType]]]): A nested list of cells, with the structure layout[floor][row][col].
+
+    Returns:
+        np.ndarray: A uint8 array of shape (num_floors, floor_height, floor_width) containing each cell's CellType value.
+    """
+    if isinstance(layout, LayoutView):
+        return layout.array
+    if len(layout) == 0:
+        return np.zeros((0, 0, 0), dtype=np.uint8)
+
+    # Floors shared by several floor indices (e.g., floor templates) are only converted once.
+    floors = {}
+    for floor in layout:
+        if id(floor) not in floors:
+            floors[id(floor)] = np.array([[cell.value for cell in row] for row in floor], dtype=np.uint8)
+    return np.stack([floors[id(floor)] for floor in layout])
+
+
+def array_to_layout(array: np.ndarray) -> List[List[List["CellType"]]]:
+    """
+    Converts an array of CellType values back into a nested list office layout.
+
+    Args:
+        array (np.ndarray): An array of shape (num_floors, floor_height, floor_width) containing CellType values.
+
+    Returns:
+        List[List[List[CellType]]]: A nested list of cells, with the structure layout[floor][row][col].
+    """
+    return [[[_CELL_TYPES[value] for value in row] for row in floor] for floor in np.asarray(array).tolist()]
+
+
+class LayoutView(object):
+    def __init__(self, array: np.ndarray):
+        """
+        A read-only view of an array of CellType values which can be indexed like a nested list office layout,
+        i.e., view[floor][row][col] returns a CellType. No cells are copied, so the array may live in shared memory.
+
+        Args:
+            array (np.ndarray): An array of CellType values, e.g., of shape (num_floors, floor_height, floor_width).
+        """
+        self.array = array
+
+    def __getitem__(self, index):
+        if self.array.ndim == 1:
+            return _CELL_TYPES[self.array.item(index)]
+        return LayoutView(self.array[index])
+
+    def __len__(self) -> int:
+        return len(self.array)
+
+    def __iter__(self):
+        for i in range(len(self.array)):
+            yield self[i]
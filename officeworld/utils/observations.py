@@ -0,0 +1,232 @@
+import numpy as np
+
+from numpy.lib.stride_tricks import sliding_window_view
+
+from officeworld.generator.cell_type import CellType
+from officeworld.utils.layout_array import layout_to_array
+
+# The number of cell types, i.e., the number of channels in a one-hot window. Channel i holds CellType value i + 1.
+NUM_CELL_TYPES = len(CellType)
+
+
+class ObservationEncoder(object):
+    def __init__(self, layout, window_size: int = 5, state_index: np.ndarray = None, dtype=np.float32):
+        """
+        Encodes (floor, y, x) states as observations for neural-network agents: egocentric windows of the layout
+        centred on the agent, one-hot encodings of the agent's floor, and tabular one-hot encodings of the state.
+
+        The layout is padded with walls once, and every window is a strided view into the padded array, so single
+        windows are returned without copying anything. Batched methods gather many windows at once with array
+        operations, and write into a caller-provided buffer if one is given.
+
+        Args:
+            layout (List[List[List[CellType]]] | np.ndarray): The office layout, or an array of its CellType values.
+            window_size (int, optional): The side length of the egocentric windows. Must be odd. Defaults to 5.
+            state_index (np.ndarray, optional): Maps each (floor, y, x) cell to its state index, e.g., TransitionTable.state_index. Only needed for tabular one-hot encodings. Defaults to None.
+            dtype (np.dtype, optional): The dtype of one-hot encodings. Defaults to np.float32.
+
+        Raises:
+            ValueError: Raised if the window size is not a positive odd number.
+        """
+        if window_size < 1 or window_size % 2 == 0:
+            raise ValueError(f"The window size must be a positive odd number, but got {window_size}.")
+
+        array = layout if isinstance(layout, np.ndarray) else layout_to_array(layout)
+        self.num_floors, self.floor_height, self.floor_width = array.shape
+        self.window_size = window_size
+        self.state_index = state_index
+        self.num_states = None if state_index is None else int(state_index.max()) + 1
+        self.dtype = dtype
+
+        # windows[floor, y, x] is the window centred on (floor, y, x).
+        radius = window_size // 2
+        self.padded = np.pad(array, ((0, 0), (radius, radius), (radius, radius)), constant_values=CellType.WALL.value)
+        self.padded.flags.writeable = False
+        self.windows = sliding_window_view(self.padded, (window_size, window_size), axis=(1, 2))
+
+        # Offsets of each window cell from its top-left cell in the flattened padded layout, for batched gathers.
+        padded_width = self.padded.shape[2]
+        self._window_offsets = (
+            np.arange(window_size)[:, None] * padded_width + np.arange(window_size)[None, :]
+        ).ravel()
+        self._index_buffer = np.empty((0, window_size * window_size), dtype=np.intp)
+        self._window_buffer = np.empty((0, window_size, window_size), dtype=np.uint8)
+        self._one_hot_windows = None
+        self._floor_one_hots = np.eye(self.num_floors, dtype=dtype)
+        self._floor_one_hots.flags.writeable = False
+
+    @property
+    def window_shape(self):
+        return (self.window_size, self.window_size)
+
+    @property
+    def one_hot_window_shape(self):
+        return (NUM_CELL_TYPES, self.window_size, self.window_size)
+
+    def window(self, state) -> np.ndarray:
+        """
+        Returns the window of CellType values centred on a state, as a read-only view. Cells beyond the edge of the
+        floor are walls.
+
+        Args:
+            state (Tuple[int, int, int]): The (floor, y, x) state.
+
+        Returns:
+            np.ndarray: A (window_size, window_size) uint8 view of CellType values.
+        """
+        floor, y, x = state
+        return self.windows[floor, y, x]
+
+    def one_hot_window(self, state) -> np.ndarray:
+        """
+        Returns the window centred on a state, one-hot encoded along a leading channel axis, as a read-only view.
+
+        Args:
+            state (Tuple[int, int, int]): The (floor, y, x) state.
+
+        Returns:
+            np.ndarray: A (NUM_CELL_TYPES, window_size, window_size) view, where channel i marks cells with CellType value i + 1.
+        """
+        if self._one_hot_windows is None:
+            # The one-hot padded layout is channel-first, so its windows are ready to be fed to a CNN.
+            channels = np.arange(1, NUM_CELL_TYPES + 1, dtype=np.uint8)[None, :, None, None]
+            one_hot = (self.padded[:, None] == channels).astype(self.dtype)
+            one_hot.flags.writeable = False
+            self._one_hot_windows = sliding_window_view(one_hot, self.window_shape, axis=(2, 3))
+
+        floor, y, x = state
+        return self._one_hot_windows[floor, :, y, x]
+
+    def floor_one_hot(self, state, out: np.ndarray = None) -> np.ndarray:
+        """
+        Returns a one-hot encoding of a state's floor.
+
+        Args:
+            state (Tuple[int, int, int]): The (floor, y, x) state.
+            out (np.ndarray, optional): An array of length num_floors to write the encoding into. Defaults to None, in which case a read-only view is returned.
+
+        Returns:
+            np.ndarray: An array of length num_floors.
+        """
+        if out is None:
+            return self._floor_one_hots[state[0]]
+        out[...] = self._floor_one_hots[state[0]]
+        return out
+
+    def tabular_one_hot(self, state, out: np.ndarray = None) -> np.ndarray:
+        """
+        Returns a one-hot encoding of a state's index.
+
+        Args:
+            state (Tuple[int, int, int]): The (floor, y, x) state.
+            out (np.ndarray, optional): An array of length num_states to write the encoding into. Defaults to None.
+
+        Raises:
+            ValueError: Raised if the encoder was created without a state index.
+            ValueError: Raised if the state is not a state of the office, e.g., if it is a wall.
+
+        Returns:
+            np.ndarray: An array of length num_states.
+        """
+        self._check_state_index()
+        index = self.state_index.item(*state)
+        if index < 0:
+            raise ValueError(f"{tuple(state)} is not a state of the office.")
+        if out is None:
+            out = np.zeros(self.num_states, dtype=self.dtype)
+        else:
+            out.fill(0)
+        out[index] = 1
+        return out
+
+    def windows_batch(self, states, out: np.ndarray = None) -> np.ndarray:
+        """
+        Gathers the windows centred on many states at once.
+
+        Args:
+            states (array-like): A (B, 3) array of (floor, y, x) states.
+            out (np.ndarray, optional): A C-contiguous (B, window_size, window_size) uint8 array to write the windows into. Defaults to None.
+
+        Returns:
+            np.ndarray: A (B, window_size, window_size) array of CellType values.
+        """
+        states = np.asarray(states)
+        if out is None:
+            out = np.empty((len(states),) + self.window_shape, dtype=np.uint8)
+
+        # The top-left cell of a window in the padded layout is at the window's centre in the unpadded layout.
+        _, padded_height, padded_width = self.padded.shape
+        corners = (states[:, 0] * padded_height + states[:, 1]) * padded_width + states[:, 2]
+        if len(self._index_buffer) != len(states):
+            self._index_buffer = np.empty((len(states), self.window_size * self.window_size), dtype=np.intp)
+        np.add(corners[:, None], self._window_offsets, out=self._index_buffer)
+        np.take(self.padded.ravel(), self._index_buffer, out=out.reshape(len(states), -1))
+        return out
+
+    def one_hot_windows_batch(self, states, out: np.ndarray = None) -> np.ndarray:
+        """
+        Gathers the windows centred on many states at once, one-hot encoded along a channel axis.
+
+        Args:
+            states (array-like): A (B, 3) array of (floor, y, x) states.
+            out (np.ndarray, optional): A (B, NUM_CELL_TYPES, window_size, window_size) array to write the windows into. Defaults to None.
+
+        Returns:
+            np.ndarray: A (B, NUM_CELL_TYPES, window_size, window_size) array.
+        """
+        # The windows are gathered into a reused buffer before being one-hot encoded.
+        states = np.asarray(states)
+        if len(self._window_buffer) != len(states):
+            self._window_buffer = np.empty((len(states),) + self.window_shape, dtype=np.uint8)
+        windows = self.windows_batch(states, out=self._window_buffer)
+        if out is None:
+            out = np.empty((len(windows),) + self.one_hot_window_shape, dtype=self.dtype)
+        channels = np.arange(1, NUM_CELL_TYPES + 1, dtype=np.uint8)[None, :, None, None]
+        np.equal(windows[:, None], channels, out=out, casting="unsafe")
+        return out
+
+    def floor_one_hots_batch(self, states, out: np.ndarray = None) -> np.ndarray:
+        """
+        Returns one-hot encodings of many states' floors at once.
+
+        Args:
+            states (array-like): A (B, 3) array of (floor, y, x) states.
+            out (np.ndarray, optional): A (B, num_floors) array to write the encodings into. Defaults to None.
+
+        Returns:
+            np.ndarray: A (B, num_floors) array.
+        """
+        states = np.asarray(states)
+        return np.take(self._floor_one_hots, states[:, 0], axis=0, out=out)
+
+    def tabular_one_hots_batch(self, states, out: np.ndarray = None) -> np.ndarray:
+        """
+        Returns one-hot encodings of many states' indices at once.
+
+        Args:
+            states (array-like): A (B, 3) array of (floor, y, x) states.
+            out (np.ndarray, optional): A (B, num_states) array to write the encodings into. Defaults to None.
+
+        Raises:
+            ValueError: Raised if the encoder was created without a state index.
+            ValueError: Raised if any of the states is not a state of the office, e.g., if it is a wall.
+
+        Returns:
+            np.ndarray: A (B, num_states) array.
+        """
+        self._check_state_index()
+        states = np.asarray(states)
+        indices = self.state_index[states[:, 0], states[:, 1], states[:, 2]]
+        invalid = np.flatnonzero(indices < 0)
+        if len(invalid) > 0:
+            raise ValueError(f"{tuple(states[invalid[0]].tolist())} is not a state of the office.")
+        if out is None:
+            out = np.zeros((len(states), self.num_states), dtype=self.dtype)
+        else:
+            out.fill(0)
+        out[np.arange(len(states)), indices] = 1
+        return out
+
+    def _check_state_index(self):
+        if self.state_index is None:
+            raise ValueError("Tabular one-hot encodings need an ObservationEncoder created with a state index.")
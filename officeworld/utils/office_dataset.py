@@ -0,0 +1,235 @@
+import json
+import os
+
+import numpy as np
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List
+
+from officeworld.generator.async_generation import generate_office_bytes
+from officeworld.generator.office_building import OfficeBuilding
+from officeworld.utils.layout_array import array_to_layout, layout_to_array
+from officeworld.utils.serialisation import OfficeBuildingBinaryHandler
+
+FORMAT_VERSION = 1
+
+# The files making up a packed office dataset.
+METADATA_FILE = "metadata.json"
+LAYOUTS_FILE = "layouts.bin"
+INDEX_FILE = "index.npy"
+RECT_FILES = {"halls": ("halls.npy", "hall_offsets.npy"), "rooms": ("rooms.npy", "room_offsets.npy")}
+
+
+class OfficeDatasetWriter(object):
+    def __init__(self, path: str):
+        """
+        Writes many offices into a packed dataset directory. Every office's layout is appended to one contiguous
+        array of CellType values, indexed by an (N, 4) array of (offset, num_floors, floor_height, floor_width) rows.
+        Halls and rooms are stored in two tables of (floor, left, top, width, height) rows, with per-office offsets.
+
+        Layouts are streamed to disk as they are appended, so only the (small) index and tables are held in memory.
+        The dataset is only readable once the writer is closed.
+
+        Example:
+            with OfficeDatasetWriter("offices") as writer:
+                for office in offices:
+                    writer.append(office)
+
+        Args:
+            path (str): The directory to write the dataset to. It is created if it does not exist.
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._layouts = open(os.path.join(path, LAYOUTS_FILE), "wb")
+        self._offset = 0
+        self._index = []
+        self._rects = {"halls": [], "rooms": []}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def append(self, office: "OfficeBuilding") -> int:
+        """
+        Appends an office to the dataset.
+
+        Args:
+            office (OfficeBuilding): The office to append.
+
+        Returns:
+            int: The index of the office within the dataset.
+        """
+        halls = [np.array(floor, dtype=np.int32).reshape(-1, 4) for floor in office.halls]
+        rooms = [np.array(floor, dtype=np.int32).reshape(-1, 4) for floor in office.rooms]
+        return self.append_arrays(layout_to_array(office.layout), halls, rooms)
+
+    def append_bytes(self, data: bytes) -> int:
+        """
+        Appends an office serialised by OfficeBuildingBinaryHandler, without decoding it into nested lists.
+
+        Args:
+            data (bytes): The binary-serialised office.
+
+        Returns:
+            int: The index of the office within the dataset.
+        """
+        return self.append_arrays(*OfficeBuildingBinaryHandler.arrays_from_bytes(data))
+
+    def append_arrays(self, layout: np.ndarray, halls: List[np.ndarray], rooms: List[np.ndarray]) -> int:
+        """
+        Appends an office given as arrays.
+
+        Args:
+            layout (np.ndarray): A (num_floors, floor_height, floor_width) array of CellType values.
+            halls (List[np.ndarray]): Each floor's halls, as (num_halls, 4) arrays of (left, top, width, height).
+            rooms (List[np.ndarray]): Each floor's rooms, as (num_rooms, 4) arrays of (left, top, width, height).
+
+        Returns:
+            int: The index of the office within the dataset.
+        """
+        if self._layouts is None:
+            raise ValueError("Cannot append to a closed OfficeDatasetWriter.")
+
+        layout = np.ascontiguousarray(layout, dtype=np.uint8)
+        self._layouts.write(layout.tobytes())
+        self._index.append((self._offset, *layout.shape))
+        self._offset += layout.size
+
+        for name, rects in [("halls", halls), ("rooms", rooms)]:
+            table = np.zeros((sum(len(floor) for floor in rects), 5), dtype=np.int32)
+            table[:, 0] = np.repeat(np.arange(len(rects)), [len(floor) for floor in rects])
+            if len(table) > 0:
+                table[:, 1:] = np.concatenate(rects)
+            self._rects[name].append(table)
+
+        return len(self._index) - 1
+
+    def close(self):
+        """
+        Finishes writing the dataset, saving its index and hall and room tables.
+        """
+        if self._layouts is None:
+            return
+        self._layouts.close()
+        self._layouts = None
+
+        np.save(os.path.join(self.path, INDEX_FILE), np.array(self._index, dtype=np.int64).reshape(-1, 4))
+        for name, (table_file, offsets_file) in RECT_FILES.items():
+            tables = self._rects[name]
+            offsets = np.zeros(len(tables) + 1, dtype=np.int64)
+            np.cumsum([len(table) for table in tables], out=offsets[1:])
+            np.save(os.path.join(self.path, offsets_file), offsets)
+            np.save(
+                os.path.join(self.path, table_file),
+                np.concatenate(tables) if len(tables) > 0 else np.zeros((0, 5), dtype=np.int32),
+            )
+
+        with open(os.path.join(self.path, METADATA_FILE), "w") as f:
+            json.dump({"format_version": FORMAT_VERSION, "num_offices": len(self._index)}, f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class OfficeDataset(object):
+    def __init__(self, path: str):
+        """
+        Reads a packed dataset of offices written by OfficeDatasetWriter. Layouts are memory-mapped, so opening a
+        dataset is cheap however many offices it holds, and any office can be loaded by its index.
+
+        Args:
+            path (str): The directory containing the dataset.
+
+        Raises:
+            ValueError: Raised if the dataset was written in an unsupported format.
+        """
+        self.path = path
+        with open(os.path.join(path, METADATA_FILE), "r") as f:
+            self.metadata = json.load(f)
+        if self.metadata["format_version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported office dataset format version {self.metadata['format_version']}.")
+
+        self.index = np.load(os.path.join(path, INDEX_FILE))
+        if self.index[:, 1:].prod(axis=1).sum() > 0:
+            self.layouts = np.memmap(os.path.join(path, LAYOUTS_FILE), dtype=np.uint8, mode="r")
+        else:
+            self.layouts = np.zeros(0, dtype=np.uint8)
+
+        self._rects = {}
+        for name, (table_file, offsets_file) in RECT_FILES.items():
+            self._rects[name] = (np.load(os.path.join(path, table_file)), np.load(os.path.join(path, offsets_file)))
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getitem__(self, i: int) -> "OfficeBuilding":
+        return OfficeBuilding(array_to_layout(self.layout_array(i)), self.halls(i), self.rooms(i))
+
+    def __iter__(self) -> Iterator["OfficeBuilding"]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def layout_array(self, i: int) -> np.ndarray:
+        """
+        Returns an office's layout as a read-only view into the dataset, without copying it.
+
+        Args:
+            i (int): The index of the office.
+
+        Returns:
+            np.ndarray: A (num_floors, floor_height, floor_width) array of CellType values.
+        """
+        offset, num_floors, floor_height, floor_width = self.index[i].tolist()
+        size = num_floors * floor_height * floor_width
+        return self.layouts[offset : offset + size].reshape(num_floors, floor_height, floor_width)
+
+    def halls(self, i: int) -> List[List[tuple]]:
+        return self._get_rects("halls", i)
+
+    def rooms(self, i: int) -> List[List[tuple]]:
+        return self._get_rects("rooms", i)
+
+    def _get_rects(self, name, i):
+        table, offsets = self._rects[name]
+        num_floors = int(self.index[i, 1])
+        rects = [[] for _ in range(num_floors)]
+        for floor, left, top, width, height in table[offsets[i] : offsets[i + 1]].tolist():
+            rects[floor].append((left, top, width, height))
+        return rects
+
+
+def generate_dataset(
+    path: str, specs: Iterable[Dict], max_workers: int = None, executor: Executor = None, chunksize: int = 16
+) -> "OfficeDataset":
+    """
+    Generates offices in parallel over a process pool, and packs them into a dataset in the same order as their specs.
+
+    Example:
+        dataset = generate_dataset("offices", [{"num_floors": 1, "seed": i} for i in range(10000)])
+
+    Args:
+        path (str): The directory to write the dataset to.
+        specs (Iterable[Dict]): Keyword arguments to provide to OfficeGenerator, one dictionary per office.
+        max_workers (int, optional): The number of worker processes to start if no executor is given. Defaults to None, which uses one per CPU.
+        executor (Executor, optional): An executor to generate offices in. It is not shut down afterwards. Defaults to None, in which case a new ProcessPoolExecutor is used.
+        chunksize (int, optional): How many specs to send to each worker at once. Defaults to 16.
+
+    Returns:
+        OfficeDataset: The generated dataset.
+    """
+    owns_executor = executor is None
+    if owns_executor:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+
+    try:
+        with OfficeDatasetWriter(path) as writer:
+            # Offices are sent back from the workers in binary form, and packed without being decoded.
+            for data in executor.map(generate_office_bytes, (dict(spec) for spec in specs), chunksize=chunksize):
+                writer.append_bytes(data)
+    finally:
+        if owns_executor:
+            executor.shutdown(cancel_futures=True)
+
+    return OfficeDataset(path)
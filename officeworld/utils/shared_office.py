@@ -0,0 +1,188 @@
+import numpy as np
+
+from multiprocessing import shared_memory
+from typing import Dict
+
+from officeworld.utils.compact_graph import CompactGraph
+from officeworld.utils.layout_array import layout_to_array
+
+# Arrays published for each office, in the order their blocks are created.
+SHARED_ARRAYS = (
+    "layout",
+    "states",
+    "state_index",
+    "next_states",
+    "rewards",
+    "terminal",
+    "portals",
+    "reachable",
+    "indptr",
+    "indices",
+    "edge_actions",
+    "edge_rewards",
+)
+
+# Arrays only published for offices with stochastic transitions.
+STOCHASTIC_SHARED_ARRAYS = ("outcome_states", "outcome_probs", "outcome_rewards", "edge_probabilities")
+
+
+class SharedOffice(object):
+    def __init__(
+        self,
+        arrays: Dict[str, np.ndarray],
+        metadata: Dict,
+        blocks: Dict[str, "shared_memory.SharedMemory"],
+        owner: bool,
+    ):
+        """
+        An office layout and its precomputed transition table and state-transition graph, stored in shared memory.
+        Use SharedOffice.publish in the parent process, pass its picklable handle to worker processes, and attach to it
+        there with SharedOffice.attach or OfficeWorldEnvironment.attach_shared.
+
+        Workers should be started by the publishing process (e.g., with multiprocessing), so that they share its
+        resource tracker and the shared memory is only released when the publisher calls unlink().
+
+        Args:
+            arrays (Dict[str, np.ndarray]): The published arrays, backed by the shared memory blocks.
+            metadata (Dict): The office's halls, rooms, rewards, and initial and terminal states.
+            blocks (Dict[str, SharedMemory]): The shared memory blocks backing each array.
+            owner (bool): Whether this object created the blocks, and so is responsible for unlinking them.
+        """
+        self.arrays = arrays
+        self.metadata = metadata
+        self._blocks = blocks
+        self._owner = owner
+
+    @classmethod
+    def publish(cls, env) -> "SharedOffice":
+        """
+        Copies an environment's layout, transition table and state-transition graph into new shared memory blocks.
+
+        Args:
+            env (OfficeWorldEnvironment): The environment to publish.
+
+        Returns:
+            SharedOffice: The published office. Its arrays are read-only, and it owns the shared memory blocks.
+        """
+        table = env.transition_table
+        if isinstance(env.stg, CompactGraph):
+            stg = env.stg
+        else:
+            stg = CompactGraph.from_transition_table(table)
+        reachable = np.zeros(table.num_states, dtype=bool)
+        reachable[[table.index(state) for state in env.get_state_space()]] = True
+
+        sources = {
+            "layout": layout_to_array(env.office.layout),
+            "states": table.states,
+            "state_index": table.state_index,
+            "next_states": table.next_states,
+            "rewards": table.rewards,
+            "terminal": table.terminal,
+            "portals": table.portals,
+            "reachable": reachable,
+            "indptr": stg.indptr,
+            "indices": stg.indices,
+            "edge_actions": stg.edge_attrs["action"],
+            "edge_rewards": stg.edge_attrs["reward"],
+        }
+        if not table.deterministic:
+            sources["outcome_states"] = table.outcome_states
+            sources["outcome_probs"] = table.outcome_probs
+            sources["outcome_rewards"] = table.outcome_rewards
+            sources["edge_probabilities"] = stg.edge_attrs["probability"]
+
+        arrays, blocks = {}, {}
+        try:
+            for name in [name for name in SHARED_ARRAYS + STOCHASTIC_SHARED_ARRAYS if name in sources]:
+                source = np.ascontiguousarray(sources[name])
+                # Zero-size blocks are not allowed, so empty arrays still get a single byte.
+                blocks[name] = shared_memory.SharedMemory(create=True, size=max(source.nbytes, 1))
+                arrays[name] = np.ndarray(source.shape, dtype=source.dtype, buffer=blocks[name].buf)
+                arrays[name][...] = source
+                arrays[name].flags.writeable = False
+        except BaseException:
+            for block in blocks.values():
+                block.close()
+                block.unlink()
+            raise
+
+        metadata = {
+            "halls": env.office.halls,
+            "rooms": env.office.rooms,
+            "movement_penalty": env.movement_penalty,
+            "goal_reward": env.goal_reward,
+            "muddy_penalty": env.muddy_penalty,
+            "crowded_slip_prob": env.crowded_slip_prob,
+            "explorable": env.explorable,
+            "initial_states": list(env.initial_states),
+            "terminal_states": sorted(env.terminal_states),
+        }
+        return cls(arrays, metadata, blocks, owner=True)
+
+    @classmethod
+    def attach(cls, handle: Dict) -> "SharedOffice":
+        """
+        Attaches to an office published by another process, without copying any of its arrays.
+
+        Args:
+            handle (Dict): The handle of the published office.
+
+        Returns:
+            SharedOffice: A read-only view of the published office.
+        """
+        arrays, blocks = {}, {}
+        for name, (block_name, shape, dtype) in handle["arrays"].items():
+            blocks[name] = _attach_block(block_name)
+            arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=blocks[name].buf)
+            arrays[name].flags.writeable = False
+        return cls(arrays, handle["metadata"], blocks, owner=False)
+
+    @property
+    def handle(self) -> Dict:
+        """
+        A small, picklable description of the published office, which can be sent to worker processes.
+        """
+        return {
+            "arrays": {
+                name: (self._blocks[name].name, array.shape, array.dtype.str) for name, array in self.arrays.items()
+            },
+            "metadata": self.metadata,
+        }
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.arrays.values())
+
+    def close(self):
+        """
+        Detaches this process from the shared memory. Any arrays or environments using it must no longer be used.
+        """
+        self.arrays = {}
+        for block in self._blocks.values():
+            block.close()
+
+    def unlink(self):
+        """
+        Closes the shared memory and, if this process published it, frees it once every other process has closed it.
+        """
+        self.close()
+        if self._owner:
+            for block in self._blocks.values():
+                block.unlink()
+        self._blocks = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.unlink()
+
+
+def _attach_block(name: str) -> "shared_memory.SharedMemory":
+    # Python 3.13+ lets attaching processes opt out of the resource tracker, which would otherwise free the block
+    # when an unrelated attaching process exits. Earlier versions register it, which is harmless for child processes.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
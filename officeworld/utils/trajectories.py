@@ -0,0 +1,339 @@
+import functools
+import json
+import os
+
+import numpy as np
+
+from typing import Dict, Iterator
+
+FORMAT_VERSION = 1
+
+# The files making up a trajectory dataset.
+METADATA_FILE = "metadata.json"
+EPISODES_FILE = "episodes.npy"
+
+# The column arrays recorded for each transition, and their dtypes. States are stored as encoded integers.
+COLUMNS = {
+    "states": np.int64,
+    "actions": np.int8,
+    "rewards": np.float64,
+    "next_states": np.int64,
+    "terminals": np.bool_,
+}
+
+
+class TrajectoryRecorder(object):
+    def __init__(self, path: str, floor_height: int, floor_width: int, initial_capacity: int = 65536):
+        """
+        Records transitions into memory-mapped column arrays on disk, for offline reinforcement learning. States are
+        stored as integers encoded like OfficeWorldEnvironment.encode, alongside actions, rewards, next states and
+        terminal flags, and the index of the first transition of each episode is kept.
+
+        The columns are preallocated, and their capacity is doubled whenever they fill up, so recording a transition
+        only writes five scalars and never allocates. The dataset is only readable once the recorder is closed.
+
+        Example:
+            with TrajectoryRecorder.for_environment("trajectories", env) as recorder:
+                recorder.attach(env)
+                ...  # Interact with env as usual.
+
+        Args:
+            path (str): The directory to write the dataset to. It is created if it does not exist.
+            floor_height (int): The height of the office's floors, used to encode and decode states.
+            floor_width (int): The width of the office's floors, used to encode and decode states.
+            initial_capacity (int, optional): How many transitions to allocate space for up-front. Defaults to 65536.
+        """
+        self.path = path
+        self.floor_height = floor_height
+        self.floor_width = floor_width
+        os.makedirs(path, exist_ok=True)
+
+        self.num_transitions = 0
+        self._episode_starts = []
+        self._columns = {}
+        self._capacity = 0
+        self._grow(max(1, initial_capacity))
+
+        self._env = None
+        self._shadowed = {}
+        self._wrappers = {}
+
+    @classmethod
+    def for_environment(cls, path: str, env, initial_capacity: int = 65536) -> "TrajectoryRecorder":
+        """
+        Creates a recorder whose states are encoded for the given environment's office.
+
+        Args:
+            path (str): The directory to write the dataset to.
+            env (OfficeWorldEnvironment): The environment whose transitions will be recorded.
+            initial_capacity (int, optional): How many transitions to allocate space for up-front. Defaults to 65536.
+
+        Returns:
+            TrajectoryRecorder: The new recorder. It is not attached to the environment.
+        """
+        return cls(path, env.floor_height, env.floor_width, initial_capacity)
+
+    def __len__(self) -> int:
+        return self.num_transitions
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def num_episodes(self) -> int:
+        return len(self._episode_starts)
+
+    def encode(self, state) -> int:
+        floor, y, x = state
+        return (floor * self.floor_width + x) * self.floor_height + y
+
+    def start_episode(self):
+        """
+        Marks the next recorded transition as the first of a new episode.
+        """
+        self._episode_starts.append(self.num_transitions)
+
+    def record(self, state, action: int, reward: float, next_state, terminal: bool):
+        """
+        Records a single transition.
+
+        Args:
+            state (Tuple[int, int, int]): The state the action was taken in.
+            action (int): The action taken.
+            reward (float): The reward received.
+            next_state (Tuple[int, int, int]): The state the environment transitioned to.
+            terminal (bool): Whether the next state is terminal.
+        """
+        if self._columns is None:
+            raise ValueError("Cannot record to a closed TrajectoryRecorder.")
+        if len(self._episode_starts) == 0:
+            self.start_episode()
+        if self.num_transitions == self._capacity:
+            self._grow(2 * self._capacity)
+
+        i = self.num_transitions
+        columns = self._columns
+        columns["states"][i] = self.encode(state)
+        columns["actions"][i] = action
+        columns["rewards"][i] = reward
+        columns["next_states"][i] = self.encode(next_state)
+        columns["terminals"][i] = terminal
+        self.num_transitions = i + 1
+
+    def attach(self, env):
+        """
+        Starts recording every transition made by the environment's step method, and starts a new episode whenever its
+        reset method is called. Like instrumentation, this works by shadowing the methods on the environment instance.
+
+        Args:
+            env (OfficeWorldEnvironment): The environment to record.
+
+        Raises:
+            ValueError: Raised if the recorder is already attached and cannot be detached first.
+        """
+        self.detach()
+        self._env = env
+        self._shadowed = {method: env.__dict__.get(method) for method in ["step", "reset"]}
+
+        step = env.step
+        reset = env.reset
+        record = self.record
+
+        @functools.wraps(step)
+        def recorded_step(action, state=None):
+            if state is None:
+                state = env.current_state
+            next_state, reward, terminal, info = step(action, state)
+            record(state, action, reward, next_state, terminal)
+            return next_state, reward, terminal, info
+
+        @functools.wraps(reset)
+        def recorded_reset(*args, **kwargs):
+            self.start_episode()
+            return reset(*args, **kwargs)
+
+        self._wrappers = {"step": recorded_step, "reset": recorded_reset}
+        env.step = recorded_step
+        env.reset = recorded_reset
+
+    def detach(self):
+        """
+        Stops recording the attached environment, restoring the methods it had before it was attached.
+
+        Raises:
+            ValueError: Raised if a recorded method has since been shadowed again, e.g., by instrumentation enabled after the recorder was attached, which must be disabled first.
+        """
+        if self._env is None:
+            return
+        for method, wrapper in self._wrappers.items():
+            if self._env.__dict__.get(method) is not wrapper:
+                raise ValueError(
+                    f"The environment's {method} method has been shadowed since the recorder was attached. "
+                    "Remove whatever shadowed it before detaching the recorder."
+                )
+
+        for method, original in self._shadowed.items():
+            if original is None:
+                self._env.__dict__.pop(method, None)
+            else:
+                setattr(self._env, method, original)
+        self._env = None
+        self._shadowed = {}
+        self._wrappers = {}
+
+    def flush(self):
+        """
+        Writes any recorded transitions still held in memory to disk.
+        """
+        for column in (self._columns or {}).values():
+            column.flush()
+
+    def close(self):
+        """
+        Stops recording, trims the column files to the number of recorded transitions, and saves the episode index.
+
+        Raises:
+            ValueError: Raised if the recorder cannot be detached from its environment.
+        """
+        if self._columns is None:
+            return
+        self.detach()
+        self.flush()
+        self._columns = None
+
+        for name, dtype in COLUMNS.items():
+            with open(os.path.join(self.path, f"{name}.bin"), "r+b") as f:
+                f.truncate(self.num_transitions * np.dtype(dtype).itemsize)
+
+        # Episodes started without any transitions are dropped.
+        starts = np.unique(np.array(self._episode_starts, dtype=np.int64))
+        np.save(os.path.join(self.path, EPISODES_FILE), starts[starts < self.num_transitions])
+        with open(os.path.join(self.path, METADATA_FILE), "w") as f:
+            json.dump(
+                {
+                    "format_version": FORMAT_VERSION,
+                    "num_transitions": self.num_transitions,
+                    "floor_height": self.floor_height,
+                    "floor_width": self.floor_width,
+                },
+                f,
+            )
+
+    def _grow(self, capacity):
+        # Resizes each column's file, and maps it again with the new capacity.
+        for name, dtype in COLUMNS.items():
+            file_path = os.path.join(self.path, f"{name}.bin")
+            column = self._columns.pop(name, None)
+            if column is not None:
+                column.flush()
+                del column
+            with open(file_path, "r+b" if self._capacity > 0 else "wb") as f:
+                f.truncate(capacity * np.dtype(dtype).itemsize)
+            self._columns[name] = np.memmap(file_path, dtype=dtype, mode="r+", shape=(capacity,))
+        self._capacity = capacity
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TrajectoryDataset(object):
+    def __init__(self, path: str):
+        """
+        Reads transitions recorded by TrajectoryRecorder. The columns are memory-mapped, so opening a dataset is cheap
+        however many transitions it holds, and batches are read straight from the mapped files.
+
+        Args:
+            path (str): The directory containing the dataset.
+
+        Raises:
+            ValueError: Raised if the dataset was written in an unsupported format.
+        """
+        self.path = path
+        with open(os.path.join(path, METADATA_FILE), "r") as f:
+            self.metadata = json.load(f)
+        if self.metadata["format_version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported trajectory dataset format version {self.metadata['format_version']}.")
+
+        self.num_transitions = self.metadata["num_transitions"]
+        self.floor_height = self.metadata["floor_height"]
+        self.floor_width = self.metadata["floor_width"]
+
+        self.columns = {}
+        for name, dtype in COLUMNS.items():
+            if self.num_transitions > 0:
+                file_path = os.path.join(path, f"{name}.bin")
+                self.columns[name] = np.memmap(file_path, dtype=dtype, mode="r", shape=(self.num_transitions,))
+            else:
+                self.columns[name] = np.zeros(0, dtype=dtype)
+
+        # episode_bounds[i] and episode_bounds[i + 1] delimit the transitions of the i-th episode.
+        starts = np.load(os.path.join(path, EPISODES_FILE))
+        self.episode_bounds = np.append(starts, self.num_transitions)
+
+    def __len__(self) -> int:
+        return self.num_transitions
+
+    @property
+    def num_episodes(self) -> int:
+        return len(self.episode_bounds) - 1
+
+    def episode(self, i: int) -> Dict[str, np.ndarray]:
+        """
+        Returns the transitions of a single episode, as read-only views of each column.
+
+        Args:
+            i (int): The index of the episode.
+
+        Returns:
+            Dict[str, np.ndarray]: Maps each column's name to its values over the episode.
+        """
+        start, end = self.episode_bounds[i], self.episode_bounds[i + 1]
+        return {name: column[start:end] for name, column in self.columns.items()}
+
+    def iter_batches(
+        self, batch_size: int, shuffle: bool = False, rng: "np.random.Generator" = None, drop_last: bool = False
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Streams the recorded transitions back out in batches, e.g., to fill a replay buffer.
+
+        Args:
+            batch_size (int): The number of transitions in each batch.
+            shuffle (bool, optional): Whether to visit the transitions in a random order. Defaults to False, in which case each batch is a contiguous, read-only view of the columns.
+            rng (np.random.Generator, optional): The random number generator used to shuffle. Defaults to None, in which case a new one is created.
+            drop_last (bool, optional): Whether to skip the final batch if it is smaller than batch_size. Defaults to False.
+
+        Yields:
+            Dict[str, np.ndarray]: Maps each column's name to its values over the batch.
+        """
+        if shuffle:
+            rng = np.random.default_rng() if rng is None else rng
+            order = rng.permutation(self.num_transitions)
+
+        end = self.num_transitions - self.num_transitions % batch_size if drop_last else self.num_transitions
+        for start in range(0, end, batch_size):
+            if shuffle:
+                # Sorting each batch's indices keeps reads from the mapped files as sequential as possible.
+                indices = np.sort(order[start : start + batch_size])
+                yield {name: column[indices] for name, column in self.columns.items()}
+            else:
+                yield {name: column[start : start + batch_size] for name, column in self.columns.items()}
+
+    def decode(self, encoded: np.ndarray) -> np.ndarray:
+        """
+        Decodes an array of encoded states back into (floor, y, x) rows.
+
+        Args:
+            encoded (np.ndarray): An array of encoded states, e.g., a batch's "states" column.
+
+        Returns:
+            np.ndarray: An (n, 3) array of (floor, y, x) states.
+        """
+        encoded = np.asarray(encoded, dtype=np.int64)
+        y = encoded % self.floor_height
+        x = (encoded // self.floor_height) % self.floor_width
+        floor = encoded // (self.floor_height * self.floor_width)
+        return np.stack([floor, y, x], axis=-1)
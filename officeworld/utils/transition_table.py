@@ -0,0 +1,378 @@
+import numpy as np
+
+from typing import List, Tuple
+
+from officeworld.generator.cell_type import CellType
+
+# (floor, y, x) offsets for each action: North, South, East, West, Ascend, Descend.
+ACTION_OFFSETS = np.array([[0, 1, 0], [0, -1, 0], [0, 0, 1], [0, 0, -1], [1, 0, 0], [-1, 0, 0]], dtype=np.int32)
+
+VALID_STATE_TYPES = np.array(
+    [
+        CellType.ROOM.value,
+        CellType.HALL.value,
+        CellType.ELEVATOR.value,
+        CellType.UPSTAIR.value,
+        CellType.DOWNSTAIR.value,
+        CellType.START.value,
+        CellType.GOAL.value,
+        CellType.MUDDY.value,
+        CellType.CROWDED.value,
+    ],
+    dtype=np.uint8,
+)
+
+ASCEND, DESCEND = 4, 5
+
+# The number of horizontal moves, i.e., North, South, East and West, which a crowd can jostle the agent into.
+NUM_HORIZONTAL_ACTIONS = 4
+
+
+class TransitionTable(object):
+    def __init__(
+        self,
+        states: np.ndarray,
+        state_index: np.ndarray,
+        next_states: np.ndarray,
+        rewards: np.ndarray,
+        terminal: np.ndarray,
+        portals: np.ndarray = None,
+        outcome_states: np.ndarray = None,
+        outcome_probs: np.ndarray = None,
+        outcome_rewards: np.ndarray = None,
+    ):
+        """
+        A compact, array-based representation of an office's transition dynamics.
+        States are numbered in the same order as OfficeWorldEnvironment.encode, i.e., by floor, then column, then row.
+
+        Stochastic dynamics are described by a small, fixed number K of possible outcomes for each state-action pair.
+        In that case, next_states holds the intended outcome of each action, and rewards holds each action's expected reward.
+
+        Args:
+            states (np.ndarray): An (N, 3) array whose rows are the (floor, y, x) coordinates of each state.
+            state_index (np.ndarray): A (num_floors, floor_height, floor_width) array mapping each cell to its state index, or -1 for non-states.
+            next_states (np.ndarray): An (N, num_actions) array of next-state indices, or -1 where an action is unavailable.
+            rewards (np.ndarray): An (N, num_actions) array of rewards for each state-action pair.
+            terminal (np.ndarray): A boolean array of length N, marking terminal states.
+            portals (np.ndarray, optional): A (P, 3) array of (source, action, target) rows, listing every available transition to another floor. Defaults to None, in which case it is found from next_states when first used.
+            outcome_states (np.ndarray, optional): An (N, num_actions, K) array of the possible next states of each state-action pair, padded with -1. Defaults to None, for deterministic dynamics.
+            outcome_probs (np.ndarray, optional): An (N, num_actions, K) array of the probability of each outcome. Defaults to None, for deterministic dynamics.
+            outcome_rewards (np.ndarray, optional): An (N, num_actions, K) array of the reward for each outcome. Defaults to None, for deterministic dynamics.
+        """
+        self.states = states
+        self.state_index = state_index
+        self.next_states = next_states
+        self.rewards = rewards
+        self.terminal = terminal
+        self._portals = portals
+        self.outcome_states = outcome_states
+        self.outcome_probs = outcome_probs
+        self.outcome_rewards = outcome_rewards
+        self._alias_probs = None
+        self._alias_indices = None
+
+    @property
+    def portals(self) -> np.ndarray:
+        if self._portals is None:
+            sources, actions = np.nonzero(self.next_states[:, ASCEND:] >= 0)
+            actions = actions + ASCEND
+            self._portals = np.stack([sources, actions, self.next_states[sources, actions]], axis=1).astype(np.int32)
+        return self._portals
+
+    @property
+    def num_states(self) -> int:
+        return len(self.states)
+
+    @property
+    def num_actions(self) -> int:
+        return self.next_states.shape[1]
+
+    @property
+    def available_actions(self) -> np.ndarray:
+        return self.next_states >= 0
+
+    @property
+    def deterministic(self) -> bool:
+        return self.outcome_states is None
+
+    @property
+    def num_outcomes(self) -> int:
+        return 1 if self.outcome_states is None else self.outcome_states.shape[2]
+
+    @property
+    def alias_probs(self) -> np.ndarray:
+        if self._alias_probs is None:
+            self._build_alias_tables()
+        return self._alias_probs
+
+    @property
+    def alias_indices(self) -> np.ndarray:
+        if self._alias_indices is None:
+            self._build_alias_tables()
+        return self._alias_indices
+
+    def sample(self, indices, actions, rng: "np.random.Generator" = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Samples the outcomes of many state-action pairs at once. Stochastic outcomes are drawn from alias tables,
+        so each sample costs a constant amount of work however the outcome probabilities are distributed.
+
+        Args:
+            indices (array-like): The indices of the states to act in.
+            actions (array-like): The action to take in each state. Every action must be available.
+            rng (np.random.Generator, optional): The random number generator to use. Defaults to None, in which case a new one is created.
+
+        Returns:
+            np.ndarray: The index of the next state for each state-action pair.
+            np.ndarray: The reward received for each state-action pair.
+        """
+        indices = np.asarray(indices)
+        actions = np.asarray(actions)
+        if self.deterministic:
+            return self.next_states[indices, actions], self.rewards[indices, actions]
+
+        rng = np.random.default_rng() if rng is None else rng
+        draws = rng.random(indices.shape) * self.num_outcomes
+        outcomes = np.minimum(draws.astype(np.int64), self.num_outcomes - 1)
+        aliased = draws - outcomes >= self.alias_probs[indices, actions, outcomes]
+        outcomes[aliased] = self.alias_indices[indices[aliased], actions[aliased], outcomes[aliased]]
+        return self.outcome_states[indices, actions, outcomes], self.outcome_rewards[indices, actions, outcomes]
+
+    def _build_alias_tables(self):
+        # Builds Walker alias tables for every state-action pair at once. Each of the K - 1 rounds pairs the smallest
+        # unfilled outcome of every row, which is topped up to probability 1 / K by its row's largest outcome.
+        num_outcomes = self.num_outcomes
+        probs = self.outcome_probs.reshape(-1, num_outcomes)
+        scaled = probs * num_outcomes
+        alias_probs = np.ones(probs.shape)
+        alias_indices = np.tile(np.arange(num_outcomes, dtype=np.int32), (len(probs), 1))
+        filled = np.zeros(probs.shape, dtype=bool)
+        rows = np.arange(len(probs))
+        for _ in range(num_outcomes - 1):
+            small = np.argmin(np.where(filled, np.inf, scaled), axis=1)
+            large = np.argmax(np.where(filled, -np.inf, scaled), axis=1)
+            active = (scaled[rows, small] < 1.0) & (small != large)
+            row, small, large = rows[active], small[active], large[active]
+            alias_probs[row, small] = scaled[row, small]
+            alias_indices[row, small] = large
+            scaled[row, large] -= 1.0 - scaled[row, small]
+            filled[row, small] = True
+
+        self._alias_probs = alias_probs.reshape(self.outcome_probs.shape)
+        self._alias_indices = alias_indices.reshape(self.outcome_probs.shape)
+
+    def index(self, state: Tuple[int, int, int]) -> int:
+        """
+        Returns the index of the given (floor, y, x) state, or -1 if the cell is not a state, e.g., if it is a wall.
+
+        Args:
+            state (Tuple[int, int, int]): The state to look up.
+
+        Raises:
+            KeyError: Raised if the state lies outside of the office, rather than letting negative coordinates wrap around.
+
+        Returns:
+            int: The state's index, or -1.
+        """
+        floor, y, x = state
+        if not all(0 <= c < s for c, s in zip(state, self.state_index.shape)):
+            raise KeyError(state)
+        return int(self.state_index[floor, y, x])
+
+    def state(self, index: int) -> Tuple[int, int, int]:
+        return tuple(self.states[index].tolist())
+
+
+def build_transition_table(
+    layout: np.ndarray,
+    movement_penalty: float = -0.0001,
+    goal_reward: float = 1.0,
+    explorable: bool = False,
+    muddy_penalty: float = -0.001,
+    crowded_slip_prob: float = 0.25,
+    floor_templates: List[int] = None,
+) -> "TransitionTable":
+    """
+    Builds the transition table for an office layout, using vectorised operations over the whole building.
+    The dynamics match OfficeWorldEnvironment.get_successors: moving into a blocked cell leaves the agent where it is,
+    elevators and stairs connect to the same cell on adjacent floors, and terminal states have no available actions.
+    Actions taken in muddy cells cost more, and horizontal moves in crowded cells may be jostled into a random
+    horizontal move, in which case the table is stochastic.
+
+    Args:
+        layout (np.ndarray): A (num_floors, floor_height, floor_width) array of CellType values.
+        movement_penalty (float, optional): The penalty for each action taken. Defaults to -0.0001.
+        goal_reward (float, optional): The reward for reaching the goal. Defaults to 1.0.
+        explorable (bool, optional): Whether terminal states should be ignored. Defaults to False.
+        muddy_penalty (float, optional): The penalty for each action taken in a muddy cell. Defaults to -0.001.
+        crowded_slip_prob (float, optional): The probability that a horizontal move in a crowded cell is replaced by a uniformly random horizontal move. Defaults to 0.25.
+        floor_templates (List[int], optional): The template each floor uses, as in OfficeBuilding.floor_templates. If given, the states and horizontal moves of each template are only worked out once, and tiled across the floors using it. Floors with the same template must have identical layouts. Defaults to None.
+
+    Returns:
+        TransitionTable: The transition table for the given layout.
+    """
+    layout = np.asarray(layout)
+    if floor_templates is None:
+        states, state_index = _number_states(layout)
+        horizontal_moves = _horizontal_moves(states, state_index)
+    else:
+        states, horizontal_moves = _tile_floor_templates(layout, floor_templates)
+        state_index = np.full(layout.shape, -1, dtype=np.int32)
+        state_index[tuple(states.T)] = np.arange(len(states), dtype=np.int32)
+    num_states = len(states)
+
+    cell_types = layout[tuple(states.T)]
+    if explorable:
+        terminal = np.zeros(num_states, dtype=bool)
+    else:
+        terminal = cell_types == CellType.GOAL.value
+
+    next_states = np.full((num_states, len(ACTION_OFFSETS)), -1, dtype=np.int32)
+    next_states[:, :ASCEND] = horizontal_moves
+
+    # Vertical transitions only exist at elevators and stairs, so they are filled in from a sparse list of portals.
+    portals = find_portals(layout, state_index)
+    portals = portals[~terminal[portals[:, 0]]]
+    next_states[portals[:, 0], portals[:, 1]] = portals[:, 2]
+
+    # No actions are available in terminal states.
+    next_states[terminal] = -1
+
+    # Each action taken in a muddy cell costs more than usual.
+    penalties = np.where(cell_types == CellType.MUDDY.value, muddy_penalty, movement_penalty)
+
+    available = next_states >= 0
+    sources, actions = np.nonzero(available)
+    rewards = np.zeros(next_states.shape, dtype=np.float64)
+    rewards[sources, actions] = penalties[sources] + goal_reward * terminal[next_states[sources, actions]]
+
+    crowded = np.flatnonzero((cell_types == CellType.CROWDED.value) & ~terminal)
+    if len(crowded) == 0 or crowded_slip_prob <= 0.0:
+        return TransitionTable(states, state_index, next_states, rewards, terminal, portals)
+
+    # Every other state-action pair has a single outcome.
+    num_outcomes = NUM_HORIZONTAL_ACTIONS
+    outcome_states = np.full(next_states.shape + (num_outcomes,), -1, dtype=np.int32)
+    outcome_probs = np.zeros(outcome_states.shape)
+    outcome_states[:, :, 0] = next_states
+    outcome_probs[:, :, 0] = available
+
+    # In crowded cells, each horizontal move leads to the outcome of any horizontal move, favouring the intended one.
+    horizontal = np.arange(NUM_HORIZONTAL_ACTIONS)
+    jostled_states = np.repeat(next_states[crowded, None, :NUM_HORIZONTAL_ACTIONS], NUM_HORIZONTAL_ACTIONS, axis=1)
+    jostled_probs = np.full(jostled_states.shape, crowded_slip_prob / NUM_HORIZONTAL_ACTIONS)
+    jostled_probs[:, horizontal, horizontal] += 1.0 - crowded_slip_prob
+    outcome_states[crowded, :NUM_HORIZONTAL_ACTIONS], outcome_probs[crowded, :NUM_HORIZONTAL_ACTIONS] = _merge_outcomes(
+        jostled_states, jostled_probs
+    )
+
+    valid = outcome_states >= 0
+    outcome_rewards = np.zeros(outcome_states.shape)
+    outcome_rewards[valid] = (
+        np.broadcast_to(penalties[:, None, None], valid.shape)[valid] + goal_reward * terminal[outcome_states[valid]]
+    )
+    rewards = np.sum(outcome_probs * outcome_rewards, axis=2)
+
+    return TransitionTable(
+        states, state_index, next_states, rewards, terminal, portals, outcome_states, outcome_probs, outcome_rewards
+    )
+
+
+def _number_states(layout: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Numbers the states of a layout in encoding order (floor, then x, then y).
+    floors, xs, ys = np.nonzero(np.isin(layout, VALID_STATE_TYPES).transpose(0, 2, 1))
+    states = np.stack([floors, ys, xs], axis=1).astype(np.int32)
+    state_index = np.full(layout.shape, -1, dtype=np.int32)
+    state_index[floors, ys, xs] = np.arange(len(states), dtype=np.int32)
+    return states, state_index
+
+
+def _horizontal_moves(states: np.ndarray, state_index: np.ndarray) -> np.ndarray:
+    # Returns the (N, 4) next states of each state's horizontal moves.
+    num_states = len(states)
+    own_index = np.arange(num_states, dtype=np.int32)
+    moves = np.empty((num_states, ASCEND), dtype=np.int32)
+    for action, offset in enumerate(ACTION_OFFSETS[:ASCEND]):
+        targets = states + offset
+        in_bounds = np.all((targets >= 0) & (targets < state_index.shape), axis=1)
+        target_index = np.full(num_states, -1, dtype=np.int32)
+        target_index[in_bounds] = state_index[tuple(targets[in_bounds].T)]
+
+        # Moving into a wall (or off the map) leaves the agent in place.
+        moves[:, action] = np.where(target_index >= 0, target_index, own_index)
+    return moves
+
+
+def _tile_floor_templates(layout: np.ndarray, floor_templates: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+    # Numbers the states of each template's floor and works out their horizontal moves once, then offsets copies of
+    # them for every floor using the template. States are numbered floor by floor, so this matches _number_states.
+    templates = {}
+    for floor, template in enumerate(floor_templates):
+        if template not in templates:
+            states, state_index = _number_states(layout[floor : floor + 1])
+            templates[template] = (states, _horizontal_moves(states, state_index))
+
+    counts = [len(templates[template][0]) for template in floor_templates]
+    offsets = np.zeros(len(counts) + 1, dtype=np.int32)
+    np.cumsum(counts, out=offsets[1:])
+
+    states = np.empty((offsets[-1], 3), dtype=np.int32)
+    moves = np.empty((offsets[-1], ASCEND), dtype=np.int32)
+    for floor, template in enumerate(floor_templates):
+        template_states, template_moves = templates[template]
+        start, end = offsets[floor], offsets[floor + 1]
+        states[start:end] = template_states
+        states[start:end, 0] = floor
+        np.add(template_moves, start, out=moves[start:end])
+    return states, moves
+
+
+def _merge_outcomes(states: np.ndarray, probs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Combines repeated outcomes along the last axis (e.g., two moves into walls both leave the agent in place),
+    # then moves the padding to the end.
+    order = np.argsort(states, axis=-1)
+    states = np.take_along_axis(states, order, axis=-1)
+    probs = np.take_along_axis(probs, order, axis=-1)
+    for k in range(states.shape[-1] - 1, 0, -1):
+        repeated = states[..., k] == states[..., k - 1]
+        probs[..., k - 1] += np.where(repeated, probs[..., k], 0.0)
+        probs[..., k][repeated] = 0.0
+        states[..., k][repeated] = -1
+
+    order = np.argsort(states < 0, axis=-1, kind="stable")
+    return np.take_along_axis(states, order, axis=-1), np.take_along_axis(probs, order, axis=-1)
+
+
+def find_portals(layout: np.ndarray, state_index: np.ndarray) -> np.ndarray:
+    """
+    Lists every transition between floors in an office layout. Elevators lead to the same cell on the floors above
+    and below. Upward stairs lead to the same cell on the floor above, and any stair cell leads down if the cell below
+    it is an upward stair, so a stairwell is a column of upward stairs topped by a downward stair.
+
+    Args:
+        layout (np.ndarray): A (num_floors, floor_height, floor_width) array of CellType values.
+        state_index (np.ndarray): An array of the same shape, mapping each cell to its state index, or -1 for non-states.
+
+    Returns:
+        np.ndarray: A (P, 3) array of (source, action, target) rows, sorted by source state.
+    """
+    num_floors = layout.shape[0]
+    elevators = layout == CellType.ELEVATOR.value
+    upstairs = layout == CellType.UPSTAIR.value
+
+    stairs = upstairs | (layout == CellType.DOWNSTAIR.value)
+
+    up = elevators | upstairs
+    up[num_floors - 1] = False
+    down = np.zeros_like(up)
+    down[1:] = elevators[1:] | (stairs[1:] & upstairs[:-1])
+
+    portals = []
+    for action, mask in [(ASCEND, up), (DESCEND, down)]:
+        floors, ys, xs = np.nonzero(mask)
+        sources = state_index[floors, ys, xs]
+        targets = state_index[floors + ACTION_OFFSETS[action, 0], ys, xs]
+        # As with horizontal moves, an elevator leading into a wall leaves the agent in place.
+        portals.append(np.stack([sources, np.full_like(sources, action), np.where(targets >= 0, targets, sources)], 1))
+
+    portals = np.concatenate(portals).reshape(-1, 3).astype(np.int32)
+    return portals[np.lexsort((portals[:, 1], portals[:, 0]))]
@@ -12,8 +12,9 @@ setuptools.setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/Ueva/OffcieWorld",
-    packages=setuptools.find_packages(exclude=("example", "test")),
+    packages=setuptools.find_packages(exclude=("example", "test", "benchmarks")),
     install_requires=["numpy", "pygame", "networkx", "simpleoptions"],
+    extras_require={"laplacian": ["scipy"]},
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
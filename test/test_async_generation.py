@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from officeworld.generator.async_generation import generate_many
+from officeworld.generator.office_generator import OfficeGenerator
+from officeworld.utils.serialisation import OfficeBuildingBinaryHandler
+
+
+def test_binary_serialisation():
+    office_building = OfficeGenerator(num_floors=3, elevator_location=(7, 7), seed=0).generate_office_building()
+    loaded_office_building = OfficeBuildingBinaryHandler.from_bytes(
+        OfficeBuildingBinaryHandler.to_bytes(office_building)
+    )
+
+    assert loaded_office_building.layout == office_building.layout
+    assert loaded_office_building.halls == office_building.halls
+    assert loaded_office_building.rooms == office_building.rooms
+    assert loaded_office_building.floor_templates is None
+
+    # Data written before floor templates were stored still decodes.
+    legacy_office_building = OfficeBuildingBinaryHandler.from_bytes(
+        OfficeBuildingBinaryHandler.to_bytes(office_building)[:-4]
+    )
+    assert legacy_office_building.layout == office_building.layout
+
+
+def test_binary_serialisation_keeps_floor_templates():
+    office_gen = OfficeGenerator(num_floors=6, num_templates=2, elevator_location=(7, 7), seed=0)
+    office_building = office_gen.generate_office_building()
+    loaded_office_building = OfficeBuildingBinaryHandler.from_bytes(
+        OfficeBuildingBinaryHandler.to_bytes(office_building)
+    )
+
+    assert loaded_office_building.layout == office_building.layout
+    assert loaded_office_building.halls == office_building.halls
+    assert loaded_office_building.rooms == office_building.rooms
+    assert loaded_office_building.floor_templates == office_building.floor_templates
+    assert loaded_office_building.num_templates == office_building.num_templates == 2
+    for floor, template in enumerate(loaded_office_building.floor_templates):
+        first = loaded_office_building.floor_templates.index(template)
+        assert loaded_office_building.layout[floor] is loaded_office_building.layout[first]
+
+
+def test_generate_many():
+    specs = [{"num_floors": 2, "elevator_location": (7, 7), "seed": i} for i in range(6)]
+
+    async def collect():
+        return [result async for result in generate_many(specs, max_workers=2, max_pending=3)]
+
+    results = asyncio.run(collect())
+    assert sorted(index for index, _ in results) == list(range(6))
+
+    # Seeded specs produce the same offices as generating them directly.
+    for index, office_building in results:
+        expected = OfficeGenerator(**specs[index]).generate_office_building()
+        assert office_building.layout == expected.layout
+        assert office_building.rooms == expected.rooms
+
+
+def test_generate_many_stops_early():
+    specs = ({"num_floors": 1, "seed": i} for i in range(1000))
+
+    async def take_two():
+        results = []
+        async for result in generate_many(specs, max_workers=2, max_pending=2):
+            results.append(result)
+            if len(results) == 2:
+                break
+        return results
+
+    assert len(asyncio.run(take_two())) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
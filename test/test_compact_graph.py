@@ -0,0 +1,56 @@
+import random
+
+import networkx as nx
+import pytest
+
+from officeworld.generator.cell_type import CellType
+from officeworld.officeworld_env import OfficeWorldEnvironment
+from officeworld.generator.office_generator import OfficeGenerator
+
+
+@pytest.fixture(
+    params=[
+        {"num_floors": 3, "elevator_location": (7, 7)},
+        {"num_floors": 4, "elevator_location": [(7, 7), (20, 30)], "num_stairwells": 4},
+    ]
+)
+def sample_office_building(request):
+    random.seed(0)
+    office_gen = OfficeGenerator(**request.param)
+    office_building = office_gen.generate_office_building()
+    return office_building
+
+
+def test_compact_backend_matches_networkx(sample_office_building):
+    random.seed(1)
+    nx_env = OfficeWorldEnvironment(office=sample_office_building)
+    random.seed(1)
+    compact_env = OfficeWorldEnvironment(office=sample_office_building, graph_backend="compact")
+
+    # Ensure that both backends have the same state-space and transitions.
+    assert compact_env.state_space == nx_env.state_space
+    compact_stg = compact_env.stg.to_networkx().subgraph(nx_env.state_space)
+    assert set(compact_stg.edges) == set(nx_env.stg.edges)
+
+    for state in nx_env.state_space:
+        for action in nx_env.get_available_actions(state):
+            assert compact_env.step(action, state) == nx_env.step(action, state)
+
+
+def test_compact_graph_connectivity(sample_office_building):
+    office_gen = OfficeGenerator()
+    for floor in sample_office_building.layout:
+        assert office_gen._is_floor_connected(floor)
+        assert nx.is_weakly_connected(office_gen.generate_office_graph([floor], layout=False))
+
+    # Walling off a single hallway cell disconnects it from the rest of the floor.
+    floor = [list(row) for row in sample_office_building.layout[0]]
+    y, x = 7, 7
+    floor[y][x] = CellType.HALL
+    for dy, dx in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
+        floor[y + dy][x + dx] = CellType.WALL
+    assert not office_gen._is_floor_connected(floor)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
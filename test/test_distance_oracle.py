@@ -0,0 +1,50 @@
+import random
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from officeworld.officeworld_env import OfficeWorldEnvironment
+from officeworld.generator.office_generator import OfficeGenerator
+
+
+@pytest.fixture
+def sample_env():
+    random.seed(0)
+    office_gen = OfficeGenerator(num_floors=4, elevator_location=(7, 7))
+    office_building = office_gen.generate_office_building()
+    return OfficeWorldEnvironment(office=office_building, start_floor=0, goal_floor=3, graph_backend="compact")
+
+
+def test_distances_to_goal_match_networkx(sample_env):
+    oracle = sample_env.get_distance_oracle()
+    stg = sample_env.stg.to_networkx()
+    goal_states = {state for state in stg.nodes if sample_env.is_state_terminal(state)}
+    expected = nx.multi_source_dijkstra_path_length(stg.reverse(), goal_states)
+
+    distances = oracle.distances_to()
+    for index, state in enumerate(sample_env.stg.nodes):
+        assert distances[index] == expected.get(state, -1)
+
+    state = sample_env.initial_states[0]
+    assert sample_env.get_distance_to_goal(state) == expected[state]
+    with pytest.raises(KeyError):
+        sample_env.get_distance_to_goal((0, 0, 0))  # A wall.
+    for state in [(-1, 7, 7), (0, -1, 7), (0, 7, sample_env.floor_width), (sample_env.num_floors, 7, 7)]:
+        with pytest.raises(KeyError):
+            sample_env.get_distance_to_goal(state)
+
+
+def test_hierarchical_distances_match_flat_search(sample_env):
+    oracle = sample_env.get_distance_oracle()
+    targets = random.sample(range(sample_env.transition_table.num_states), 5)
+
+    for goal in [None, targets]:
+        flat = oracle.distances_to(goal)
+        assert np.array_equal(oracle.distances_to(goal, hierarchical=True), flat)
+        for source in random.sample(range(sample_env.transition_table.num_states), 50):
+            assert oracle.distance(source, goal) == flat[source]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
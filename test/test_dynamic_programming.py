@@ -0,0 +1,51 @@
+import random
+
+import numpy as np
+import pytest
+
+from officeworld.officeworld_env import OfficeWorldEnvironment
+from officeworld.generator.office_generator import OfficeGenerator
+from officeworld.planning import policy_evaluation, uniform_random_policy, value_iteration
+
+
+@pytest.fixture
+def sample_env():
+    random.seed(0)
+    office_gen = OfficeGenerator(num_floors=2, elevator_location=(7, 7))
+    office_building = office_gen.generate_office_building()
+    return OfficeWorldEnvironment(office=office_building, movement_penalty=-0.01, graph_backend="compact")
+
+
+def test_value_iteration_matches_shortest_paths(sample_env):
+    table = sample_env.transition_table
+    gamma = 0.95
+    values, policy = value_iteration(table, gamma, tol=1e-12)
+    distances = sample_env.get_distance_oracle().distances_to()
+
+    # In a deterministic office, the optimal value only depends on the distance to the goal.
+    for state in np.flatnonzero((distances > 0) & ~table.terminal):
+        k = distances[state]
+        expected = -0.01 * (1 - gamma**k) / (1 - gamma) + gamma ** (k - 1)
+        assert values[state] == pytest.approx(expected, abs=1e-8)
+
+    # Evaluating the greedy policy recovers the optimal values.
+    assert np.allclose(policy_evaluation(table, policy, gamma, tol=1e-12), values)
+
+
+def test_policy_evaluation_matches_linear_solve(sample_env):
+    table = sample_env.transition_table
+    gamma = 0.9
+    policy = uniform_random_policy(table)
+
+    transition_matrix = np.zeros((table.num_states, table.num_states))
+    expected_rewards = np.zeros(table.num_states)
+    for state, action in zip(*np.nonzero(table.available_actions)):
+        transition_matrix[state, table.next_states[state, action]] += policy[state, action]
+        expected_rewards[state] += policy[state, action] * table.rewards[state, action]
+    expected = np.linalg.solve(np.identity(table.num_states) - gamma * transition_matrix, expected_rewards)
+
+    assert np.allclose(policy_evaluation(table, policy, gamma, tol=1e-12), expected)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,68 @@
+import random
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from officeworld.officeworld_env import OfficeWorldEnvironment
+from officeworld.generator.cell_type import CellType
+from officeworld.generator.office_generator import OfficeGenerator
+from officeworld.utils.layout_array import layout_to_array
+from officeworld.utils.transition_table import build_transition_table
+
+
+@pytest.fixture
+def sample_office():
+    office_gen = OfficeGenerator(
+        num_floors=6, num_templates=2, elevator_location=(7, 7), num_stairwells=1, max_stair_span=2, seed=0
+    )
+    return office_gen.generate_office_building()
+
+
+def test_floors_share_templates(sample_office):
+    assert len(sample_office.stats.floors) == 2
+    assert sample_office.num_templates >= 2
+    for floor, template in enumerate(sample_office.floor_templates):
+        first = sample_office.floor_templates.index(template)
+        assert sample_office.layout[floor] is sample_office.layout[first]
+
+    # The stairwell's floors were given their own copies before the stairs were placed.
+    layout = layout_to_array(sample_office.layout)
+    stair_floors = np.flatnonzero(np.any(layout == CellType.UPSTAIR.value, axis=(1, 2)))
+    for floor in stair_floors:
+        assert sample_office.floor_templates.count(sample_office.floor_templates[floor]) == 1
+
+
+def test_tiled_transition_table_matches_untiled(sample_office):
+    layout = layout_to_array(sample_office.layout)
+    tiled = build_transition_table(layout, floor_templates=sample_office.floor_templates)
+    untiled = build_transition_table(layout)
+
+    assert np.array_equal(tiled.states, untiled.states)
+    assert np.array_equal(tiled.state_index, untiled.state_index)
+    assert np.array_equal(tiled.next_states, untiled.next_states)
+    assert np.array_equal(tiled.rewards, untiled.rewards)
+    assert np.array_equal(tiled.portals, untiled.portals)
+
+
+def test_carving_unshares_floors(sample_office):
+    random.seed(0)
+    env = OfficeWorldEnvironment(office=sample_office, start_floor=0, goal_floor=4)
+    templates = env.office.floor_templates
+    for floor in [0, 4]:
+        assert templates.count(templates[floor]) == 1
+
+    # Only the carved floors contain start and goal cells.
+    layout = layout_to_array(env.office.layout)
+    assert np.flatnonzero(np.any(layout == CellType.START.value, axis=(1, 2))).tolist() == [0]
+    assert np.flatnonzero(np.any(layout == CellType.GOAL.value, axis=(1, 2))).tolist() == [4]
+    assert not np.any(layout_to_array(sample_office.layout) == CellType.START.value)
+
+    # The tiled interaction graph matches the one found by searching the building.
+    stg = env.generate_interaction_graph(directed=True)
+    assert set(env.stg.nodes) == set(stg.nodes)
+    assert nx.utils.edges_equal(sorted(env.stg.edges), sorted(stg.edges))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,63 @@
+import random
+
+import numpy as np
+import pytest
+
+from officeworld.generator.cell_type import CellType
+from officeworld.generator.office_generator import OfficeGenerator
+from officeworld.planning import GoalSets
+from officeworld.utils.layout_array import layout_to_array
+from officeworld.utils.transition_table import build_transition_table
+
+
+@pytest.fixture(params=[False, True], ids=["deterministic", "stochastic"])
+def sample_office(request):
+    random.seed(0)
+    terrain = 1.0 if request.param else 0.0
+    office_gen = OfficeGenerator(num_floors=2, elevator_location=(7, 7), crowded_hall_prob=terrain, seed=0)
+    return office_gen.generate_office_building()
+
+
+def carve_goal(office, floor, room):
+    layout = layout_to_array(office.layout)
+    left, top, width, height = room
+    goal = layout[floor, top : top + height, left : left + width]
+    goal[goal != CellType.OBSTACLE.value] = CellType.GOAL.value
+    return layout
+
+
+def test_goal_rewards_match_carved_goals(sample_office):
+    table = build_transition_table(layout_to_array(sample_office.layout), explorable=True)
+    goals = GoalSets.from_office(table, sample_office)
+    assert len(goals) == sum(len(rooms) for rooms in sample_office.rooms)
+
+    for goal in [0, len(goals) - 1]:
+        floor, room = goals.rooms[goal]
+        carved = build_transition_table(carve_goal(sample_office, floor, room))
+        assert np.array_equal(goals.mask(goal), carved.terminal)
+
+        states, actions = np.nonzero(carved.available_actions)
+        rewards, reached = goals.expected_rewards(table, states, actions, np.full(len(states), goal))
+        assert np.allclose(rewards, carved.rewards[states, actions])
+        if carved.deterministic:
+            assert np.array_equal(reached, carved.terminal[carved.next_states[states, actions]])
+
+
+def test_batched_steps(sample_office):
+    table = build_transition_table(layout_to_array(sample_office.layout), explorable=True)
+    goals = GoalSets.from_office(table, sample_office)
+    rng = np.random.default_rng(0)
+
+    batch_size = 1000
+    states = rng.integers(table.num_states, size=batch_size)
+    actions = rng.integers(4, size=batch_size)
+    batch_goals = rng.integers(len(goals), size=batch_size)
+    next_states, rewards, terminal = goals.step(table, states, actions, batch_goals, goal_reward=10.0, rng=rng)
+
+    for state, goal, next_state, reward, done in zip(states, batch_goals, next_states, rewards, terminal):
+        assert done == (next_state in goals.indices(goal))
+        assert reward == pytest.approx(table.rewards[state, 0] + 10.0 * done)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
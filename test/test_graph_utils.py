@@ -0,0 +1,32 @@
+import networkx as nx
+import pytest
+
+from officeworld.utils.graph_utils import office_layout, office_positions, write_office_gexf
+
+
+def test_office_positions_match_layout():
+    stg = nx.DiGraph()
+    stg.add_edge((0, 1, 2), (1, 3, 4))
+    office_layout(stg, floor_height=10, floor_width=12, spacing=2.0)
+
+    positions = office_positions(list(stg.nodes), floor_height=10, floor_width=12, spacing=2.0)
+    for node, (x, y, z) in zip(stg.nodes, positions):
+        assert stg.nodes[node]["viz"]["position"] == {"x": x, "y": y, "z": z}
+
+    floor, y, x = 1, 3, 4
+    assert stg.nodes[(floor, y, x)]["viz"]["position"]["x"] == x * 2.0
+    assert stg.nodes[(floor, y, x)]["viz"]["position"]["y"] == -y * 2.0 - ((floor * 10) + 3) * 2.0
+
+
+def test_gexf_export_leaves_graph_unchanged(tmp_path):
+    stg = nx.DiGraph()
+    stg.add_edge((0, 1, 2), (1, 3, 4))
+    write_office_gexf(stg, tmp_path / "office.gexf", floor_height=10, floor_width=12)
+
+    assert all("viz" not in data for _, data in stg.nodes(data=True))
+    exported = nx.read_gexf(tmp_path / "office.gexf")
+    assert all("viz" in data for _, data in exported.nodes(data=True))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from officeworld.officeworld_env import OfficeWorldEnvironment
+from officeworld.generator.office_generator import OfficeGenerator
+from officeworld.utils.trajectories import TrajectoryRecorder
+
+
+@pytest.fixture
+def sample_env():
+    random.seed(0)
+    office_gen = OfficeGenerator(num_floors=2, elevator_location=(7, 7))
+    office_building = office_gen.generate_office_building()
+    return OfficeWorldEnvironment(office=office_building, explorable=True)
+
+
+def test_instrumentation_counts_calls(sample_env):
+    exports = []
+    sample_env.enable_instrumentation(callback=exports.append, export_interval=10)
+
+    sample_env.reset()
+    for _ in range(25):
+        sample_env.step(random.choice(sample_env.get_available_actions()))
+
+    stats = sample_env.get_instrumentation_stats()
+    assert stats["reset"]["count"] == 1
+    assert stats["step"]["count"] == stats["base_step"]["count"] == 25
+    assert stats["get_available_actions"]["count"] == 25
+    assert sum(stats["step"]["histogram_ns"].values()) == 25
+    assert stats["step"]["min_s"] <= stats["step"]["mean_s"] <= stats["step"]["max_s"]
+    assert len(exports) == 2
+
+
+def test_disabling_instrumentation_restores_methods(sample_env):
+    sample_env.enable_instrumentation()
+    sample_env.disable_instrumentation()
+
+    for method in OfficeWorldEnvironment.INSTRUMENTED_METHODS:
+        assert method not in sample_env.__dict__
+    assert sample_env.get_instrumentation_stats() == {}
+
+
+def test_disabling_instrumentation_keeps_other_wrappers(sample_env, tmp_path):
+    recorder = TrajectoryRecorder.for_environment(tmp_path, sample_env)
+
+    # Instrumentation enabled after attaching a recorder restores the recorder's methods when disabled.
+    recorder.attach(sample_env)
+    sample_env.enable_instrumentation()
+    sample_env.disable_instrumentation()
+    sample_env.reset()
+    sample_env.step(sample_env.get_available_actions()[0])
+    assert len(recorder) == 1
+
+    # Instrumentation cannot be disabled from underneath a recorder attached after it, which keeps recording.
+    recorder.detach()
+    sample_env.enable_instrumentation()
+    recorder.attach(sample_env)
+    with pytest.raises(ValueError):
+        sample_env.disable_instrumentation()
+    sample_env.step(sample_env.get_available_actions()[0])
+    assert len(recorder) == 2
+    assert sample_env.get_instrumentation_stats()["step"]["count"] == 1
+
+    recorder.detach()
+    sample_env.disable_instrumentation()
+    for method in OfficeWorldEnvironment.INSTRUMENTED_METHODS:
+        assert method not in sample_env.__dict__
+    recorder.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
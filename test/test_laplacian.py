@@ -0,0 +1,62 @@
+import random
+
+import networkx as nx
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy")
+
+from officeworld.officeworld_env import OfficeWorldEnvironment
+from officeworld.generator.office_generator import OfficeGenerator
+from officeworld.planning import laplacian_eigenvectors, normalised_laplacian
+
+
+@pytest.fixture
+def sample_env():
+    random.seed(0)
+    office_gen = OfficeGenerator(num_floors=2, elevator_location=(7, 7))
+    office_building = office_gen.generate_office_building()
+    return OfficeWorldEnvironment(office=office_building, graph_backend="compact")
+
+
+def test_laplacian_matches_networkx(sample_env):
+    table = sample_env.transition_table
+    states = np.flatnonzero(sample_env._reachable)
+
+    graph = sample_env.stg.to_networkx().to_undirected()
+    graph.remove_edges_from(list(nx.selfloop_edges(graph)))
+    nodes = [tuple(table.states[i]) for i in states]
+    expected = nx.normalized_laplacian_matrix(graph, nodelist=nodes).toarray()
+
+    assert np.allclose(normalised_laplacian(table, states).toarray(), expected)
+
+
+def test_eigenvectors_match_dense_solver(sample_env):
+    table = sample_env.transition_table
+    states = np.flatnonzero(sample_env._reachable)
+    laplacian = normalised_laplacian(table, states).toarray()
+    expected_values = np.linalg.eigvalsh(laplacian)[:6]
+
+    values, vectors = laplacian_eigenvectors(table, 6, states)
+    assert np.allclose(values, expected_values, atol=1e-8)
+    assert np.allclose(laplacian @ vectors, vectors * values, atol=1e-6)
+    assert np.allclose(vectors.T @ vectors, np.identity(6), atol=1e-6)
+
+
+def test_environment_caches_eigenvectors(sample_env):
+    values, vectors = sample_env.get_laplacian_eigenvectors(4)
+    assert vectors.shape == (sample_env.transition_table.num_states, 4)
+    assert np.all(vectors[~sample_env._reachable] == 0.0)
+
+    fewer_values, fewer_vectors = sample_env.get_laplacian_eigenvectors(2)
+    assert np.array_equal(fewer_values, values[:2])
+    assert np.shares_memory(fewer_vectors, vectors)
+
+    state = sample_env.get_initial_states()[0]
+    assert np.array_equal(
+        sample_env.get_laplacian_eigenvectors(4, state)[1], vectors[sample_env.transition_table.index(state)]
+    )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,94 @@
+import random
+
+import numpy as np
+import pytest
+
+from officeworld.officeworld_env import OfficeWorldEnvironment
+from officeworld.generator.cell_type import CellType
+from officeworld.generator.office_generator import OfficeGenerator
+from officeworld.utils.observations import NUM_CELL_TYPES, ObservationEncoder
+
+
+@pytest.fixture
+def sample_env():
+    random.seed(0)
+    office_gen = OfficeGenerator(num_floors=2, elevator_location=(7, 7))
+    office_building = office_gen.generate_office_building()
+    return OfficeWorldEnvironment(office=office_building, graph_backend="compact")
+
+
+def naive_window(env, state, window_size):
+    floor, y, x = state
+    radius = window_size // 2
+    window = np.full((window_size, window_size), CellType.WALL.value, dtype=np.uint8)
+    for i in range(window_size):
+        for j in range(window_size):
+            y_i, x_j = y + i - radius, x + j - radius
+            if 0 <= y_i < env.floor_height and 0 <= x_j < env.floor_width:
+                window[i, j] = env.office.layout[floor][y_i][x_j].value
+    return window
+
+
+def test_windows_match_layout(sample_env):
+    encoder = sample_env.get_observation_encoder(window_size=7)
+    states = sorted(sample_env.get_state_space())[::7] + [(0, 0, 0), (1, sample_env.floor_height - 1, 3)]
+
+    batch = encoder.windows_batch(states)
+    one_hot_batch = encoder.one_hot_windows_batch(states)
+    for state, window, one_hot in zip(states, batch, one_hot_batch):
+        expected = naive_window(sample_env, state, 7)
+        assert np.array_equal(encoder.window(state), expected)
+        assert np.array_equal(window, expected)
+        assert np.array_equal(encoder.one_hot_window(state), one_hot)
+        assert np.array_equal(np.argmax(one_hot, axis=0) + 1, expected)
+
+    # Single windows are views into the padded layout, rather than copies.
+    assert np.shares_memory(encoder.window(states[0]), encoder.padded)
+    with pytest.raises(ValueError):
+        encoder.window(states[0])[0, 0] = 0
+
+
+def test_one_hot_encodings(sample_env):
+    encoder = sample_env.get_observation_encoder()
+    table = sample_env.transition_table
+    states = sorted(sample_env.get_state_space())[::5]
+
+    floors = encoder.floor_one_hots_batch(states)
+    tabular = encoder.tabular_one_hots_batch(states)
+    assert floors.shape == (len(states), sample_env.num_floors)
+    assert tabular.shape == (len(states), table.num_states)
+    for state, floor, one_hot in zip(states, floors, tabular):
+        assert np.array_equal(encoder.floor_one_hot(state), floor)
+        assert np.array_equal(encoder.tabular_one_hot(state), one_hot)
+        assert np.flatnonzero(floor).tolist() == [state[0]]
+        assert np.flatnonzero(one_hot).tolist() == [table.index(state)]
+
+    # Batched encoders write into caller-provided buffers.
+    out = np.full((len(states), table.num_states), 5.0, dtype=np.float32)
+    assert encoder.tabular_one_hots_batch(states, out=out) is out
+    assert np.array_equal(out, tabular)
+    windows = np.empty((len(states), NUM_CELL_TYPES, 5, 5), dtype=np.float32)
+    assert encoder.one_hot_windows_batch(states, out=windows) is windows
+
+    # Repeated batches of the same size reuse the encoder's intermediate window buffer.
+    window_buffer = encoder._window_buffer
+    encoder.one_hot_windows_batch(states, out=windows)
+    assert encoder._window_buffer is window_buffer
+
+
+def test_invalid_encoders(sample_env):
+    with pytest.raises(ValueError):
+        ObservationEncoder(sample_env.office.layout, window_size=4)
+    with pytest.raises(ValueError):
+        ObservationEncoder(sample_env.office.layout).tabular_one_hot((0, 7, 7))
+
+    # Walls have no state index, so they have no tabular encoding.
+    encoder = sample_env.get_observation_encoder()
+    with pytest.raises(ValueError):
+        encoder.tabular_one_hot((0, 0, 0))
+    with pytest.raises(ValueError):
+        encoder.tabular_one_hots_batch([sample_env.initial_states[0], (0, 0, 0)])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,51 @@
+import random
+
+import numpy as np
+import pytest
+
+from officeworld.generator.office_generator import OfficeGenerator
+from officeworld.utils.layout_array import layout_to_array
+from officeworld.utils.office_dataset import OfficeDataset, OfficeDatasetWriter, generate_dataset
+
+
+@pytest.fixture
+def sample_offices():
+    random.seed(0)
+    return [
+        OfficeGenerator(
+            floor_width=20 + i, floor_height=16, num_floors=1 + i % 3, min_room_area=20
+        ).generate_office_building()
+        for i in range(5)
+    ]
+
+
+def test_dataset_round_trip(tmp_path, sample_offices):
+    with OfficeDatasetWriter(tmp_path / "offices") as writer:
+        for office in sample_offices:
+            writer.append(office)
+
+    dataset = OfficeDataset(tmp_path / "offices")
+    assert len(dataset) == len(sample_offices)
+
+    # Offices can be read back in any order.
+    for i in [3, 0, 4, 1, 2]:
+        office = dataset[i]
+        assert office.layout == sample_offices[i].layout
+        assert office.halls == sample_offices[i].halls
+        assert office.rooms == sample_offices[i].rooms
+        assert np.array_equal(dataset.layout_array(i), layout_to_array(sample_offices[i].layout))
+
+
+def test_generate_dataset_preserves_order(tmp_path):
+    specs = [{"floor_width": 20, "floor_height": 16, "min_room_area": 20, "seed": i} for i in range(6)]
+    dataset = generate_dataset(tmp_path / "offices", specs, max_workers=2, chunksize=2)
+
+    assert len(dataset) == len(specs)
+    for i in [5, 2]:
+        office = OfficeGenerator(**specs[i]).generate_office_building()
+        assert dataset[i].layout == office.layout
+        assert dataset[i].rooms == office.rooms
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
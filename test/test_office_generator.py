@@ -0,0 +1,121 @@
+import random
+
+import numpy as np
+import pytest
+
+from officeworld.generator.cell_type import CellType
+from officeworld.generator.furniture import furnish_floor
+from officeworld.generator.generation_stats import PHASES
+from officeworld.generator.office_generator import OfficeGenerator
+from officeworld.officeworld_env import OfficeWorldEnvironment
+from officeworld.utils.compact_graph import CompactGraph
+from officeworld.utils.layout_array import layout_to_array
+from officeworld.utils.transition_table import build_transition_table
+
+
+def test_generation_stats():
+    random.seed(0)
+    phase_calls = {phase: 0 for phase in PHASES}
+
+    def make_callback(phase):
+        def callback(elapsed, floor_stats):
+            assert elapsed >= 0.0
+            phase_calls[phase] += 1
+
+        return callback
+
+    office_gen = OfficeGenerator(
+        num_floors=3,
+        elevator_location=(7, 7),
+        phase_callbacks={phase: make_callback(phase) for phase in PHASES},
+    )
+    office_building = office_gen.generate_office_building()
+    stats = office_building.stats
+
+    # Every rejected floor is regenerated, so each attempt is either accepted or rejected.
+    assert len(stats.floors) == 3
+    assert stats.attempts == 3 + stats.rejections
+    for floor_stats in stats.floors:
+        assert floor_stats.attempts == 1 + floor_stats.rejections
+
+    # Each generation attempt runs the hallway, room and doors phases once.
+    assert phase_calls["hallway"] == phase_calls["room"] == phase_calls["doors"] == stats.attempts
+    assert phase_calls["connectivity"] == 3 + stats.rejected_connected
+    assert sum(stats.phase_times.values()) <= stats.total_time
+
+
+def test_stairwells_and_elevator_shafts():
+    office_gen = OfficeGenerator(num_floors=5, elevator_location=[(7, 7), (20, 30)], num_stairwells=3, seed=0)
+    layout = layout_to_array(office_gen.generate_office_building().layout)
+    assert np.all(layout[:, [7, 20], [7, 30]] == CellType.ELEVATOR.value)
+
+    # Each stairwell is a column of upward stairs, topped by a single downward stair.
+    downstairs = np.argwhere(layout == CellType.DOWNSTAIR.value)
+    assert len(downstairs) == 3
+    for floor, y, x in downstairs:
+        assert floor > 0 and layout[floor - 1, y, x] == CellType.UPSTAIR.value
+
+    # Portals are listed for both directions of every elevator and stair.
+    table = build_transition_table(layout, explorable=True)
+    num_upstairs = np.sum(layout == CellType.UPSTAIR.value)
+    assert len(table.portals) == 2 * 2 * (5 - 1) + 2 * num_upstairs
+    for source, action, target in table.portals.tolist():
+        assert table.next_states[source, action] == target
+        assert abs(table.states[source, 0] - table.states[target, 0]) == 1
+    assert np.sum(table.next_states[:, 4:] >= 0) == len(table.portals)
+
+
+def test_furniture_keeps_floors_connected():
+    office_gen = OfficeGenerator(num_floors=2, elevator_location=(20, 25), obstacle_density=0.5, seed=0)
+    office_building = office_gen.generate_office_building()
+    layout = layout_to_array(office_building.layout)
+
+    # Furniture is only placed inside rooms, and never disconnects the office.
+    obstacles = layout == CellType.OBSTACLE.value
+    assert obstacles.sum() > 0
+    in_room = np.zeros_like(obstacles)
+    for floor, rooms in enumerate(office_building.rooms):
+        for left, top, width, height in rooms:
+            in_room[floor, top : top + height, left : left + width] = True
+    assert not np.any(obstacles & ~in_room)
+    table = build_transition_table(layout, explorable=True)
+    assert CompactGraph.from_transition_table(table).is_weakly_connected()
+
+    # Furniture is reproducible from the seed, and is left in place when start and goal rooms are carved.
+    same_office = OfficeGenerator(num_floors=2, elevator_location=(20, 25), obstacle_density=0.5, seed=0)
+    assert same_office.generate_office_building().layout == office_building.layout
+    env = OfficeWorldEnvironment(office=office_building, graph_backend="compact")
+    assert np.array_equal(layout_to_array(env.office.layout) == CellType.OBSTACLE.value, obstacles)
+
+
+def test_dense_furniture_respects_domains():
+    with pytest.raises(ValueError):
+        OfficeGenerator(obstacle_density=1.0)
+    with pytest.raises(ValueError):
+        OfficeGenerator(obstacle_density=-0.1)
+
+    # A 10x10 room, with a cell the agent cannot occupy inside it.
+    free = np.zeros((12, 12), dtype=bool)
+    free[1:11, 1:11] = True
+    free[5, 5] = False
+    border = free.copy()
+    border[2:10, 2:10] = False
+    interior = free & ~border
+
+    for seed in range(50):
+        obstacles = furnish_floor(free, [(1, 1, 10, 10)], 1.0, np.random.default_rng(seed))
+        assert obstacles.sum() > 0
+        assert not np.any(obstacles & ~free)
+
+        # Cabinets stand against the walls and desks away from them. Desks only form east-west rows, and cabinets
+        # never touch desks.
+        cabinets, desks = obstacles & border, obstacles & interior
+        assert not np.any(desks[1:] & desks[:-1])
+        for neighbours in [cabinets[1:] & desks[:-1], cabinets[:-1] & desks[1:]]:
+            assert not np.any(neighbours)
+        for neighbours in [cabinets[:, 1:] & desks[:, :-1], cabinets[:, :-1] & desks[:, 1:]]:
+            assert not np.any(neighbours)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,50 @@
+import random
+
+import numpy as np
+import pytest
+
+from officeworld.officeworld_env import OfficeWorldEnvironment
+from officeworld.generator.office_generator import OfficeGenerator
+
+
+@pytest.fixture
+def sample_env():
+    random.seed(0)
+    office_gen = OfficeGenerator(num_floors=3, elevator_location=(7, 7))
+    office_building = office_gen.generate_office_building()
+    return OfficeWorldEnvironment(office=office_building, explorable=True, graph_backend="compact")
+
+
+def test_region_graph_structure(sample_env):
+    region_graph = sample_env.get_region_graph()
+    office = sample_env.office
+
+    # One region per hall and room, plus one per elevator.
+    num_rects = sum(len(halls) + len(rooms) for halls, rooms in zip(office.halls, office.rooms))
+    assert region_graph.num_regions == num_rects + sample_env.num_floors
+
+    # The office is connected, so every region can reach every other region.
+    assert np.all(region_graph.region_distances(0) >= 0)
+    path = region_graph.region_path(0, region_graph.num_regions - 1)
+    assert path[0] == 0 and path[-1] == region_graph.num_regions - 1
+    for source, target in zip(path, path[1:]):
+        assert (source, target) in region_graph.doors
+
+
+def test_region_options_reach_target_region(sample_env):
+    region_graph = sample_env.get_region_graph()
+
+    for option in region_graph.get_options():
+        source_states = np.flatnonzero(region_graph.region_of_state == option.source)
+        state = region_graph.table.state(random.choice(source_states))
+        assert option.initiation(state)
+
+        for _ in range(sample_env.num_states):
+            state, _, _, _ = sample_env.step(option.policy(state), state)
+            if option.termination(state) == 1.0:
+                break
+        assert region_graph.region_of(state) == option.target
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,63 @@
+import multiprocessing
+import random
+
+import pytest
+
+from officeworld.officeworld_env import OfficeWorldEnvironment
+from officeworld.generator.office_generator import OfficeGenerator
+from officeworld.utils.shared_office import SharedOffice
+
+
+@pytest.fixture
+def sample_env():
+    random.seed(0)
+    office_gen = OfficeGenerator(num_floors=2, elevator_location=(7, 7))
+    office_building = office_gen.generate_office_building()
+    return OfficeWorldEnvironment(office=office_building, graph_backend="compact")
+
+
+def rollout(env, seed, num_steps=200):
+    rng = random.Random(seed)
+    trajectory = [env.reset(rng.choice(env.get_initial_states()))]
+    for _ in range(num_steps):
+        actions = env.get_available_actions()
+        if len(actions) == 0:
+            break
+        trajectory.append(env.step(rng.choice(actions))[:3])
+    return trajectory
+
+
+def attached_rollout(handle, seed):
+    env = OfficeWorldEnvironment.attach_shared(handle)
+    return rollout(env, seed)
+
+
+def test_attached_environment_matches_original(sample_env):
+    with SharedOffice.publish(sample_env) as shared:
+        env = OfficeWorldEnvironment.attach_shared(shared.handle)
+
+        assert env.num_states == sample_env.num_states
+        assert env.get_state_space() == sample_env.get_state_space()
+        assert env.get_initial_states() == sample_env.get_initial_states()
+        assert env.terminal_states == sample_env.terminal_states
+        assert env.office.layout[1][7][7] == sample_env.office.layout[1][7][7]
+        assert env.stg.number_of_edges() == sample_env.stg.number_of_edges()
+        for seed in range(5):
+            assert rollout(env, seed) == rollout(sample_env, seed)
+
+        # Attached arrays are read-only views of the shared memory.
+        with pytest.raises(ValueError):
+            env.transition_table.next_states[0, 0] = 0
+        del env
+
+
+def test_worker_processes_share_office(sample_env):
+    with SharedOffice.publish(sample_env) as shared:
+        with multiprocessing.get_context("fork").Pool(2) as pool:
+            trajectories = pool.starmap(attached_rollout, [(shared.handle, seed) for seed in range(4)])
+
+    assert trajectories == [rollout(sample_env, seed) for seed in range(4)]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
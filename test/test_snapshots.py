@@ -0,0 +1,88 @@
+import random
+
+import numpy as np
+import pytest
+
+from officeworld.officeworld_env import EnvironmentSnapshot, OfficeWorldEnvironment
+from officeworld.generator.office_generator import OfficeGenerator
+from officeworld.utils.trajectories import TrajectoryRecorder
+
+
+@pytest.fixture(params=["networkx", "compact"])
+def sample_env(request):
+    random.seed(0)
+    office_gen = OfficeGenerator(num_floors=2, elevator_location=(7, 7))
+    office_building = office_gen.generate_office_building()
+    return OfficeWorldEnvironment(office=office_building, graph_backend=request.param)
+
+
+def random_walk(env, seed, num_steps=50):
+    rng = random.Random(seed)
+    trajectory = []
+    for _ in range(num_steps):
+        actions = env.get_available_actions()
+        if len(actions) == 0:
+            break
+        trajectory.append(env.step(rng.choice(actions))[:3])
+    return trajectory
+
+
+def test_restoring_snapshot_replays_episode(sample_env):
+    sample_env.reset()
+    random_walk(sample_env, 0)
+    snapshot = sample_env.get_snapshot()
+    assert snapshot == EnvironmentSnapshot(sample_env.current_state)
+
+    trajectory = random_walk(sample_env, 1)
+    sample_env.restore_snapshot(snapshot)
+    assert sample_env.current_state == snapshot.current_state
+    assert random_walk(sample_env, 1) == trajectory
+
+
+def test_clones_share_static_structures(sample_env):
+    sample_env.reset()
+    table = sample_env.transition_table
+    clone = sample_env.clone()
+    assert clone.stg is sample_env.stg
+    assert clone.office is sample_env.office
+    assert clone.transition_table is table
+
+    # Clones step independently of the original.
+    state = sample_env.current_state
+    trajectory = random_walk(clone, 0)
+    assert sample_env.current_state == state
+    assert random_walk(sample_env.clone(), 0) == trajectory
+    assert sample_env.clone(EnvironmentSnapshot(trajectory[-1][0])).current_state == trajectory[-1][0]
+
+
+def test_clones_have_their_own_observation_encoder(sample_env):
+    sample_env.reset()
+    encoder = sample_env.get_observation_encoder()
+    clone = sample_env.clone()
+    assert clone.get_observation_encoder() is not encoder
+
+    # Batches encoded through the clone don't overwrite the original's reused window buffer.
+    states = sorted(sample_env.get_state_space())
+    encoder.one_hot_windows_batch(states[:8])
+    clone.get_observation_encoder().one_hot_windows_batch(states[-8:])
+    assert np.array_equal(encoder._window_buffer, encoder.windows_batch(states[:8]))
+
+
+def test_clones_are_not_instrumented(sample_env, tmp_path):
+    instrumentation = sample_env.enable_instrumentation()
+    recorder = TrajectoryRecorder.for_environment(tmp_path, sample_env)
+    recorder.attach(sample_env)
+    sample_env.reset()
+
+    clone = sample_env.clone()
+    assert "step" not in clone.__dict__
+    assert clone.instrumentation is None
+    random_walk(clone, 0)
+    assert instrumentation.to_dict()["reset"]["count"] == 1
+    assert "step" not in instrumentation.to_dict()
+    assert len(recorder) == 0
+    recorder.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
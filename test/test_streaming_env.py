@@ -0,0 +1,97 @@
+import copy
+
+import pytest
+
+from officeworld.generator.cell_type import CellType
+from officeworld.streaming_officeworld_env import StreamingOfficeWorldEnvironment
+
+OFFICEGEN_KWARGS = {"floor_width": 20, "floor_height": 16, "min_room_area": 20}
+
+
+@pytest.fixture
+def sample_env():
+    return StreamingOfficeWorldEnvironment(OFFICEGEN_KWARGS, seed=0, max_resident_floors=2)
+
+
+def ride_elevator(env, num_floors, action):
+    y, x = env._office_gen.elevator_location
+    state = (env.current_state[0], y, x)
+    for _ in range(num_floors):
+        state, _, _, _ = env.step(action, state=state)
+    return state
+
+
+def test_floors_are_generated_lazily(sample_env):
+    assert sample_env.floors_generated == 1
+    assert sample_env.resident_floors == [0]
+    assert len(sample_env.get_initial_states()) > 0
+
+    sample_env.reset()
+    assert ride_elevator(sample_env, 5, 4)[0] == 5
+    assert sample_env.floors_generated == 6
+    assert sample_env.resident_floors == [4, 5]
+
+
+def test_floors_are_deterministic(sample_env):
+    other_env = StreamingOfficeWorldEnvironment(OFFICEGEN_KWARGS, seed=0, max_resident_floors=8)
+    first_floor = copy.deepcopy(sample_env.get_floor(3))
+
+    # Evicted floors are regenerated identically, regardless of the order floors are visited in.
+    for floor in [7, 6, 5]:
+        sample_env.get_floor(floor)
+    assert 3 not in sample_env.resident_floors
+    assert sample_env.get_floor(3) == first_floor
+    assert other_env.get_floor(3) == first_floor
+    assert StreamingOfficeWorldEnvironment(OFFICEGEN_KWARGS, seed=1).get_floor(3) != first_floor
+
+
+def test_goal_floor_is_terminal():
+    env = StreamingOfficeWorldEnvironment(OFFICEGEN_KWARGS, seed=0, num_floors=3, goal_floor=2)
+    env.reset()
+    assert ride_elevator(env, 2, 4)[0] == 2
+    assert 4 not in env.get_available_actions()
+
+    layout = env.get_floor(2)[0]
+    goal_cells = [(2, y, x) for y, row in enumerate(layout) for x, cell in enumerate(row) if cell == CellType.GOAL]
+    assert len(goal_cells) > 0
+    assert all(env.is_state_terminal(state) for state in goal_cells)
+    assert env.get_available_actions(goal_cells[0]) == []
+
+
+def test_unsupported_features_are_rejected(sample_env):
+    with pytest.raises(ValueError):
+        StreamingOfficeWorldEnvironment({**OFFICEGEN_KWARGS, "num_stairwells": 1}, seed=0)
+
+    # Stairwell-free kwargs are still accepted.
+    StreamingOfficeWorldEnvironment({**OFFICEGEN_KWARGS, "num_stairwells": 0}, seed=0)
+
+    with pytest.raises(ValueError):
+        sample_env.get_state_space()
+
+
+def test_terrain_is_applied():
+    terrain_kwargs = {**OFFICEGEN_KWARGS, "crowded_hall_prob": 1.0, "muddy_room_prob": 1.0}
+    env = StreamingOfficeWorldEnvironment(terrain_kwargs, seed=0, muddy_penalty=-0.5, crowded_slip_prob=0.5)
+    layout = env.get_floor(0)[0]
+    cells = {(y, x): cell for y, row in enumerate(layout) for x, cell in enumerate(row)}
+
+    # Actions taken in muddy cells cost the muddy penalty.
+    muddy = [(0, y, x) for (y, x), cell in cells.items() if cell == CellType.MUDDY]
+    assert len(muddy) > 0
+    for state in muddy:
+        assert all(reward == -0.5 for (_, reward), _ in env.get_successors(state))
+        assert env.step(0, state=state)[1] == -0.5
+
+    # Horizontal moves made in crowded cells may be jostled into any horizontal move.
+    crowded = [(0, y, x) for (y, x), cell in cells.items() if cell == CellType.CROWDED]
+    assert len(crowded) > 0
+    for state in crowded:
+        successors = env.get_successors(state, actions=[2])
+        assert sum(probability for _, probability in successors) == pytest.approx(1.0)
+        outcomes = {next_state for (next_state, _), _ in successors}
+        assert outcomes == {env._move(state, action) for action in range(4)}
+        assert {env.step(2, state=state)[0] for _ in range(200)} == outcomes
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
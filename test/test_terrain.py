@@ -0,0 +1,104 @@
+import random
+
+import numpy as np
+import pytest
+
+from officeworld.officeworld_env import OfficeWorldEnvironment
+from officeworld.generator.cell_type import CellType
+from officeworld.generator.office_generator import OfficeGenerator
+from officeworld.planning import policy_evaluation, uniform_random_policy, value_iteration
+from officeworld.utils.layout_array import layout_to_array
+from officeworld.utils.shared_office import SharedOffice
+
+
+@pytest.fixture(scope="module")
+def sample_office():
+    office_gen = OfficeGenerator(
+        num_floors=2, elevator_location=(7, 7), crowded_hall_prob=1.0, muddy_room_prob=1.0, seed=0
+    )
+    return office_gen.generate_office_building()
+
+
+def make_env(office, graph_backend):
+    random.seed(0)
+    return OfficeWorldEnvironment(office=office, movement_penalty=-0.01, graph_backend=graph_backend)
+
+
+def test_generator_adds_terrain(sample_office):
+    layout = layout_to_array(sample_office.layout)
+    assert np.any(layout == CellType.CROWDED.value)
+    assert np.any(layout == CellType.MUDDY.value)
+    assert np.all(layout[:, 7, 7] == CellType.ELEVATOR.value)
+
+
+def test_transition_table_matches_successors(sample_office):
+    env = make_env(sample_office, "networkx")
+    table = make_env(sample_office, "compact").transition_table
+    assert not env.deterministic
+    assert not table.deterministic
+
+    for state in env.get_state_space():
+        index = table.index(state)
+        for action in env.get_available_actions(state):
+            expected = {}
+            for (next_state, reward), probability in env.get_successors(state, [action]):
+                expected[table.index(next_state)] = (reward, probability)
+
+            outcomes = table.outcome_probs[index, action] > 0
+            assert len(expected) == np.count_nonzero(outcomes)
+            for next_index, probability, reward in zip(
+                table.outcome_states[index, action][outcomes],
+                table.outcome_probs[index, action][outcomes],
+                table.outcome_rewards[index, action][outcomes],
+            ):
+                assert expected[next_index] == pytest.approx((reward, probability))
+
+
+def test_sampling_matches_outcome_probabilities(sample_office):
+    table = make_env(sample_office, "compact").transition_table
+    crowded = layout_to_array(sample_office.layout)[tuple(table.states.T)] == CellType.CROWDED.value
+    index = int(np.flatnonzero(crowded & ~table.terminal)[0])
+
+    num_samples = 200000
+    next_states, _ = table.sample(
+        np.full(num_samples, index), np.zeros(num_samples, dtype=int), np.random.default_rng(0)
+    )
+    for next_index, probability in zip(table.outcome_states[index, 0], table.outcome_probs[index, 0]):
+        if probability > 0:
+            assert np.mean(next_states == next_index) == pytest.approx(probability, abs=0.01)
+
+
+def test_policy_evaluation_matches_linear_solve(sample_office):
+    table = make_env(sample_office, "compact").transition_table
+    gamma = 0.9
+    policy = uniform_random_policy(table)
+
+    transition_matrix = np.zeros((table.num_states, table.num_states))
+    expected_rewards = np.sum(policy * table.rewards, axis=1)
+    states, actions, outcomes = np.nonzero(table.outcome_probs > 0)
+    np.add.at(
+        transition_matrix,
+        (states, table.outcome_states[states, actions, outcomes]),
+        policy[states, actions] * table.outcome_probs[states, actions, outcomes],
+    )
+    expected = np.linalg.solve(np.identity(table.num_states) - gamma * transition_matrix, expected_rewards)
+
+    assert np.allclose(policy_evaluation(table, policy, gamma, tol=1e-12), expected)
+
+    # Evaluating the greedy policy found by value iteration recovers the optimal values.
+    values, greedy_policy = value_iteration(table, gamma, tol=1e-12)
+    assert np.allclose(policy_evaluation(table, greedy_policy, gamma, tol=1e-12), values)
+
+
+def test_shared_office_keeps_stochastic_dynamics(sample_office):
+    env = make_env(sample_office, "compact")
+    with SharedOffice.publish(env) as shared:
+        attached = OfficeWorldEnvironment.attach_shared(shared.handle)
+        assert not attached.deterministic
+        assert np.array_equal(attached.transition_table.outcome_probs, env.transition_table.outcome_probs)
+        assert "probability" in attached.stg.edge_attrs
+        del attached
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,109 @@
+import random
+
+import numpy as np
+import pytest
+
+from officeworld.officeworld_env import OfficeWorldEnvironment
+from officeworld.generator.office_generator import OfficeGenerator
+from officeworld.utils.trajectories import TrajectoryDataset, TrajectoryRecorder
+
+
+@pytest.fixture
+def sample_env():
+    random.seed(0)
+    office_gen = OfficeGenerator(num_floors=2, elevator_location=(7, 7))
+    office_building = office_gen.generate_office_building()
+    return OfficeWorldEnvironment(office=office_building, graph_backend="compact")
+
+
+def run_episodes(env, num_episodes, max_steps):
+    transitions, lengths = [], []
+    for _ in range(num_episodes):
+        state = env.reset()
+        for step in range(max_steps):
+            action = random.choice(env.get_available_actions())
+            next_state, reward, terminal, _ = env.step(action)
+            transitions.append((env.encode(state), action, reward, env.encode(next_state), terminal))
+            state = next_state
+            if terminal:
+                break
+        lengths.append(step + 1)
+    return transitions, lengths
+
+
+def test_recorded_transitions_match_environment(sample_env, tmp_path):
+    random.seed(1)
+    with TrajectoryRecorder.for_environment(tmp_path, sample_env, initial_capacity=16) as recorder:
+        recorder.attach(sample_env)
+        transitions, lengths = run_episodes(sample_env, 5, 100)
+        assert recorder.capacity >= len(transitions) > 16
+    assert "step" not in sample_env.__dict__
+
+    dataset = TrajectoryDataset(tmp_path)
+    assert len(dataset) == len(transitions)
+    assert dataset.num_episodes == 5
+    assert np.diff(dataset.episode_bounds).tolist() == lengths
+
+    states, actions, rewards, next_states, terminals = (np.array(column) for column in zip(*transitions))
+    assert np.array_equal(dataset.columns["states"], states)
+    assert np.array_equal(dataset.columns["actions"], actions)
+    assert np.array_equal(dataset.columns["rewards"], rewards)
+    assert np.array_equal(dataset.columns["next_states"], next_states)
+    assert np.array_equal(dataset.columns["terminals"], terminals)
+    assert [sample_env.encode(state) for state in dataset.decode(states)] == states.tolist()
+    assert np.array_equal(dataset.episode(1)["states"], states[lengths[0] : lengths[0] + lengths[1]])
+
+
+def test_batches_cover_every_transition(sample_env, tmp_path):
+    random.seed(2)
+    with TrajectoryRecorder.for_environment(tmp_path, sample_env) as recorder:
+        recorder.attach(sample_env)
+        run_episodes(sample_env, 3, 50)
+    dataset = TrajectoryDataset(tmp_path)
+
+    batches = list(dataset.iter_batches(32))
+    assert np.array_equal(np.concatenate([batch["states"] for batch in batches]), dataset.columns["states"])
+
+    # Shuffled batches visit every transition exactly once.
+    batches = list(dataset.iter_batches(32, shuffle=True, rng=np.random.default_rng(0)))
+    rows = np.concatenate([np.stack([batch["states"], batch["next_states"]], axis=1) for batch in batches])
+    expected = np.stack([dataset.columns["states"], dataset.columns["next_states"]], axis=1)
+    assert np.array_equal(
+        np.unique(rows, axis=0, return_counts=True)[1], np.unique(expected, axis=0, return_counts=True)[1]
+    )
+    assert np.array_equal(np.unique(rows, axis=0), np.unique(expected, axis=0))
+
+    batches = list(dataset.iter_batches(32, drop_last=True))
+    assert len(batches) == len(dataset) // 32
+    assert all(len(batch["rewards"]) == 32 for batch in batches)
+
+
+def test_detaching_keeps_instrumentation(sample_env, tmp_path):
+    recorder = TrajectoryRecorder.for_environment(tmp_path, sample_env)
+
+    # A recorder attached after instrumentation was enabled restores the instrumented methods when detached.
+    sample_env.enable_instrumentation()
+    recorder.attach(sample_env)
+    recorder.detach()
+    sample_env.reset()
+    sample_env.step(sample_env.get_available_actions()[0])
+    assert sample_env.get_instrumentation_stats()["step"]["count"] == 1
+    assert len(recorder) == 0
+
+    # A recorder cannot be detached from underneath instrumentation enabled after it, which keeps counting.
+    sample_env.disable_instrumentation()
+    recorder.attach(sample_env)
+    sample_env.enable_instrumentation()
+    with pytest.raises(ValueError):
+        recorder.detach()
+    sample_env.step(sample_env.get_available_actions()[0])
+    assert sample_env.get_instrumentation_stats()["step"]["count"] == 1
+    assert len(recorder) == 1
+
+    sample_env.disable_instrumentation()
+    recorder.close()
+    assert "step" not in sample_env.__dict__ and "reset" not in sample_env.__dict__
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])